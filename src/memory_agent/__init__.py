@@ -1,9 +1,17 @@
 """Memory agent for case intake."""
 
-from memory_agent.configuration import Configuration
-from memory_agent.graph import graph
-from memory_agent.state import State, CaseData
-from memory_agent.utils import split_model_and_provider
+import importlib
+from typing import Any
+
+# Attributes are resolved on first access, so ``import memory_agent`` does not
+# pull in langgraph, langchain or Firebase.
+_EXPORTS = {
+    "Configuration": "memory_agent.configuration",
+    "graph": "memory_agent.graph",
+    "State": "memory_agent.state",
+    "CaseData": "memory_agent.state",
+    "split_model_and_provider": "memory_agent.utils",
+}
 
 __all__ = [
     "Configuration",
@@ -12,3 +20,10 @@ __all__ = [
     "CaseData",
     "split_model_and_provider"
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        value = globals()[name] = getattr(importlib.import_module(_EXPORTS[name]), name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
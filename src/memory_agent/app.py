@@ -0,0 +1,165 @@
+"""Lazily built services shared by the graph: the document store, the chat models,
+the checkpointer and the node metrics.
+
+Nothing here touches Firebase, credentials or model clients at import time;
+each service is created on first use. Tests (or an embedding application)
+inject their own services with ``use_context``::
+
+    with use_context(AppContext(store=CachedStore(FireStore(fake_client)))):
+        await graph.ainvoke(...)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from memory_agent.cache import CachedStore
+from memory_agent.llm_cache import cache_from_env
+from memory_agent.models import ModelPool
+from memory_agent.telemetry import Telemetry
+
+if TYPE_CHECKING:
+    from memory_agent.checkpointer import FirestoreSaver
+
+
+def firestore_client() -> Any:
+    """Initialize Firebase from FIREBASE_CREDENTIALS and return the async Firestore client."""
+    import firebase_admin
+    from firebase_admin import credentials, firestore_async
+
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        cred_path = os.environ.get("FIREBASE_CREDENTIALS")
+        if not cred_path:
+            raise ValueError("FIREBASE_CREDENTIALS environment variable not set")
+        firebase_admin.initialize_app(credentials.Certificate(cred_path))
+    return firestore_async.client()
+
+
+STORE_BACKENDS = ("firestore", "sqlite")
+
+
+def build_store(client: Any | None = None) -> CachedStore:
+    """The process-wide document store, configured from the environment only.
+
+    The store is shared by every run, so it is not a per-run setting:
+    STORE_BACKEND is 'firestore' (default) or 'sqlite' for a local database
+    without network round-trips (single-node deployments and CI), in the file
+    named by SQLITE_PATH. The Firestore layout comes from STORE_LAYOUT and the
+    cache settings from the STORE_CACHE_* variables.
+    """
+    from memory_agent.configuration import STORE_LAYOUTS
+
+    backend = os.environ.get("STORE_BACKEND", "firestore")
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown store backend {backend!r}; expected one of {STORE_BACKENDS}")
+    if backend == "sqlite":
+        from memory_agent.sqlite_store import SQLiteStore
+
+        store: Any = SQLiteStore(os.environ.get("SQLITE_PATH", "memory_agent.sqlite3"))
+    else:
+        store = STORE_LAYOUTS[os.environ.get("STORE_LAYOUT", "document")](
+            client if client is not None else firestore_client()
+        )
+    return CachedStore(
+        store,
+        max_entries=int(os.environ.get("STORE_CACHE_SIZE", "1024")),
+        ttl=float(os.environ.get("STORE_CACHE_TTL", "30")),
+        write_behind=os.environ.get("STORE_WRITE_BEHIND", "").lower() in ("1", "true"),
+    )
+
+
+def build_checkpointer(client: Any | None = None) -> FirestoreSaver:
+    """The Firestore checkpointer, in the collection named by CHECKPOINT_COLLECTION."""
+    from memory_agent.checkpointer import FirestoreSaver
+
+    return FirestoreSaver(
+        client if client is not None else firestore_client(),
+        collection=os.environ.get("CHECKPOINT_COLLECTION", "checkpoint_threads"),
+    )
+
+
+class AppContext:
+    """Holds the store, the model pool and the checkpointer, building each one on first access.
+
+    ``telemetry`` collects the metrics of instrumented nodes when
+    ``Configuration.telemetry`` is on.
+
+    Services passed to the constructor are used as-is, which is how tests run
+    the graph against in-memory fakes.
+    """
+
+    def __init__(
+        self,
+        *,
+        store: CachedStore | None = None,
+        models: ModelPool | None = None,
+        checkpointer: FirestoreSaver | None = None,
+        telemetry: Telemetry | None = None,
+        store_factory: Callable[[], CachedStore] = build_store,
+        models_factory: Callable[[], ModelPool] = lambda: ModelPool(cache=cache_from_env()),
+        checkpointer_factory: Callable[[], FirestoreSaver] = build_checkpointer,
+    ):
+        self._store = store
+        self._models = models
+        self._checkpointer = checkpointer
+        self.telemetry = telemetry or Telemetry()
+        self._store_factory = store_factory
+        self._models_factory = models_factory
+        self._checkpointer_factory = checkpointer_factory
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> CachedStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._store_factory()
+        return self._store
+
+    @property
+    def models(self) -> ModelPool:
+        if self._models is None:
+            with self._lock:
+                if self._models is None:
+                    self._models = self._models_factory()
+        return self._models
+
+    @property
+    def checkpointer(self) -> FirestoreSaver:
+        if self._checkpointer is None:
+            with self._lock:
+                if self._checkpointer is None:
+                    self._checkpointer = self._checkpointer_factory()
+        return self._checkpointer
+
+    async def aclose(self) -> None:
+        """Flush pending writes and close the HTTP clients of the services built so far."""
+        if self._store is not None:
+            await self._store.aclose()
+        if self._models is not None:
+            await self._models.aclose()
+
+
+_current = AppContext()
+
+
+def current() -> AppContext:
+    """The context the graph nodes read their services from."""
+    return _current
+
+
+@contextmanager
+def use_context(context: AppContext) -> Iterator[AppContext]:
+    """Route every graph node to ``context`` for the duration of the block."""
+    global _current
+    previous, _current = _current, context
+    try:
+        yield context
+    finally:
+        _current = previous
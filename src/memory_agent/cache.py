@@ -0,0 +1,314 @@
+"""Per-process read-through / write-behind cache in front of the document store."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from memory_agent.diff import apply_diff, diff_documents
+from memory_agent.telemetry import cache_lookup
+from memory_agent.writer import DocumentWriter
+
+if TYPE_CHECKING:
+    from memory_agent.configuration import FireStore, Memory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Counters reported by the cache."""
+
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+    flushes: int = 0
+    coalesced_writes: int = 0
+    dropped_writes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    memories: list[Memory]
+    update_time: Any | None
+    expires_at: float
+
+
+@dataclass
+class _Pending:
+    memory: Memory
+    # The cached version the value was computed against; None if unknown.
+    base: Memory | None
+    failures: int = 0
+
+
+class CachedStore:
+    """Wrap a FireStore with an LRU + TTL cache keyed by namespace.
+
+    Reads are served from the cache until the entry expires. With ``validate``
+    enabled a hit is confirmed with a metadata-only read of the document's
+    ``update_time``, so an entry is never served after another worker has
+    written the document. Writes invalidate and repopulate the entry.
+
+    Validation trades the round trip for freshness: a validated hit still
+    costs one (small) read, it only saves transferring the document. With
+    ``validate=False`` hits are free, and an entry may be up to ``ttl``
+    seconds behind writes made by other workers; conditional writes
+    (``update`` with ``last_update_time``) still catch those conflicts.
+
+    With ``write_behind`` enabled, ``set`` only records the latest value for a
+    namespace and a single flush ``flush_delay`` seconds later writes it,
+    coalescing every write to the same document in between into one. The
+    flush is a conditional write of the changes against the version the value
+    was based on, rebased onto a concurrent write like any DocumentWriter
+    update, so another worker's fields are kept. A value whose flush keeps
+    failing is retried with a doubling delay and dropped, with an error log,
+    after ``max_flush_attempts`` attempts.
+    """
+
+    def __init__(
+        self,
+        store: FireStore,
+        *,
+        max_entries: int = 1024,
+        ttl: float = 30.0,
+        validate: bool = True,
+        write_behind: bool = False,
+        flush_delay: float = 0.5,
+        max_flush_attempts: int = 5,
+    ):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.validate = validate
+        self.write_behind = write_behind
+        self.flush_delay = flush_delay
+        self.max_flush_attempts = max_flush_attempts
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._pending: dict[tuple[str, str], _Pending] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+        # Not the shared writer: its queues may be waiting on this cache's update().
+        self._writer = DocumentWriter()
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything the cache does not intercept goes straight to the store.
+        return getattr(self.store, name)
+
+    async def get(self, namespace: tuple[str, str], fields: list[str] | None = None) -> list[Memory]:
+        """Get data, serving it from the cache when it is still current.
+
+        A projected read (``fields``) is answered from a cached full document
+        when there is one and otherwise goes straight to the store uncached.
+        """
+        if fields is None:
+            return await self._get(namespace)
+        if namespace not in self._pending and namespace not in self._entries:
+            self.stats.misses += 1
+            cache_lookup(hit=False)
+            return await self.store.get(namespace, fields)
+        return [
+            _copy_memory(m, value={k: v for k, v in m.value.items() if k in fields})
+            for m in await self._get(namespace)
+        ]
+
+    async def _get(self, namespace: tuple[str, str]) -> list[Memory]:
+        if namespace in self._pending:
+            self.stats.hits += 1
+            cache_lookup(hit=True)
+            memory = self._pending[namespace].memory
+            return [_copy_memory(memory, key=namespace[0])]
+
+        entry = self._entries.get(namespace)
+        if entry is not None and entry.expires_at > time.monotonic():
+            if not self.validate or await self.store.get_update_time(namespace) == entry.update_time:
+                self.stats.hits += 1
+                cache_lookup(hit=True)
+                self._entries.move_to_end(namespace)
+                return [_copy_memory(m) for m in entry.memories]
+            self.stats.stale += 1
+
+        self.stats.misses += 1
+        cache_lookup(hit=False)
+        memories = await self.store.get(namespace)
+        update_time = memories[0].update_time if memories else None
+        self._remember(namespace, memories, update_time)
+        return [_copy_memory(m) for m in memories]
+
+    async def set(self, namespace: tuple[str, str], memory: Memory, *, create: bool = False) -> Any | None:
+        """Set data, either immediately or on the next write-behind flush.
+
+        A ``create`` is always written immediately, since it has to fail
+        when the document exists.
+        """
+        entry = self._entries.pop(namespace, None)
+        if self.write_behind and not create:
+            pending = self._pending.get(namespace)
+            if pending is not None:
+                self.stats.coalesced_writes += 1
+                pending.memory = _copy_memory(memory)
+            else:
+                base = entry.memories[0] if entry is not None and entry.memories else None
+                self._pending[namespace] = _Pending(_copy_memory(memory), base)
+            self._schedule_flush()
+            return None
+        update_time = await self.store.set(namespace, memory, create=create)
+        self._remember(namespace, [_copy_memory(memory, key=namespace[0], update_time=update_time)], update_time)
+        return update_time
+
+    async def update(
+        self,
+        namespace: tuple[str, str],
+        changes: dict[tuple[str, ...], Any],
+        *,
+        last_update_time: Any | None = None,
+    ) -> Any | None:
+        """Write changed field paths and patch the cached copy in place of a re-read.
+
+        A conditional update of a document with a pending write-behind value
+        flushes that value first, so the precondition is checked against the
+        stored document and a concurrent write surfaces as ``WriteConflict``.
+        """
+        if self.write_behind and namespace in self._pending and last_update_time is not None:
+            await self._flush_one(namespace)
+        elif self.write_behind and namespace in self._pending:
+            pending = self._pending[namespace].memory
+            if changes:
+                self.stats.coalesced_writes += 1
+                pending.value = apply_diff(pending.value, changes)
+            return None
+        entry = self._entries.pop(namespace, None)
+        update_time = await self.store.update(namespace, changes, last_update_time=last_update_time)
+        if entry is not None and entry.memories:
+            if changes:
+                memory = _copy_memory(entry.memories[0], value=apply_diff(entry.memories[0].value, changes), update_time=update_time)
+            else:
+                memory, update_time = entry.memories[0], entry.update_time
+            self._remember(namespace, [memory], update_time)
+        return update_time
+
+    async def delete(self, namespace: tuple[str, str]) -> None:
+        """Delete data and drop any cached or pending copy."""
+        self._pending.pop(namespace, None)
+        self._entries.pop(namespace, None)
+        await self.store.delete(namespace)
+
+    async def batch(self) -> None:
+        """Start a new batch operation."""
+        await self.store.batch()
+
+    async def abatch(self) -> None:
+        """Start a new batch operation."""
+        await self.store.batch()
+
+    def put(self, namespace: tuple[str, str], key: str, value: dict[str, Any]) -> None:
+        """Put a value into the batch."""
+        self._pending.pop((namespace[0], key), None)
+        self._entries.pop((namespace[0], key), None)
+        self.store.put(namespace, key, value)
+
+    async def commit(self) -> None:
+        """Commit the current batch operation."""
+        await self.store.commit()
+
+    async def flush(self) -> None:
+        """Write every pending write-behind value to the store."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self.stats.flushes += 1
+        namespaces = list(pending)
+        results = await asyncio.gather(
+            *(self._write(ns, pending[ns]) for ns in namespaces),
+            return_exceptions=True,
+        )
+        for ns, result in zip(namespaces, results):
+            if isinstance(result, BaseException):
+                self._failed(ns, pending[ns], result)
+
+    async def _flush_one(self, namespace: tuple[str, str]) -> None:
+        pending = self._pending.pop(namespace)
+        try:
+            await self._write(namespace, pending)
+        except BaseException as exc:
+            self._failed(namespace, pending, exc)
+            raise
+
+    async def _write(self, namespace: tuple[str, str], pending: _Pending) -> None:
+        base = pending.base
+        changes = diff_documents(base.value if base else {}, pending.memory.value)
+        result = await self._writer.submit(self.store, namespace, changes, base)
+        if namespace not in self._pending:
+            memory = _copy_memory(
+                pending.memory, key=namespace[0], value=copy.deepcopy(result.value), update_time=result.update_time
+            )
+            self._remember(namespace, [memory], result.update_time)
+
+    def _failed(self, namespace: tuple[str, str], pending: _Pending, exc: BaseException) -> None:
+        if namespace in self._pending:
+            # A newer write arrived during the flush; it is written next.
+            return
+        pending.failures += 1
+        if pending.failures >= self.max_flush_attempts:
+            self.stats.dropped_writes += 1
+            logger.error(
+                "Dropping write-behind value for %s after %d failed flushes (%s): %r",
+                "/".join(namespace), pending.failures, exc, pending.memory.value,
+            )
+            return
+        logger.warning("Write-behind flush failed for %s: %s", "/".join(namespace), exc)
+        self._pending[namespace] = pending
+
+    async def aclose(self) -> None:
+        """Cancel the scheduled flush and write everything still pending."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
+
+    def clear(self) -> None:
+        """Drop every cached entry (pending writes are kept)."""
+        self._entries.clear()
+
+    def _remember(self, namespace: tuple[str, str], memories: list[Memory], update_time: Any | None) -> None:
+        self._entries[namespace] = _Entry(
+            memories=memories,
+            update_time=update_time,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._entries.move_to_end(namespace)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        # Writes that fail or arrive mid-flush are picked up by the next round,
+        # which waits twice as long after each failure.
+        while self._pending:
+            failures = max(p.failures for p in self._pending.values())
+            await asyncio.sleep(self.flush_delay * 2 ** failures)
+            await self.flush()
+
+
+def _copy_memory(memory: Memory, **changes: Any) -> Memory:
+    """Copy a memory so callers can never mutate a cached value in place."""
+    clone = copy.copy(memory)
+    clone.value = copy.deepcopy(memory.value)
+    for name, value in changes.items():
+        setattr(clone, name, value)
+    return clone
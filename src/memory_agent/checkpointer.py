@@ -0,0 +1,567 @@
+"""Incremental LangGraph checkpointer on Firestore.
+
+A checkpoint stores each channel value once per version, like langgraph's own
+savers, except for ``messages``: the message history is an append-only log,
+and a checkpoint only records how long the log was at that point. Each step
+therefore writes the new messages and a few small documents, however long
+the interview has grown.
+
+Layout, below ``{collection}/{thread_id}``::
+
+    heads/{ns}                     latest checkpoint and message log position
+    checkpoints/{ns}|{id}          checkpoint (without values) and metadata
+    writes/{ns}|{id}               pending writes of the checkpoint's tasks
+    blobs/{ns}|{channel}|{version} serialized channel values
+    messages/{ns}|{epoch}|{chunk}  ``chunk_size`` messages per document
+
+A history that is rewritten rather than appended to (a removed or replaced
+message, or a fork from an older checkpoint) starts a new log epoch.
+
+Several workers may serve one thread. Each step's batch only commits if the
+head is still at the version the step was based on; otherwise the head is
+re-read and the step rebuilt, so a worker never overwrites a newer head with
+a stale one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Coroutine, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+from memory_agent.configuration import (
+    WriteConflict,
+    _not_found_error,
+    _precondition_errors,
+)
+
+T = TypeVar("T")
+
+MESSAGES_CHANNEL = "messages"
+MESSAGE_LOG = "message_log"
+"""Blob type of a ``messages`` value stored as a pointer into the message log."""
+
+MAX_BATCH_WRITES = 500
+"""Firestore's limit on writes per batch."""
+
+MAX_HEAD_RETRIES = 5
+"""Attempts of a step whose head keeps moving under it before giving up."""
+
+
+@dataclass
+class _Head:
+    latest: str | None = None
+    epoch: int = 0
+    length: int = 0
+    last_id: str | None = None
+    # Hash of the serialized log, so any worker can tell an append from a rewrite.
+    digest: str | None = None
+    # Version of the head document this head was read or written as.
+    update_time: Any | None = field(default=None, repr=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "latest": self.latest,
+            "epoch": self.epoch,
+            "length": self.length,
+            "last_id": self.last_id,
+            "digest": self.digest,
+        }
+
+
+def _ns_key(checkpoint_ns: str) -> str:
+    return checkpoint_ns or "_"
+
+
+def _typed(value: tuple[str, bytes]) -> dict[str, Any]:
+    return {"type": value[0], "data": value[1]}
+
+
+def _digest(serialized: Sequence[tuple[str, bytes]]) -> str:
+    digest = hashlib.sha256()
+    for kind, data in serialized:
+        digest.update(kind.encode() + b"\0" + len(data).to_bytes(8, "big") + data)
+    return digest.hexdigest()
+
+
+class FirestoreSaver(BaseCheckpointSaver[int]):
+    """Async checkpointer writing constant-size deltas per step to Firestore.
+
+    The graph runs on the event loop with the async Firestore client, like the
+    document store. The sync methods run the async ones on the loop the saver
+    was created on, so they can only be called from another thread (a sync
+    ``graph.invoke`` in a worker thread, for instance).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        collection: str = "checkpoint_threads",
+        chunk_size: int = 50,
+        page_size: int = 10,
+        max_cached_heads: int = 1024,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        self.client = client
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.page_size = page_size
+        self.max_cached_heads = max_cached_heads
+        self._heads: OrderedDict[tuple[str, str], _Head] = OrderedDict()
+        try:
+            self.loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+
+    # -- references ---------------------------------------------------------
+
+    def _thread(self, thread_id: str) -> Any:
+        return self.client.collection(self.collection).document(thread_id)
+
+    def _doc(self, thread_id: str, kind: str, *parts: Any) -> Any:
+        return self._thread(thread_id).collection(kind).document("|".join(str(p) for p in parts))
+
+    # -- head ---------------------------------------------------------------
+
+    async def _head(self, thread_id: str, checkpoint_ns: str, *, fresh: bool = False) -> _Head | None:
+        """The thread's head, from this process's cache unless ``fresh``.
+
+        Reads that must see other workers' checkpoints pass ``fresh``; writes
+        use the cached head and find out it is stale from the precondition.
+        """
+        key = (thread_id, checkpoint_ns)
+        cached = self._heads.get(key)
+        if cached is not None and not fresh:
+            self._heads.move_to_end(key)
+            return cached
+        snapshot = await self._doc(thread_id, "heads", _ns_key(checkpoint_ns)).get()
+        if not snapshot.exists:
+            self._heads.pop(key, None)
+            return None
+        if cached is not None and cached.update_time == snapshot.update_time:
+            self._heads.move_to_end(key)
+            return cached
+        return self._cache_head(key, _Head(**snapshot.to_dict(), update_time=snapshot.update_time))
+
+    def _cache_head(self, key: tuple[str, str], head: _Head) -> _Head:
+        """Remember ``head``, dropping the least recently used threads' heads."""
+        self._heads[key] = head
+        self._heads.move_to_end(key)
+        while len(self._heads) > self.max_cached_heads:
+            self._heads.popitem(last=False)
+        return head
+
+    # -- writing ------------------------------------------------------------
+
+    def _append_messages(
+        self, batch: Any, thread_id: str, checkpoint_ns: str, head: _Head, messages: Sequence[BaseMessage]
+    ) -> dict[str, int]:
+        """Add the messages not yet in the log to ``batch`` and advance ``head``.
+
+        The history is an append if its first ``head.length`` messages serialize
+        to the logged ones, so a message replaced by id with new content is a
+        rewrite. Heads written before the digest was kept only compare the id
+        of the last logged message.
+        """
+        serialized = [self.serde.dumps_typed(m) for m in messages]
+        if len(messages) < head.length:
+            appended = False
+        elif head.digest is not None:
+            appended = _digest(serialized[:head.length]) == head.digest
+        else:
+            appended = head.length == 0 or str(messages[head.length - 1].id) == head.last_id
+        if not appended:
+            head.epoch, head.length = head.epoch + 1, 0
+        chunks: dict[int, dict[str, Any]] = {}
+        for offset in range(head.length, len(messages)):
+            chunks.setdefault(offset // self.chunk_size, {})[f"{offset:08d}"] = _typed(serialized[offset])
+        for chunk, entries in chunks.items():
+            batch.set(self._doc(thread_id, "messages", _ns_key(checkpoint_ns), head.epoch, chunk), entries, merge=True)
+        head.length, head.digest = len(messages), _digest(serialized)
+        head.last_id = str(messages[-1].id) if messages else None
+        return {"epoch": head.epoch, "length": head.length}
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        for attempt in range(MAX_HEAD_RETRIES):
+            stored = await self._head(thread_id, checkpoint_ns, fresh=attempt > 0)
+            try:
+                self._cache_head(
+                    (thread_id, checkpoint_ns), await self._put(config, checkpoint, metadata, new_versions, stored)
+                )
+                break
+            except (*_precondition_errors(), _not_found_error()):
+                # Another worker moved (or deleted) the head: rebuild the step on the new one.
+                continue
+        else:
+            raise WriteConflict(f"Checkpoint head of thread {thread_id} kept changing")
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def _put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+        stored: _Head | None,
+    ) -> _Head:
+        """Commit the step as one batch, conditional on ``stored`` still being the head."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        ns = _ns_key(checkpoint_ns)
+        head = _Head(**stored.to_dict()) if stored else _Head()
+
+        batch = self.client.batch()
+        if stored is None:
+            batch.set(self._thread(thread_id), {"thread_id": thread_id}, merge=True)
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        for channel, version in new_versions.items():
+            if channel == MESSAGES_CHANNEL and isinstance(values.get(channel), list):
+                pointer = self._append_messages(batch, thread_id, checkpoint_ns, head, values[channel])
+                blob = (MESSAGE_LOG, json.dumps(pointer).encode())
+            elif channel in values:
+                blob = self.serde.dumps_typed(values[channel])
+            else:
+                blob = ("empty", b"")
+            batch.set(self._doc(thread_id, "blobs", ns, channel, version), _typed(blob))
+        batch.set(self._doc(thread_id, "checkpoints", ns, checkpoint["id"]), {
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint": _typed(self.serde.dumps_typed(c)),
+            "metadata": _typed(self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))),
+        })
+        head.latest = checkpoint["id"]
+        head_ref = self._doc(thread_id, "heads", ns)
+        if stored is None:
+            batch.create(head_ref, head.to_dict())
+        else:
+            batch.update(head_ref, head.to_dict(), option=self.client.write_option(last_update_time=stored.update_time))
+        # The head is the batch's last write.
+        head.update_time = (await batch.commit())[-1].update_time
+        return head
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        entries = {}
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            entries[f"{task_id}|{write_idx}"] = {
+                "task_id": task_id,
+                "task_path": task_path,
+                "idx": write_idx,
+                "channel": channel,
+                **_typed(self.serde.dumps_typed(value)),
+            }
+        ref = self._doc(thread_id, "writes", _ns_key(checkpoint_ns), config["configurable"]["checkpoint_id"])
+        if any(entry["idx"] >= 0 for entry in entries.values()):
+            # Regular writes of a task are stored once; a retried task keeps the first ones.
+            snapshot = await ref.get()
+            existing = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            entries = {k: v for k, v in entries.items() if v["idx"] < 0 or k not in existing}
+        if entries:
+            await ref.set(entries, merge=True)
+
+    # -- reading ------------------------------------------------------------
+
+    async def _load_log(self, thread_id: str, checkpoint_ns: str, epoch: int, start: int, stop: int) -> list[BaseMessage]:
+        """Messages ``start:stop`` of a log epoch, reading ``page_size`` chunks at a time."""
+        if stop <= start:
+            return []
+        chunks = range(start // self.chunk_size, (stop - 1) // self.chunk_size + 1)
+        entries: dict[str, Any] = {}
+        for page in range(0, len(chunks), self.page_size):
+            snapshots = await asyncio.gather(*(
+                self._doc(thread_id, "messages", _ns_key(checkpoint_ns), epoch, chunk).get()
+                for chunk in chunks[page:page + self.page_size]
+            ))
+            for snapshot in snapshots:
+                entries.update(snapshot.to_dict() or {})
+        return [
+            self.serde.loads_typed((entries[key]["type"], entries[key]["data"]))
+            for key in (f"{offset:08d}" for offset in range(start, stop))
+        ]
+
+    async def _load_values(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions, logs: dict[int, list[BaseMessage]]
+    ) -> dict[str, Any]:
+        ns = _ns_key(checkpoint_ns)
+        channels = list(versions)
+        snapshots = await asyncio.gather(*(
+            self._doc(thread_id, "blobs", ns, channel, versions[channel]).get() for channel in channels
+        ))
+        values: dict[str, Any] = {}
+        for channel, snapshot in zip(channels, snapshots):
+            if not snapshot.exists:
+                continue
+            blob = snapshot.to_dict()
+            if blob["type"] == "empty":
+                continue
+            if blob["type"] == MESSAGE_LOG:
+                pointer = json.loads(blob["data"])
+                log = logs.get(pointer["epoch"], [])
+                if len(log) < pointer["length"]:
+                    log = log + await self._load_log(thread_id, checkpoint_ns, pointer["epoch"], len(log), pointer["length"])
+                    logs[pointer["epoch"]] = log
+                values[channel] = log[:pointer["length"]]
+            else:
+                values[channel] = self.serde.loads_typed((blob["type"], blob["data"]))
+        return values
+
+    async def _tuple(
+        self, thread_id: str, doc: dict[str, Any], logs: dict[int, list[BaseMessage]] | None = None
+    ) -> CheckpointTuple:
+        checkpoint_ns = doc["checkpoint_ns"]
+        checkpoint_id = doc["checkpoint_id"]
+        checkpoint = self.serde.loads_typed((doc["checkpoint"]["type"], doc["checkpoint"]["data"]))
+        values, writes = await asyncio.gather(
+            self._load_values(thread_id, checkpoint_ns, checkpoint["channel_versions"], logs if logs is not None else {}),
+            self._doc(thread_id, "writes", _ns_key(checkpoint_ns), checkpoint_id).get(),
+        )
+        pending = sorted((writes.to_dict() or {}).values() if writes.exists else [], key=lambda w: (w["task_path"], w["task_id"], w["idx"]))
+        parent_id = doc.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((doc["metadata"]["type"], doc["metadata"]["data"])),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["data"]))) for w in pending],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id is None:
+            head = await self._head(thread_id, checkpoint_ns, fresh=True)
+            if head is None or head.latest is None:
+                return None
+            checkpoint_id = head.latest
+        snapshot = await self._doc(thread_id, "checkpoints", _ns_key(checkpoint_ns), checkpoint_id).get()
+        if not snapshot.exists:
+            return None
+        return await self._tuple(thread_id, snapshot.to_dict())
+
+    async def _checkpoint_docs(self, thread_id: str) -> list[dict[str, Any]]:
+        return [s.to_dict() async for s in self._thread(thread_id).collection("checkpoints").stream()]
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is not None:
+            thread_ids = [config["configurable"]["thread_id"]]
+        else:
+            thread_ids = [s.id async for s in self.client.collection(self.collection).stream()]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        for thread_id in thread_ids:
+            docs = sorted(await self._checkpoint_docs(thread_id), key=lambda d: d["checkpoint_id"], reverse=True)
+            logs: dict[tuple[str, int], list[BaseMessage]] = {}
+            for doc in docs:
+                if checkpoint_ns is not None and doc["checkpoint_ns"] != checkpoint_ns:
+                    continue
+                if before_id is not None and doc["checkpoint_id"] >= before_id:
+                    continue
+                if filter:
+                    metadata = self.serde.loads_typed((doc["metadata"]["type"], doc["metadata"]["data"]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None and limit <= 0:
+                    return
+                if limit is not None:
+                    limit -= 1
+                # Checkpoints of one namespace share the log: load each epoch once.
+                yield await self._tuple(thread_id, doc, logs.setdefault(doc["checkpoint_ns"], {}))
+
+    async def aload_messages(self, config: RunnableConfig, offset: int = 0, limit: int | None = None) -> list[BaseMessage]:
+        """A page of the thread's message history at a checkpoint (the latest by default).
+
+        Only the log chunks covering ``offset:offset + limit`` are read, so a
+        client can page through a long interview without loading all of it.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id is None:
+            head = await self._head(thread_id, checkpoint_ns, fresh=True)
+            if head is None or head.latest is None:
+                return []
+            checkpoint_id = head.latest
+        snapshot = await self._doc(thread_id, "checkpoints", _ns_key(checkpoint_ns), checkpoint_id).get()
+        if not snapshot.exists:
+            return []
+        doc = snapshot.to_dict()
+        checkpoint = self.serde.loads_typed((doc["checkpoint"]["type"], doc["checkpoint"]["data"]))
+        version = checkpoint["channel_versions"].get(MESSAGES_CHANNEL)
+        if version is None:
+            return []
+        blob = (await self._doc(thread_id, "blobs", _ns_key(checkpoint_ns), MESSAGES_CHANNEL, version).get()).to_dict()
+        if blob["type"] != MESSAGE_LOG:
+            messages = self.serde.loads_typed((blob["type"], blob["data"]))
+            return messages[offset:None if limit is None else offset + limit]
+        pointer = json.loads(blob["data"])
+        stop = pointer["length"] if limit is None else min(pointer["length"], offset + limit)
+        return await self._load_log(thread_id, checkpoint_ns, pointer["epoch"], offset, stop)
+
+    async def athread_ids(self, *, start_after: str | None = None, page_size: int = 100) -> AsyncIterator[str]:
+        """Ids of the stored threads in id order, after ``start_after``, read a page at a time."""
+        while True:
+            query = self.client.collection(self.collection).order_by("__name__")
+            if start_after is not None:
+                query = query.start_after({"__name__": start_after})
+            ids = [snapshot.id async for snapshot in query.limit(page_size).stream()]
+            for thread_id in ids:
+                yield thread_id
+            if len(ids) < page_size:
+                return
+            start_after = ids[-1]
+
+    # -- maintenance --------------------------------------------------------
+
+    async def _delete_all(self, refs: list[Any]) -> None:
+        for start in range(0, len(refs), MAX_BATCH_WRITES):
+            batch = self.client.batch()
+            for ref in refs[start:start + MAX_BATCH_WRITES]:
+                batch.delete(ref)
+            await batch.commit()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        refs = []
+        for kind in ("heads", "checkpoints", "writes", "blobs", "messages"):
+            refs.extend([s.reference async for s in self._thread(thread_id).collection(kind).stream()])
+        await self._delete_all([*refs, self._thread(thread_id)])
+        for key in [k for k in self._heads if k[0] == thread_id]:
+            del self._heads[key]
+
+    async def acompact(self, thread_id: str, keep: int = 1) -> int:
+        """Delete all but the ``keep`` latest checkpoints of each namespace of a thread.
+
+        Pending writes of the deleted checkpoints, channel values no kept
+        checkpoint refers to, and message log epochs no longer in use are
+        deleted with them. Returns the number of deleted documents.
+        """
+        by_ns: dict[str, list[dict[str, Any]]] = {}
+        for doc in await self._checkpoint_docs(thread_id):
+            by_ns.setdefault(doc["checkpoint_ns"], []).append(doc)
+        refs = []
+        dead: set[str] = set()
+        live_blobs: set[str] = set()
+        live_epochs: set[tuple[str, int]] = set()
+        for checkpoint_ns, docs in by_ns.items():
+            ns = _ns_key(checkpoint_ns)
+            docs.sort(key=lambda d: d["checkpoint_id"], reverse=True)
+            for doc in docs[keep:]:
+                refs.append(self._doc(thread_id, "checkpoints", ns, doc["checkpoint_id"]))
+                dead.add(f"{ns}|{doc['checkpoint_id']}")
+            for doc in docs[:keep]:
+                checkpoint = self.serde.loads_typed((doc["checkpoint"]["type"], doc["checkpoint"]["data"]))
+                live_blobs.update(f"{ns}|{c}|{v}" for c, v in checkpoint["channel_versions"].items())
+            head = await self._head(thread_id, checkpoint_ns, fresh=True)
+            if head is not None:
+                live_epochs.add((ns, head.epoch))
+        async for snapshot in self._thread(thread_id).collection("writes").stream():
+            if snapshot.id in dead:
+                refs.append(snapshot.reference)
+        async for snapshot in self._thread(thread_id).collection("blobs").stream():
+            if snapshot.id in live_blobs:
+                blob = snapshot.to_dict()
+                if blob["type"] == MESSAGE_LOG:
+                    live_epochs.add((snapshot.id.split("|")[0], json.loads(blob["data"])["epoch"]))
+            else:
+                refs.append(snapshot.reference)
+        async for snapshot in self._thread(thread_id).collection("messages").stream():
+            ns, epoch, _ = snapshot.id.split("|")
+            if (ns, int(epoch)) not in live_epochs:
+                refs.append(snapshot.reference)
+        await self._delete_all(refs)
+        return len(refs)
+
+    # -- sync interface -----------------------------------------------------
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run ``coro`` on the saver's event loop from another thread and wait for it."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self.loop is None or running is self.loop:
+            coro.close()
+            raise asyncio.InvalidStateError(
+                "FirestoreSaver's sync methods only work from another thread than the event loop it was "
+                "created on; on the loop, use the async interface (await graph.ainvoke(...))"
+            )
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self._run(self.aget_tuple(config))
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        async def collect() -> list[CheckpointTuple]:
+            return [t async for t in self.alist(config, filter=filter, before=before, limit=limit)]
+
+        yield from self._run(collect())
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return self._run(self.aput(config, checkpoint, metadata, new_versions))
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self._run(self.aput_writes(config, writes, task_id, task_path))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._run(self.adelete_thread(thread_id))
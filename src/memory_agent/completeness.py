@@ -0,0 +1,218 @@
+"""Incremental completeness index over the leaf fields of CaseData."""
+
+from __future__ import annotations
+
+import enum
+import json
+import re
+import types
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from memory_agent.diff import FieldPath
+from memory_agent.state import CaseData
+
+
+class FieldStatus(str, enum.Enum):
+    EMPTY = "empty"
+    FILLED = "filled"
+    NEEDS_CONFIRMATION = "needs_confirmation"
+
+
+@dataclass(frozen=True)
+class LeafField:
+    """A leaf field of the case schema."""
+
+    path: FieldPath
+    description: str
+    adapter: TypeAdapter
+    type_name: str = "str"
+
+    @property
+    def name(self) -> str:
+        return ".".join(self.path)
+
+
+def _type_name(annotation: Any) -> str:
+    """Short name of a field type for the prompt: ``date``, ``list of str``, ..."""
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    origin = get_origin(annotation)
+    if origin is list:
+        return f"list of {_type_name(args[0])}" if args else "list"
+    if origin in (Union, types.UnionType) and len(args) == 1:
+        return _type_name(args[0])
+    return getattr(annotation, "__name__", str(annotation))
+
+
+@cache
+def leaf_fields(model: type[BaseModel] = CaseData) -> tuple[LeafField, ...]:
+    """Every leaf field of ``model``, descending into nested sub-models."""
+
+    def walk(cls: type[BaseModel], prefix: FieldPath) -> Iterable[LeafField]:
+        for name, info in cls.model_fields.items():
+            path = prefix + (name,)
+            if isinstance(info.annotation, type) and issubclass(info.annotation, BaseModel):
+                yield from walk(info.annotation, path)
+            else:
+                yield LeafField(path, info.description or "", TypeAdapter(info.annotation), _type_name(info.annotation))
+
+    return tuple(walk(model, ()))
+
+
+_MISSING = object()
+
+
+def _lookup(doc: Any, path: FieldPath) -> Any:
+    for key in path:
+        if not isinstance(doc, dict) or key not in doc:
+            return _MISSING
+        doc = doc[key]
+    return doc
+
+
+def _status(leaf: LeafField, value: Any) -> FieldStatus:
+    if value is _MISSING or value is None or value == "" or value == [] or value == {}:
+        return FieldStatus.EMPTY
+    try:
+        leaf.adapter.validate_python(value)
+    except ValidationError:
+        return FieldStatus.NEEDS_CONFIRMATION
+    return FieldStatus.FILLED
+
+
+class CompletenessIndex:
+    """Track which leaf fields of a case are empty, filled or need confirmation.
+
+    ``update`` re-evaluates only the leaves under the changed paths it is given,
+    so keeping the index current after a delta write is proportional to the
+    size of the delta, not of the case.
+    """
+
+    def __init__(self, model: type[BaseModel] = CaseData):
+        self.leaves = leaf_fields(model)
+        self.statuses: dict[FieldPath, FieldStatus] = {leaf.path: FieldStatus.EMPTY for leaf in self.leaves}
+        self.values: dict[FieldPath, Any] = {}
+        self.update_time: Any | None = None
+
+    @classmethod
+    def from_document(cls, doc: dict, update_time: Any | None = None) -> CompletenessIndex:
+        index = cls()
+        index.update(doc, update_time=update_time)
+        return index
+
+    def update(self, doc: dict, changed: Iterable[FieldPath] | None = None, update_time: Any | None = None) -> None:
+        """Re-evaluate the leaves affected by ``changed`` (all leaves when None)."""
+        if changed is None:
+            affected: Iterable[LeafField] = self.leaves
+        else:
+            changed = list(changed)
+            affected = [
+                leaf for leaf in self.leaves
+                if any(leaf.path[:len(p)] == p or p[:len(leaf.path)] == leaf.path for p in changed)
+            ]
+        for leaf in affected:
+            value = _lookup(doc, leaf.path)
+            self.statuses[leaf.path] = _status(leaf, value)
+            if value is _MISSING:
+                self.values.pop(leaf.path, None)
+            else:
+                self.values[leaf.path] = value
+        self.update_time = update_time
+
+    def fields_with(self, status: FieldStatus) -> list[LeafField]:
+        return [leaf for leaf in self.leaves if self.statuses[leaf.path] is status]
+
+    @property
+    def completion(self) -> float:
+        """Percentage of leaf fields that are filled."""
+        filled = sum(1 for s in self.statuses.values() if s is FieldStatus.FILLED)
+        return round(100 * filled / len(self.leaves), 1)
+
+    def render_missing(self) -> str:
+        """The unfilled slice of the schema, grouped by section, one field per line.
+
+        Each field comes with its type and description (see ``_describe``),
+        and fields holding a value that does not fit their type ask for
+        confirmation of it.
+        """
+        groups: dict[str, list[str]] = {}
+        for leaf in self.fields_with(FieldStatus.EMPTY):
+            groups.setdefault(".".join(leaf.path[:-1]) or "case", []).append(_describe(leaf))
+        for leaf in self.fields_with(FieldStatus.NEEDS_CONFIRMATION):
+            value = json.dumps(self.values[leaf.path], default=str)
+            groups.setdefault(".".join(leaf.path[:-1]) or "case", []).append(f"{_describe(leaf)} (confirm {value})")
+        return "\n".join(
+            f"{section}:\n" + "\n".join(f"- {line}" for line in lines) for section, lines in groups.items()
+        ) or "(none)"
+
+    def render_collected(self) -> str:
+        """Compact ``field: value`` rendering of the filled leaves."""
+        lines = [
+            f"{leaf.name}: {json.dumps(self.values[leaf.path], default=str)}"
+            for leaf in self.fields_with(FieldStatus.FILLED)
+        ]
+        return "\n".join(lines) or "(nothing yet)"
+
+
+_FILLER_WORDS = frozenset({"a", "about", "all", "an", "and", "any", "client", "each", "if", "of", "provided", "the",
+                           "to", "when", "whether", "witness"})
+
+
+@cache
+def _describe(leaf: LeafField) -> str:
+    """``name (type): description`` for the prompt.
+
+    Plain strings carry no type, and a description that only restates the
+    field's path ("Severity of the injury" for ``injury_severity``) is left
+    out: it costs tokens on every turn without telling the model anything.
+    """
+    line = leaf.path[-1] if leaf.type_name == "str" else f"{leaf.path[-1]} ({leaf.type_name})"
+    words = set(re.findall(r"[a-z]+", leaf.description.lower().replace("'s", ""))) - _FILLER_WORDS
+    if words <= {word for part in leaf.path for word in part.split("_")}:
+        return line
+    return f"{line}: {leaf.description}"
+
+
+MAX_TRACKED_INDEXES = 1024
+_indexes: OrderedDict[str, CompletenessIndex] = OrderedDict()
+
+
+def index_for(user_id: str, doc: dict, update_time: Any | None = None) -> CompletenessIndex:
+    """The user's index, rebuilt from ``doc`` unless it already reflects ``update_time``."""
+    index = _indexes.get(user_id)
+    if index is None or update_time is None or index.update_time != update_time:
+        index = _indexes[user_id] = CompletenessIndex.from_document(doc, update_time)
+    _indexes.move_to_end(user_id)
+    while len(_indexes) > MAX_TRACKED_INDEXES:
+        _indexes.popitem(last=False)
+    return index
+
+
+def record_update(
+    user_id: str,
+    doc: dict,
+    changed: Iterable[FieldPath],
+    base_update_time: Any | None,
+    update_time: Any | None,
+) -> None:
+    """Apply a persisted delta to the user's index.
+
+    The delta is only applied when the index reflects the version the delta
+    was computed against; otherwise the index is dropped and rebuilt on the
+    next read.
+    """
+    index = _indexes.get(user_id)
+    if index is None:
+        return
+    if update_time is not None and index.update_time == update_time:
+        # Already applied: every caller of a coalesced write reports it.
+        return
+    if index.update_time is None or index.update_time != base_update_time:
+        del _indexes[user_id]
+        return
+    index.update(doc, changed, update_time)
@@ -1,14 +1,16 @@
 from dataclasses import dataclass, field, fields
-from firebase_admin import firestore, credentials, initialize_app
-from google.cloud import firestore
 from langgraph.store.base import BaseStore
 from typing import Any, Optional, Dict, List
+import asyncio
+import json
 import logging
 import uuid
 import os
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
 from memory_agent import prompts
+from memory_agent.diff import DELETED
+from memory_agent.telemetry import store_operation
 
 logger = logging.getLogger(__name__)
 
@@ -18,15 +20,7 @@ class Memory:
     key: str
     value: Dict[str, Any]
     tool_name: str
-
-# Initialize Firebase
-cred_path = os.environ.get("FIREBASE_CREDENTIALS")
-if not cred_path:
-    raise ValueError("FIREBASE_CREDENTIALS environment variable not set")
-    
-creds = credentials.Certificate(cred_path)
-firebase_app = initialize_app(creds)
-db = firestore.client()
+    update_time: Any | None = None
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -40,9 +34,76 @@ class Configuration:
             "Should be in the form: provider/model-name."
         },
     )
+    case_manager_model: str = field(
+        default="",
+        metadata={"description": "Model for the case_manager replies (provider/model-name). Defaults to `model`."},
+    )
+    extraction_model: str = field(
+        default="",
+        metadata={"description": "Model for trustcall extraction (provider/model-name). Defaults to `model`."},
+    )
+    summary_model: str = field(
+        default="",
+        metadata={
+            "description": "Model that folds old turns into the running summary (provider/model-name). "
+            "Defaults to `model`; a smaller model keeps compaction cheap."
+        },
+    )
     case_manager_prompt: str = prompts.CASE_MANAGER_SYSTEM_PROMPT
+    case_manager_context_prompt: str = prompts.CASE_MANAGER_CONTEXT_PROMPT
     trustcall_instruction: str = prompts.TRUSTCALL_INSTRUCTION
     disclaimer: str = prompts.DISCLAIMER
+    max_context_turns: int = field(
+        default=6,
+        metadata={
+            "description": "Number of most recent turns sent to the model verbatim. "
+            "Older turns are folded into a running summary. 0 keeps the full history."
+        },
+    )
+    pipeline_mode: bool = field(
+        default=False,
+        metadata={
+            "description": "Reply to the user without waiting for extraction. Case and user "
+            "data are extracted concurrently in the background and awaited by the next turn."
+        },
+    )
+    fast_path: bool = field(
+        default=True,
+        metadata={
+            "description": "Parse structured answers (emails, phone numbers, dates of birth, "
+            "policy/claim numbers, amounts) locally and skip LLM extraction when nothing else is left."
+        },
+    )
+    section_extraction: bool = field(
+        default=True,
+        metadata={
+            "description": "Extract only the case sections the last question and reply are about, "
+            "each with its own small tool, instead of the whole CaseData."
+        },
+    )
+    telemetry: bool = field(
+        default=False,
+        metadata={
+            "description": "Record per-node latency, model tokens, store traffic and cache hits, "
+            "and trace nodes and store operations as OpenTelemetry spans."
+        },
+    )
+    interview_phases: bool = field(
+        default=False,
+        metadata={
+            "description": "Run the disclaimer, consent and closing steps as scripted nodes without a "
+            "model call; only the open-ended questioning uses the LLM. Only turn this on with a "
+            "checkpointer: without one every turn starts over at the disclaimer."
+        },
+    )
+    closing_completion: float = field(
+        default=100.0,
+        metadata={"description": "Case completion (%) at which the scripted closing question replaces the next model question."},
+    )
+    max_extraction_sections: int = field(
+        default=3,
+        metadata={"description": "Extract the whole case when a reply touches more sections than this."},
+    )
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
@@ -51,33 +112,226 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), conf.get(f.name))
+            f.name: _coerce(f.type, os.environ.get(f.name.upper(), conf.get(f.name)))
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
+        return cls(**{k: v for k, v in values.items() if v is not None and v != ""})
+
+def _coerce(field_type: Any, value: Any) -> Any:
+    """Convert string values (e.g. from environment variables) to the field's type."""
+    if not isinstance(value, str) or field_type not in (int, float, bool):
+        return value
+    if field_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return field_type(value)
+
+def _field_path(*parts: str) -> str:
+    """Firestore's escaped dotted form of a field path."""
+    # google.cloud.firestore is imported on first write, not at import time
+    from google.cloud.firestore_v1.field_path import FieldPath
+
+    return FieldPath(*parts).to_api_repr()
+
+def _delete_field() -> Any:
+    from google.cloud.firestore_v1 import DELETE_FIELD
+
+    return DELETE_FIELD
+
+def _precondition_errors() -> tuple[type[Exception], ...]:
+    """Errors Firestore raises when a write's precondition does not hold."""
+    from google.api_core.exceptions import Conflict, FailedPrecondition
+
+    return (Conflict, FailedPrecondition)
+
+def _not_found_error() -> type[Exception]:
+    """Error Firestore raises when a write targets a missing document."""
+    from google.api_core.exceptions import NotFound
+
+    return NotFound
+
+def _store_errors() -> tuple[type[Exception], ...]:
+    """Errors a store call fails with that its callers are expected to handle:
+    lost races, missing documents, and Firestore, SQLite or network failures."""
+    import sqlite3
+
+    from google.api_core.exceptions import GoogleAPICallError, RetryError
+
+    return (WriteConflict, DocumentNotFound, GoogleAPICallError, RetryError, sqlite3.Error, OSError)
+
+_DOCUMENT_ID = "__name__"
+"""Firestore's field path for ordering and paging by document id."""
+
+class WriteConflict(Exception):
+    """A conditional write lost to a concurrent writer: the document was
+    created or changed since the version the write was based on."""
+
+class DocumentNotFound(Exception):
+    """An update targeted a document that does not exist, in any store backend."""
+
+@dataclass
+class StoreStats:
+    """Operation counters for a FireStore."""
+    reads: int = 0
+    writes: int = 0
+    deletes: int = 0
+    commits: int = 0
+    fields_written: int = 0
+    skipped_writes: int = 0
+    conflicts: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+def _payload_size(value: Any) -> int:
+    """Approximate the wire size of a document payload."""
+    return len(json.dumps(value, default=str)) if value else 0
+
+def _read_size(memories: list["Memory"], *args: Any, **kwargs: Any) -> int:
+    return sum(_payload_size(m.value) for m in memories)
+
+def _set_size(result: Any, namespace: tuple[str, str], memory: "Memory", *args: Any, **kwargs: Any) -> int:
+    return _payload_size(memory.value)
+
+def _update_size(result: Any, namespace: tuple[str, str], changes: dict[tuple[str, ...], Any], *args: Any, **kwargs: Any) -> int:
+    return _payload_size({".".join(p): v for p, v in changes.items() if v is not DELETED})
 
 class FireStore(BaseStore):
+    """Document store on top of the native async Firestore client.
+
+    Every round-trip is awaited on the client's gRPC channel, so concurrent
+    interviews share one pooled connection instead of blocking the event loop.
+    """
+
     def __init__(self, db: Any):
         self.db = db
         self._batch = None
+        self.stats = StoreStats()
 
-    async def get(self, namespace: tuple[str, str]) -> list[Memory]:
-        """Get data from Firestore."""
+    @store_operation("get", size=_read_size)
+    async def get(self, namespace: tuple[str, str], fields: list[str] | None = None) -> list[Memory]:
+        """Get data from Firestore, optionally projected to the top-level ``fields``."""
         doc_ref = self.db.collection(namespace[0]).document(namespace[1])
-        doc = doc_ref.get()  # This is synchronous but fast enough for our use case
-        return [Memory(key=namespace[0], value=doc.to_dict(), tool_name=namespace[0])] if doc.exists else []
+        self.stats.reads += 1
+        doc = await doc_ref.get(field_paths=fields)
+        if not doc.exists:
+            return []
+        value = doc.to_dict()
+        self.stats.bytes_read += _payload_size(value)
+        return [Memory(key=namespace[0], value=value, tool_name=namespace[0], update_time=doc.update_time)]
 
-    async def set(self, namespace: tuple[str, str], memory: Memory) -> None:
-        """Set data in Firestore."""
+    @store_operation("get_update_time")
+    async def get_update_time(self, namespace: tuple[str, str]) -> Any | None:
+        """Get only the document's last update time, or None if it does not exist."""
         doc_ref = self.db.collection(namespace[0]).document(namespace[1])
-        doc_ref.set(memory.value)  # Synchronous operation
-        return None
+        self.stats.reads += 1
+        doc = await doc_ref.get(field_paths=[])
+        return doc.update_time if doc.exists else None
+
+    async def scan(
+        self,
+        collection: str,
+        *,
+        start_at: str | None = None,
+        start_after: str | None = None,
+        end_before: str | None = None,
+        limit: int = 500,
+    ) -> list[tuple[str, Memory]]:
+        """One page of ``collection`` in document id order, as ``(id, memory)`` pairs.
+
+        The cursors are document ids: pass the last id of a page as
+        ``start_after`` to get the next one. ``start_at``/``end_before`` bound
+        the walk to a range of ids, so disjoint ranges can be read in parallel.
+        """
+        query = self.db.collection(collection).order_by(_DOCUMENT_ID)
+        if start_at is not None:
+            query = query.start_at({_DOCUMENT_ID: start_at})
+        if start_after is not None:
+            query = query.start_after({_DOCUMENT_ID: start_after})
+        if end_before is not None:
+            query = query.end_before({_DOCUMENT_ID: end_before})
+        snapshots = [snapshot async for snapshot in query.limit(limit).stream()]
+        self.stats.reads += len(snapshots)
+        values = await asyncio.gather(*(self._scanned_value(collection, snapshot) for snapshot in snapshots))
+        self.stats.bytes_read += sum(_payload_size(value) for value in values)
+        return [
+            (snapshot.id, Memory(key=collection, value=value, tool_name=collection, update_time=snapshot.update_time))
+            for snapshot, value in zip(snapshots, values)
+        ]
+
+    async def _scanned_value(self, collection: str, snapshot: Any) -> dict[str, Any]:
+        return snapshot.to_dict()
+
+    @store_operation("set", write=True, size=_set_size)
+    async def set(self, namespace: tuple[str, str], memory: Memory, *, create: bool = False) -> Any | None:
+        """Set data in Firestore and return the write's update time.
+
+        With ``create`` the write fails with WriteConflict if the document
+        already exists.
+        """
+        doc_ref = self.db.collection(namespace[0]).document(namespace[1])
+        self.stats.writes += 1
+        self.stats.fields_written += len(memory.value)
+        self.stats.bytes_written += _payload_size(memory.value)
+        try:
+            result = await (doc_ref.create(memory.value) if create else doc_ref.set(memory.value))
+        except _precondition_errors() as exc:
+            self.stats.conflicts += 1
+            raise WriteConflict(f"{'/'.join(namespace)} already exists") from exc
+        return result.update_time
+
+    @store_operation("update", write=True, size=_update_size)
+    async def update(
+        self,
+        namespace: tuple[str, str],
+        changes: dict[tuple[str, ...], Any],
+        *,
+        last_update_time: Any | None = None,
+    ) -> Any | None:
+        """Write only the changed field paths of an existing document.
+
+        ``changes`` maps field paths (as produced by ``diff.diff_documents``)
+        to their new values. An empty diff is skipped without a round-trip.
+        With ``last_update_time`` the write only succeeds if the document is
+        still at that version, and raises WriteConflict otherwise. A missing
+        document raises DocumentNotFound.
+        """
+        if not changes:
+            self.stats.skipped_writes += 1
+            return None
+        return await self._update_document(namespace, changes, last_update_time)
+
+    async def _update_document(
+        self,
+        namespace: tuple[str, str],
+        changes: dict[tuple[str, ...], Any],
+        last_update_time: Any | None,
+    ) -> Any:
+        field_updates = {
+            _field_path(*path): _delete_field() if value is DELETED else value
+            for path, value in changes.items()
+        }
+        doc_ref = self.db.collection(namespace[0]).document(namespace[1])
+        self.stats.writes += 1
+        self.stats.fields_written += len(field_updates)
+        self.stats.bytes_written += _payload_size(field_updates)
+        try:
+            result = await doc_ref.update(field_updates, option=self._write_option(last_update_time))
+        except _precondition_errors() as exc:
+            self.stats.conflicts += 1
+            raise WriteConflict(f"{'/'.join(namespace)} changed since {last_update_time}") from exc
+        except _not_found_error() as exc:
+            raise DocumentNotFound(f"No document to update: {'/'.join(namespace)}") from exc
+        return result.update_time
 
+    def _write_option(self, last_update_time: Any | None) -> Any:
+        return None if last_update_time is None else self.db.write_option(last_update_time=last_update_time)
+
+    @store_operation("delete", write=True)
     async def delete(self, namespace: tuple[str, str]) -> None:
         """Delete data from Firestore."""
         doc_ref = self.db.collection(namespace[0]).document(namespace[1])
-        doc_ref.delete()  # Synchronous operation
+        self.stats.deletes += 1
+        await doc_ref.delete()
         return None
 
     async def batch(self) -> None:
@@ -93,12 +347,193 @@ class FireStore(BaseStore):
         if self._batch is None:
             raise RuntimeError("No batch operation in progress")
         doc_ref = self.db.collection(namespace[0]).document(key)
+        self.stats.writes += 1
+        self.stats.fields_written += len(value)
+        self.stats.bytes_written += _payload_size(value)
         self._batch.set(doc_ref, value)
 
     async def commit(self) -> None:
         """Commit the current batch operation."""
         if self._batch is not None:
-            self._batch.commit()  # Synchronous operation
+            self.stats.commits += 1
+            await self._batch.commit()
             self._batch = None
 
-db = FireStore(db)
\ No newline at end of file
+SECTIONS_COLLECTION = "sections"
+LAYOUT_FIELD = "_layout"
+
+class ShardedFireStore(FireStore):
+    """FireStore layout that keeps each top-level section in its own subdocument.
+
+    ``{collection}/{id}`` holds the scalar fields plus a layout marker, and
+    every dict-valued field (for ``CaseData``: ``incident_details``,
+    ``medical_info``, ...) lives at ``{collection}/{id}/sections/{name}``.
+    Reads can be projected to the sections a node needs, and field updates
+    only touch the subdocuments they change.
+    """
+
+    def _sections(self, namespace: tuple[str, str]) -> Any:
+        return self.db.collection(namespace[0]).document(namespace[1]).collection(SECTIONS_COLLECTION)
+
+    @store_operation("get", size=_read_size)
+    async def get(self, namespace: tuple[str, str], fields: list[str] | None = None) -> list[Memory]:
+        """Get the root document and the requested sections (all when ``fields`` is None)."""
+        root_ref = self.db.collection(namespace[0]).document(namespace[1])
+        if fields is None:
+            root, sections = await asyncio.gather(root_ref.get(), self._stream_sections(namespace))
+        else:
+            section_refs = [self._sections(namespace).document(name) for name in fields]
+            root, *snapshots = await asyncio.gather(root_ref.get(), *(ref.get() for ref in section_refs))
+            sections = [s for s in snapshots if s.exists]
+        self.stats.reads += 1 + len(sections)
+        if not root.exists:
+            return []
+        value = root.to_dict()
+        value.pop(LAYOUT_FIELD, None)
+        if fields is not None:
+            value = {k: v for k, v in value.items() if k in fields}
+        for snapshot in sections:
+            value[snapshot.id] = snapshot.to_dict()
+        self.stats.bytes_read += _payload_size(value)
+        return [Memory(key=namespace[0], value=value, tool_name=namespace[0], update_time=root.update_time)]
+
+    async def _stream_sections(self, namespace: tuple[str, str]) -> list[Any]:
+        return [snapshot async for snapshot in self._sections(namespace).stream()]
+
+    async def _scanned_value(self, collection: str, snapshot: Any) -> dict[str, Any]:
+        value = snapshot.to_dict()
+        if value.pop(LAYOUT_FIELD, None) is None:
+            return value  # not migrated yet: still a monolithic document
+        sections = await self._stream_sections((collection, snapshot.id))
+        self.stats.reads += len(sections)
+        value.update((section.id, section.to_dict()) for section in sections)
+        return value
+
+    @store_operation("set", write=True, size=_set_size)
+    async def set(self, namespace: tuple[str, str], memory: Memory, *, create: bool = False) -> Any | None:
+        """Write the root and every section in one batch, dropping sections no longer present."""
+        root, sections = _split_sections(memory.value)
+        existing = await self._stream_sections(namespace)
+        batch = self.db.batch()
+        root_ref = self.db.collection(namespace[0]).document(namespace[1])
+        (batch.create if create else batch.set)(root_ref, {**root, LAYOUT_FIELD: SECTIONS_COLLECTION})
+        for name, section in sections.items():
+            batch.set(self._sections(namespace).document(name), section)
+        for snapshot in existing:
+            if snapshot.id not in sections:
+                batch.delete(snapshot.reference)
+        self.stats.writes += 1 + len(sections)
+        self.stats.fields_written += len(memory.value)
+        self.stats.bytes_written += _payload_size(memory.value)
+        self.stats.commits += 1
+        try:
+            results = await batch.commit()
+        except _precondition_errors() as exc:
+            self.stats.conflicts += 1
+            raise WriteConflict(f"{'/'.join(namespace)} already exists") from exc
+        return results[0].update_time
+
+    def put(self, namespace: tuple[str, str], key: str, value: dict[str, Any]) -> None:
+        """Put the root and every section of a value into the batch.
+
+        Unlike ``set``, stored sections missing from ``value`` are left in place.
+        """
+        if self._batch is None:
+            raise RuntimeError("No batch operation in progress")
+        root, sections = _split_sections(value)
+        self._batch.set(self.db.collection(namespace[0]).document(key), {**root, LAYOUT_FIELD: SECTIONS_COLLECTION})
+        for name, section in sections.items():
+            self._batch.set(self._sections((namespace[0], key)).document(name), section)
+        self.stats.writes += 1 + len(sections)
+        self.stats.fields_written += len(value)
+        self.stats.bytes_written += _payload_size(value)
+
+    @store_operation("update", write=True, size=_update_size)
+    async def update(
+        self,
+        namespace: tuple[str, str],
+        changes: dict[tuple[str, ...], Any],
+        *,
+        last_update_time: Any | None = None,
+    ) -> Any | None:
+        """Write changed field paths, touching only the affected section subdocuments."""
+        if not changes:
+            self.stats.skipped_writes += 1
+            return None
+        root_updates: dict[str, Any] = {}
+        section_updates: dict[str, dict[str, Any]] = {}
+        replaced: dict[str, Any] = {}
+        for path, value in changes.items():
+            if len(path) == 1 and (isinstance(value, dict) or value is DELETED):
+                replaced[path[0]] = value
+                if value is DELETED:
+                    root_updates[_field_path(path[0])] = _delete_field()
+            elif len(path) == 1:
+                root_updates[_field_path(*path)] = value
+            else:
+                section_updates.setdefault(path[0], {})[_field_path(*path[1:])] = (
+                    _delete_field() if value is DELETED else value
+                )
+        batch = self.db.batch()
+        root_ref = self.db.collection(namespace[0]).document(namespace[1])
+        # Always touch the root so its update_time versions the whole case.
+        root_updates[LAYOUT_FIELD] = SECTIONS_COLLECTION
+        batch.update(root_ref, root_updates, option=self._write_option(last_update_time))
+        for name, value in replaced.items():
+            if value is DELETED:
+                batch.delete(self._sections(namespace).document(name))
+            else:
+                batch.set(self._sections(namespace).document(name), value)
+        for name, updates in section_updates.items():
+            batch.update(self._sections(namespace).document(name), updates)
+        self.stats.writes += 1 + len(replaced) + len(section_updates)
+        self.stats.fields_written += len(changes)
+        self.stats.bytes_written += _payload_size({_field_path(*p): v for p, v in changes.items() if v is not DELETED})
+        self.stats.commits += 1
+        try:
+            results = await batch.commit()
+        except _precondition_errors() as exc:
+            self.stats.conflicts += 1
+            raise WriteConflict(f"{'/'.join(namespace)} changed since {last_update_time}") from exc
+        except _not_found_error() as exc:
+            # Not migrated yet: the sections are still fields of the root
+            # document, so update it the way the document layout does.
+            if not await self._is_monolithic(namespace):
+                raise DocumentNotFound(f"No document to update: {'/'.join(namespace)}") from exc
+            return await self._update_document(namespace, changes, last_update_time)
+        return results[0].update_time
+
+    async def _is_monolithic(self, namespace: tuple[str, str]) -> bool:
+        """Whether the root document exists without the sections layout marker."""
+        self.stats.reads += 1
+        root = await self.db.collection(namespace[0]).document(namespace[1]).get(field_paths=[LAYOUT_FIELD])
+        return root.exists and LAYOUT_FIELD not in (root.to_dict() or {})
+
+    @store_operation("delete", write=True)
+    async def delete(self, namespace: tuple[str, str]) -> None:
+        """Delete the root document and all of its sections."""
+        existing = await self._stream_sections(namespace)
+        batch = self.db.batch()
+        for snapshot in existing:
+            batch.delete(snapshot.reference)
+        batch.delete(self.db.collection(namespace[0]).document(namespace[1]))
+        self.stats.deletes += 1 + len(existing)
+        self.stats.commits += 1
+        await batch.commit()
+
+def _split_sections(value: dict[str, Any]) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+    """Split a document into its scalar root fields and dict-valued sections."""
+    root = {k: v for k, v in value.items() if not isinstance(v, dict)}
+    sections = {k: v for k, v in value.items() if isinstance(v, dict)}
+    return root, sections
+
+STORE_LAYOUTS = {"document": FireStore, "sections": ShardedFireStore}
+
+def __getattr__(name: str) -> Any:
+    # ``configuration.db`` is kept for callers that predate memory_agent.app;
+    # the store is built on first access instead of at import time.
+    if name == "db":
+        from memory_agent.app import current
+
+        return current().store
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,82 @@
+"""Bounded conversation context: a rolling window of recent turns plus a compacted summary."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from memory_agent import prompts
+
+
+def window_start(messages: Sequence[AnyMessage], max_turns: int) -> int:
+    """Index of the first message of the last ``max_turns`` turns.
+
+    A turn starts at a human message and includes every message after it up
+    to the next human message. ``max_turns <= 0`` keeps the whole history.
+    """
+    if max_turns <= 0:
+        return 0
+    seen = 0
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            seen += 1
+            if seen == max_turns:
+                return i
+    return 0
+
+
+def conversation(messages: Sequence[AnyMessage]) -> list[AnyMessage]:
+    """The human/AI exchange, without tool traffic."""
+    return [msg for msg in messages if isinstance(msg, (HumanMessage, AIMessage))]
+
+
+def render_transcript(messages: Sequence[AnyMessage]) -> str:
+    lines = []
+    for msg in conversation(messages):
+        speaker = "Client" if isinstance(msg, HumanMessage) else "Case manager"
+        lines.append(f"{speaker}: {msg.content}")
+    return "\n".join(lines)
+
+
+async def compact_history(
+    llm: BaseChatModel,
+    messages: Sequence[AnyMessage],
+    summary: str,
+    summarized_count: int,
+    max_turns: int,
+) -> dict[str, Any]:
+    """Fold turns that fell out of the window into the running summary.
+
+    Only the messages between the previous cut-off and the new one are sent to
+    the model, together with the existing summary, so the summary is extended
+    incrementally rather than regenerated. Returns the state update (empty
+    when nothing new left the window).
+    """
+    start = window_start(messages, max_turns)
+    if start <= summarized_count:
+        return {}
+    overflow = messages[summarized_count:start]
+    if not conversation(overflow):
+        return {"summarized_count": start}
+    response = await llm.ainvoke([
+        SystemMessage(content=prompts.SUMMARY_INSTRUCTION.format(summary=summary or "(none)")),
+        HumanMessage(content=render_transcript(overflow)),
+    ])
+    return {"summary": str(response.content).strip(), "summarized_count": start}
+
+
+def bounded_messages(messages: Sequence[AnyMessage], summary: str, summarized_count: int) -> list[AnyMessage]:
+    """The messages to send to a model: the summary (if any) and the verbatim window."""
+    window = conversation(messages[summarized_count:])
+    if not summary:
+        return window
+    return [SystemMessage(content=prompts.SUMMARY_CONTEXT.format(summary=summary)), *window]
+
+
+def count_tokens(messages: Sequence[Any]) -> int:
+    """Approximate prompt size in tokens."""
+    return count_tokens_approximately(messages)
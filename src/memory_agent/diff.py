@@ -0,0 +1,114 @@
+"""Field-level diffs between stored documents and freshly extracted data."""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+FieldPath = tuple[str, ...]
+
+
+class _Deleted:
+    """Marker for a field removed from the document."""
+
+    def __repr__(self) -> str:
+        return "DELETED"
+
+
+DELETED = _Deleted()
+
+
+def diff_documents(old: dict[str, Any], new: dict[str, Any], prefix: FieldPath = ()) -> dict[FieldPath, Any]:
+    """Return the changed field paths of ``new`` relative to ``old``.
+
+    Nested dicts present on both sides are compared field by field; anything
+    else that differs (including a dict replacing a scalar) is written whole
+    at its path. Fields missing from ``new`` map to ``DELETED``.
+    """
+    changes: dict[FieldPath, Any] = {}
+    for key, value in new.items():
+        path = prefix + (key,)
+        if key not in old:
+            changes[path] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict) and value:
+            changes.update(diff_documents(old[key], value, path))
+        elif value != old[key]:
+            changes[path] = value
+    for key in old.keys() - new.keys():
+        changes[prefix + (key,)] = DELETED
+    return changes
+
+
+def apply_diff(doc: dict[str, Any], changes: dict[FieldPath, Any]) -> dict[str, Any]:
+    """Return a copy of ``doc`` with ``changes`` applied."""
+    result = copy.deepcopy(doc)
+    for path, value in changes.items():
+        target = result
+        for key in path[:-1]:
+            child = target.get(key)
+            if not isinstance(child, dict):
+                child = target[key] = {}
+            target = child
+        if value is DELETED:
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return result
+
+
+def merge_changes(earlier: dict[FieldPath, Any], later: dict[FieldPath, Any]) -> dict[FieldPath, Any]:
+    """Combine two diffs into one with the effect of applying ``earlier`` then ``later``."""
+    merged = dict(earlier)
+    for path, value in later.items():
+        for existing in [p for p in merged if p[:len(path)] == path]:
+            del merged[existing]
+        parent = next((p for p in merged if path[:len(p)] == p), None)
+        if parent is None:
+            merged[path] = value
+        else:
+            # A later change inside a field the earlier diff writes whole.
+            base = merged[parent] if isinstance(merged[parent], dict) else {}
+            merged[parent] = apply_diff(base, {path[len(parent):]: value})
+    return merged
+
+
+_MISSING = object()
+
+
+def _resolve(ours: Any, theirs: Any) -> Any:
+    """Pick a value for a field both writers changed: keep filled values and list items."""
+    if ours is _MISSING or ours is None:
+        return theirs
+    if theirs is _MISSING or theirs is None:
+        return ours
+    if isinstance(ours, list) and isinstance(theirs, list):
+        return theirs + [item for item in ours if item not in theirs]
+    return ours
+
+
+def _merge3(base: Any, ours: Any, theirs: Any) -> Any:
+    if ours == base:
+        return theirs
+    if theirs == base:
+        return ours
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = {}
+        for key in [*theirs, *(k for k in ours if k not in theirs)]:
+            value = _merge3(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+    return _resolve(ours, theirs)
+
+
+def rebase_changes(
+    changes: dict[FieldPath, Any], base: dict[str, Any], latest: dict[str, Any]
+) -> dict[FieldPath, Any]:
+    """Re-target ``changes``, computed against ``base``, at the newer ``latest``.
+
+    A three-way merge: fields only one side changed take that side's value.
+    When both changed a field, a value beats an empty one, lists keep the
+    items of both, and otherwise ``changes`` wins.
+    """
+    return diff_documents(latest, _merge3(base, apply_diff(base, changes), latest))
@@ -0,0 +1,280 @@
+"""Bulk export of the Case and User collections for analytics.
+
+Each collection is split into id ranges (partitions) that are read in
+parallel, one cursor-paginated walk per range, so memory stays bounded by
+``page_size`` plus ``chunk_size`` records per running reader whatever the
+collection size. Every record is validated against its model (``CaseData``
+or ``UserData``) and written to numbered chunk files, NDJSON or Parquet::
+
+    python -m memory_agent.export --output exports/2024-06-01 --partitions 8
+
+After each chunk the reader's cursor goes into ``checkpoint.json`` in the
+output directory. Re-running the same command after a failure skips finished
+partitions and resumes the others after their last written chunk.
+
+The store is the one selected by STORE_BACKEND and STORE_LAYOUT; with
+``--emulator`` it talks to the Firestore emulator at FIRESTORE_EMULATOR_HOST.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import string
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from memory_agent.state import CaseData, UserData
+
+logger = logging.getLogger(__name__)
+
+MODELS: dict[str, type[BaseModel]] = {"Case": CaseData, "User": UserData}
+FORMATS = ("ndjson", "parquet")
+
+ID_ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+"""Characters of Firestore auto-generated ids, in id order."""
+
+
+def split_points(partitions: int) -> list[str]:
+    """Ids splitting the id space into ``partitions`` contiguous ranges.
+
+    Boundaries are spread over ``ID_ALPHABET``, which balances auto-generated
+    ids. Other ids still fall into exactly one range (the first range is open
+    below, the last open above); only the balance suffers.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    return [ID_ALPHABET[len(ID_ALPHABET) * i // partitions] for i in range(1, partitions)]
+
+
+@dataclass
+class ExportReport:
+    """Outcome of an export."""
+
+    exported: int = 0
+    invalid: int = 0
+    chunks: int = 0
+    resumed_partitions: int = 0
+    """Partitions a checkpoint had already finished."""
+    duration_s: float = 0.0
+
+
+class Checkpoint:
+    """Per-partition cursors of an export, saved as JSON after every chunk.
+
+    The file is replaced atomically, so a crash leaves the previous state. A
+    checkpoint only resumes an export with the same format and partitioning.
+    """
+
+    def __init__(self, path: Path, fmt: str, partitions: int):
+        self.path = path
+        self.state: dict[str, Any] = {"format": fmt, "partitions": partitions, "readers": {}}
+        if path.exists():
+            saved = json.loads(path.read_text())
+            if (saved.get("format"), saved.get("partitions")) != (fmt, partitions):
+                raise ValueError(
+                    f"{path} is for format={saved.get('format')} partitions={saved.get('partitions')};"
+                    " use the same options or a new output directory"
+                )
+            self.state = saved
+
+    def reader(self, collection: str, index: int) -> dict[str, Any]:
+        return self.state["readers"].setdefault(
+            f"{collection}/{index}", {"after": None, "chunks": 0, "records": 0, "invalid": 0, "done": False}
+        )
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+def _json_default(value: Any) -> str:
+    return str(value)
+
+
+def _write_ndjson(path: Path, records: Sequence[dict[str, Any]]) -> None:
+    with path.open("w") as f:
+        for record in records:
+            f.write(json.dumps(record, default=_json_default) + "\n")
+
+
+def _write_parquet(path: Path, records: Sequence[dict[str, Any]], columns: Sequence[str]) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Parquet export needs pyarrow: pip install 'memory-agent[export]'") from exc
+
+    # Every column is a string so all chunks share one schema; sections and
+    # lists are JSON, which warehouses can unpack on load.
+    def cell(value: Any) -> str | None:
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value, default=_json_default)
+
+    schema = pa.schema([(name, pa.string()) for name in columns])
+    table = pa.Table.from_pylist([{name: cell(r.get(name)) for name in columns} for r in records], schema=schema)
+    pq.write_table(table, path)
+
+
+def _write_chunk(path: Path, fmt: str, records: Sequence[dict[str, Any]], columns: Sequence[str]) -> None:
+    """Write a chunk file atomically: a crash never leaves a partial chunk behind."""
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        _write_parquet(tmp, records, columns)
+    else:
+        _write_ndjson(tmp, records)
+    os.replace(tmp, path)
+
+
+def _record(doc_id: str, model: type[BaseModel], value: dict[str, Any]) -> dict[str, Any]:
+    """The validated document as an export row; raises ValidationError."""
+    data = model.model_validate(value).model_dump(mode="json", exclude_unset=True, warnings=False)
+    return {"id": doc_id, **data}
+
+
+async def _export_partition(
+    store: Any,
+    collection: str,
+    index: int,
+    bounds: tuple[str | None, str | None],
+    output: Path,
+    fmt: str,
+    checkpoint: Checkpoint,
+    report: ExportReport,
+    *,
+    page_size: int,
+    chunk_size: int,
+) -> None:
+    state = checkpoint.reader(collection, index)
+    if state["done"]:
+        report.resumed_partitions += 1
+        return
+    model = MODELS[collection]
+    columns = ["id", *model.model_fields]
+    start_at, end_before = bounds
+    buffer: list[dict[str, Any]] = []
+    invalid = 0
+    cursor = state["after"]
+
+    async def flush() -> None:
+        nonlocal invalid
+        if buffer:
+            path = output / f"{collection}-{index:03d}-{state['chunks']:05d}.{fmt}"
+            await asyncio.to_thread(_write_chunk, path, fmt, list(buffer), columns)
+            state["chunks"] += 1
+            report.chunks += 1
+        state.update(after=cursor, records=state["records"] + len(buffer), invalid=state["invalid"] + invalid)
+        checkpoint.save()
+        report.exported += len(buffer)
+        report.invalid += invalid
+        buffer.clear()
+        invalid = 0
+
+    while True:
+        page = await store.scan(
+            collection,
+            start_at=start_at if cursor is None else None,
+            start_after=cursor,
+            end_before=end_before,
+            limit=page_size,
+        )
+        for doc_id, memory in page:
+            cursor = doc_id
+            try:
+                buffer.append(_record(doc_id, model, memory.value))
+            except ValidationError as exc:
+                invalid += 1
+                logger.warning("Skipping invalid %s/%s: %s", collection, doc_id, exc.errors()[:3])
+            if len(buffer) >= chunk_size:
+                await flush()
+        if len(page) < page_size:
+            break
+    if buffer or invalid:
+        await flush()
+    state["done"] = True
+    checkpoint.save()
+
+
+async def export_collections(
+    store: Any,
+    output: Path,
+    *,
+    collections: Iterable[str] = ("Case", "User"),
+    fmt: str = "ndjson",
+    partitions: int = 4,
+    concurrency: int = 4,
+    page_size: int = 500,
+    chunk_size: int = 5000,
+) -> ExportReport:
+    """Export ``collections`` of ``store`` into ``output``, resuming from its checkpoint."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    unknown = set(collections) - set(MODELS)
+    if unknown:
+        raise ValueError(f"No model to validate {sorted(unknown)} against; expected {sorted(MODELS)}")
+    output.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(output / "checkpoint.json", fmt, partitions)
+    points = split_points(partitions)
+    ranges = list(zip([None, *points], [*points, None]))
+    report = ExportReport()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def read(collection: str, index: int) -> None:
+        async with limit:
+            await _export_partition(store, collection, index, ranges[index], output, fmt, checkpoint, report,
+                                    page_size=page_size, chunk_size=chunk_size)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(read(collection, i) for collection in collections for i in range(partitions)))
+    report.duration_s = round(time.perf_counter() - start, 3)
+    return report
+
+
+def main() -> None:
+    from memory_agent.app import build_store
+
+    parser = argparse.ArgumentParser(description="Export case and user documents as NDJSON or Parquet chunks.")
+    parser.add_argument("--output", required=True, help="directory for the chunks and checkpoint.json")
+    parser.add_argument("--collection", action="append", choices=sorted(MODELS),
+                        help="collection to export; repeat for several (default: all)")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--partitions", type=int, default=4, help="id ranges per collection")
+    parser.add_argument("--concurrency", type=int, default=4, help="partitions read at once")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="records per output file")
+    parser.add_argument("--emulator", action="store_true",
+                        help="read from the Firestore emulator at FIRESTORE_EMULATOR_HOST")
+    parser.add_argument("--project", default="memory-agent", help="project id for --emulator")
+    args = parser.parse_args()
+
+    client = None
+    if args.emulator:
+        # The client talks to FIRESTORE_EMULATOR_HOST without credentials.
+        from google.cloud.firestore import AsyncClient
+
+        client = AsyncClient(project=args.project)
+    report = asyncio.run(export_collections(
+        build_store(client),
+        Path(args.output),
+        collections=args.collection or tuple(MODELS),
+        fmt=args.format,
+        partitions=args.partitions,
+        concurrency=args.concurrency,
+        page_size=args.page_size,
+        chunk_size=args.chunk_size,
+    ))
+    print(json.dumps(asdict(report)))
+
+
+if __name__ == "__main__":
+    main()
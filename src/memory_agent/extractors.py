@@ -0,0 +1,91 @@
+"""Process-wide registry of prebuilt trustcall extractors."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from trustcall import create_extractor
+
+
+@dataclass
+class ExtractorStats:
+    """Build and reuse counters for the extractor registry."""
+
+    builds: int = 0
+    hits: int = 0
+    build_seconds: float = 0.0
+    last_build_seconds: float = 0.0
+    build_seconds_by_key: dict[str, float] = field(default_factory=dict)
+
+    def reset(self) -> None:
+        self.builds = self.hits = 0
+        self.build_seconds = self.last_build_seconds = 0.0
+        self.build_seconds_by_key.clear()
+
+
+ExtractorKey = tuple[int, tuple[str, ...], str | None, bool]
+
+_extractors: dict[ExtractorKey, tuple[BaseChatModel, Runnable]] = {}
+_lock = threading.Lock()
+stats = ExtractorStats()
+
+
+def _tool_name(tool: Any) -> str:
+    return getattr(tool, "__name__", None) or getattr(tool, "name", None) or str(tool)
+
+
+def _describe(llm: BaseChatModel, tool_names: tuple[str, ...], tool_choice: str | None) -> str:
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    return f"{model}:{','.join(tool_names)}:{tool_choice}"
+
+
+def get_extractor(
+    llm: BaseChatModel,
+    tools: Sequence[Any],
+    tool_choice: str | None = None,
+    enable_inserts: bool = True,
+) -> Runnable:
+    """Return the shared extractor for (model, tool set, tool_choice), building it on first use.
+
+    Extractors are stateless between invocations, so one instance can serve
+    concurrent requests. The model is keyed by identity and held by the
+    registry so the key can never be reused by another instance.
+    """
+    tool_names = tuple(_tool_name(t) for t in tools)
+    key: ExtractorKey = (id(llm), tool_names, tool_choice, enable_inserts)
+    entry = _extractors.get(key)
+    if entry is not None:
+        stats.hits += 1
+        return entry[1]
+    with _lock:
+        entry = _extractors.get(key)
+        if entry is not None:
+            stats.hits += 1
+            return entry[1]
+        start = time.perf_counter()
+        extractor = create_extractor(
+            llm,
+            tools=list(tools),
+            tool_choice=tool_choice,
+            enable_inserts=enable_inserts,
+        )
+        elapsed = time.perf_counter() - start
+        _extractors[key] = (llm, extractor)
+        stats.builds += 1
+        stats.build_seconds += elapsed
+        stats.last_build_seconds = elapsed
+        stats.build_seconds_by_key[_describe(llm, tool_names, tool_choice)] = elapsed
+        return extractor
+
+
+def clear_extractors() -> None:
+    """Drop every cached extractor and reset the stats."""
+    with _lock:
+        _extractors.clear()
+        stats.reset()
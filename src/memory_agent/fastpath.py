@@ -0,0 +1,190 @@
+"""Deterministic pre-extraction of structured answers ahead of trustcall.
+
+Emails, phone numbers, dates of birth, policy/claim numbers and dollar amounts
+are parsed locally and routed to a field based on the question that was asked.
+When a reply contains nothing beyond such values, or is a bare acknowledgement
+such as "yes" or "continue", LLM extraction is skipped for every collection.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from pydantic import BaseModel, ValidationError
+
+from memory_agent.completeness import leaf_fields
+from memory_agent.diff import FieldPath
+from memory_agent.sections import keyword_pattern
+from memory_agent.state import CaseData, UserData
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?<!\w)(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\w)")
+AMOUNT = re.compile(
+    r"\$\s?(\d[\d,]*(?:\.\d+)?)\s?(k|thousand)?|(\d[\d,]*(?:\.\d+)?)\s?(k|thousand)?\s?(?:dollars|usd)\b",
+    re.IGNORECASE,
+)
+_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
+DATE = re.compile(
+    rf"\b\d{{4}}-\d{{1,2}}-\d{{1,2}}\b|\b\d{{1,2}}/\d{{1,2}}/\d{{2,4}}\b|\b(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b",
+    re.IGNORECASE,
+)
+IDENTIFIER = re.compile(r"\b(?=[A-Z0-9-]*\d)[A-Z0-9][A-Z0-9-]{4,}\b", re.IGNORECASE)
+
+# Words that carry no information beyond the structured values themselves.
+FILLER_WORDS = frozenset([
+    "yes", "yeah", "yep", "sure", "ok", "okay", "continue", "go", "ahead", "please",
+    "thanks", "thank", "you", "sounds", "good", "fine", "correct", "it", "it's", "its",
+    "is", "my", "the", "a", "an", "of", "on", "at", "i", "i'm", "was", "am", "number",
+    "phone", "cell", "mobile", "home", "work", "email", "e-mail", "address", "policy",
+    "claim", "date", "birth", "born", "birthday", "total", "about", "around",
+    "approximately", "roughly", "dollars", "usd", "medical", "expenses", "bills",
+    "property", "damage", "lost", "wages", "income", "here", "that's", "that", "be",
+    "can", "reach", "me", "so", "far",
+])
+ACKNOWLEDGEMENTS = frozenset([
+    "yes", "yeah", "yep", "sure", "ok", "okay", "continue", "go", "ahead", "please",
+    "thanks", "thank", "you", "sounds", "good", "fine",
+])
+YES_NO_QUESTION = re.compile(
+    r"(?:^|[.!?]\s+)(?:did|do|does|have|has|had|were|was|is|are|can|could|will|would)\b[^.!?]*\?\s*$",
+    re.IGNORECASE,
+)
+
+
+def _parse_date(text: str) -> date | None:
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)", r"\1", text.replace(",", "").replace(".", ""))
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%B %d %Y", "%b %d %Y"):
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(match: re.Match[str]) -> float:
+    number = match.group(1) or match.group(3)
+    value = float(number.replace(",", ""))
+    if match.group(2) or match.group(4):
+        value *= 1000
+    return value
+
+
+def _digits(text: str) -> str:
+    return re.sub(r"\D", "", text)[-10:]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Route values of one kind to a field when the question (or reply) mentions a topic.
+
+    Keywords are whole words or phrases, with a trailing "*" for any ending,
+    as in ``SECTION_KEYWORDS``.
+    """
+
+    keywords: tuple[str, ...]
+    pattern: re.Pattern[str]
+    namespace: str
+    path: FieldPath
+    parse: Callable[[re.Match[str]], Any] = lambda m: m.group(0)
+
+
+_SELF_CONTACT = ("reach you", "reach me", "contact you", "contact me")
+
+# Ordered from most to least specific: the first rule whose keywords match wins a value.
+RULES: tuple[Rule, ...] = (
+    Rule(("witness*",), EMAIL, "Case", ("witness_info", "contact_info")),
+    Rule(("witness*",), PHONE, "Case", ("witness_info", "contact_info")),
+    Rule(("employer*",), PHONE, "Case", ("employment_info", "current_employer", "phone")),
+    Rule(("policy number*",), IDENTIFIER, "Case", ("insurance_info", "client_insurance", "policy_number")),
+    Rule(("claim number*",), IDENTIFIER, "Case", ("insurance_info", "claim_number")),
+    Rule(("medical expense*", "medical bill*"), AMOUNT, "Case", ("damages_info", "medical_expenses"), _parse_amount),
+    Rule(("property damage*",), AMOUNT, "Case", ("damages_info", "property_damage"), _parse_amount),
+    Rule(("lost wages", "lost income"), AMOUNT, "Case", ("damages_info", "lost_wages"), _parse_amount),
+    Rule(("date of birth", "birthday", "born"), DATE, "User", ("date_of_birth",), lambda m: _parse_date(m.group(0))),
+    # The client's own contact details: only when the exchange is about them, so
+    # a witness's or the other driver's number mentioned in passing is left alone.
+    Rule(_SELF_CONTACT + ("your email", "my email", "email me", "e-mail"), EMAIL, "User", ("email",)),
+    Rule(_SELF_CONTACT + ("your number", "my number", "your phone", "my phone", "call me", "call you", "text me",
+                          "cell", "mobile"), PHONE, "User", ("phone",), lambda m: _digits(m.group(0))),
+)
+
+_TOPICS = {rule: keyword_pattern(rule.keywords) for rule in RULES if rule.keywords}
+
+_SCHEMAS: dict[str, type[BaseModel]] = {"Case": CaseData, "User": UserData}
+
+
+@dataclass
+class FastPathResult:
+    """Values parsed from the latest reply and the collections trustcall can skip."""
+
+    updates: dict[str, dict[FieldPath, Any]] = field(default_factory=dict)
+    residual: str = ""
+    skip_llm: frozenset[str] = frozenset()
+    """Collections trustcall can skip: all of them when nothing is left of the reply
+    beyond the parsed values, or when it is a bare acknowledgement."""
+
+
+def _adapter(namespace: str, path: FieldPath) -> Any:
+    for leaf in leaf_fields(_SCHEMAS[namespace]):
+        if leaf.path == path:
+            return leaf.adapter
+    raise KeyError(path)
+
+
+def last_exchange(messages: Sequence[AnyMessage]) -> tuple[str, str]:
+    """The latest human reply and the AI message it answers ("" when absent)."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            question = next(
+                (str(m.content) for m in reversed(messages[:i]) if isinstance(m, AIMessage) and m.content),
+                "",
+            )
+            return str(messages[i].content), question
+    return "", ""
+
+
+def pre_extract(answer: str, question: str = "") -> FastPathResult:
+    """Parse structured values out of ``answer``, routed by the topic of ``question``."""
+    result = FastPathResult()
+    context = f"{question}\n{answer}".lower()
+    consumed: list[tuple[int, int]] = []
+    for rule in RULES:
+        if rule.keywords and not _TOPICS[rule].search(context):
+            continue
+        for match in rule.pattern.finditer(answer):
+            if any(start < match.end() and match.start() < end for start, end in consumed):
+                continue
+            value = rule.parse(match)
+            if value is None:
+                continue
+            try:
+                value = _adapter(rule.namespace, rule.path).dump_python(
+                    _adapter(rule.namespace, rule.path).validate_python(value), mode="json"
+                )
+            except ValidationError:
+                continue
+            result.updates.setdefault(rule.namespace, {})[rule.path] = value
+            consumed.append(match.span())
+            break
+
+    residual = answer
+    for start, end in sorted(consumed, reverse=True):
+        residual = residual[:start] + " " + residual[end:]
+    words = [w for w in re.findall(r"[a-z0-9'@.-]+", residual.lower()) if w.strip(".-'")]
+    result.residual = " ".join(w for w in words if w.strip(".") not in FILLER_WORDS)
+    if result.residual:
+        return result
+    if result.updates:
+        # Nothing is left for trustcall in either collection.
+        result.skip_llm = frozenset(_SCHEMAS)
+    else:
+        # A bare acknowledgement carries nothing to extract, unless it answers a yes/no question.
+        acknowledgement = bool(words) and all(w.strip(".") in ACKNOWLEDGEMENTS for w in words)
+        if acknowledgement and not YES_NO_QUESTION.search(question.strip()):
+            result.skip_llm = frozenset(_SCHEMAS)
+    return result
@@ -1,23 +1,43 @@
 from langchain_core.messages import merge_message_runs, AIMessage, SystemMessage, HumanMessage, ToolMessage
-from memory_agent.state import State, CaseData, UserData, get_schema_json
+from memory_agent.state import Phase, State, CaseData, UserData, get_schema_json
 from langchain_core.runnables import RunnableConfig
-from memory_agent.configuration import FireStore, Memory, db
+from memory_agent.app import current
 from memory_agent import configuration
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langgraph.graph import END, StateGraph
-from trustcall import create_extractor
-from typing import TypedDict, Literal
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.state import CompiledStateGraph
+from memory_agent.completeness import index_for, record_update
+from memory_agent.context import bounded_messages, compact_history, window_start
+from memory_agent.diff import apply_diff, diff_documents
+from memory_agent.extractors import get_extractor
+from memory_agent.fastpath import FastPathResult, last_exchange, pre_extract
+from memory_agent.phases import asks_closing_question, is_quit, parse_consent, wants_to_finish
+from memory_agent.pipeline import extractions
+from memory_agent.sections import section_models, select_sections
+from memory_agent.server import REPLY_TAG
+from memory_agent.telemetry import instrument
+from typing import TYPE_CHECKING, Any, TypedDict, Literal
+from collections.abc import Sequence
 from memory_agent import prompts
+from memory_agent.utils import build_case_manager_prompt
+from memory_agent.writer import writes
 from datetime import datetime
+from functools import cache
+import asyncio
 import logging
 import uuid
-import json
 import os
 
 logger = logging.getLogger(__name__)
 
-# Initialize the llm
-llm = ChatOpenAI(model="gpt-4", temperature=0.3)
+def chat_model(name: str) -> BaseChatModel:
+    """The shared chat model for ``provider/model-name``.
+
+    Models come from the app context's pool, built once per (provider, model,
+    params); responses are cached on disk when LLM_CACHE_PATH is set.
+    """
+    return current().models.get(name, temperature=0.3)
 
 # Case manager node
 async def case_manager(state: State, config: RunnableConfig) -> dict:
@@ -28,75 +48,193 @@ async def case_manager(state: State, config: RunnableConfig) -> dict:
     and data validation before storage."""
     conf = configuration.Configuration.from_runnable_config(config)
     user_id = conf.user_id
+    db = current().store
 
-    # Retrieve existing case data from Firestore
+    # Wait for the previous turn's background extraction, then retrieve the case data
+    await extractions.wait(user_id)
     namespace = ('Case', user_id)
     case_data_list = await db.get(namespace)
     
     if case_data_list:
         case_memory = case_data_list[0].value
+        update_time = case_data_list[0].update_time
     else:
-        # Initialize new case data with schema
-        case_memory = get_schema_json()
-        await db.set(namespace, Memory(key=user_id, value=case_memory, tool_name="Case")
-                     )
-    # Prepare the system prompt with user memories and current time
-    prompt = conf.case_manager_prompt.format(
-        schema=get_schema_json(),
-        case_memory=json.dumps(case_memory, indent=2),
-        disclaimer=conf.disclaimer,
-        time=datetime.now().isoformat()
+        # Initialize new case data with schema; a case created concurrently
+        # (another tab) is merged rather than overwritten
+        result = await writes.submit(db, namespace, diff_documents({}, get_schema_json()), None, user_id)
+        case_memory, update_time = result.value, result.update_time
+    index = index_for(user_id, case_memory, update_time)
+    if (conf.interview_phases and state.phase is not Phase.FOLLOW_UP
+            and index.completion >= conf.closing_completion):
+        # Nothing left to ask: the scripted closing question follows
+        return {"phase": Phase.CLOSING}
+    # Prepare the system prompt: cached static prefix, then the missing fields,
+    # the collected case data and the current time
+    prompt = build_case_manager_prompt(
+        conf.case_manager_prompt,
+        conf.case_manager_context_prompt,
+        index,
+        datetime.now().isoformat(),
+        conf.disclaimer,
     )
-    # Filter messages for the conversation
-    filtered_messages = [
-        msg for msg in state.messages 
-        if isinstance(msg, (HumanMessage, AIMessage))
-    ]
+    # Fold turns that left the window into the running summary alongside the
+    # reply, not before it: until the next turn the reply still sees those
+    # turns verbatim after the previous summary.
     # Invoke the language model with the prepared prompt
-    next_question = await llm.ainvoke(
-        [SystemMessage(content=prompt), *filtered_messages]
+    # (tagged so streaming clients forward only these tokens)
+    llm = chat_model(conf.case_manager_model or conf.model)
+    compacted, next_question = await asyncio.gather(
+        _compact(state, conf),
+        llm.ainvoke(
+            [SystemMessage(content=prompt), *bounded_messages(state.messages, state.summary, state.summarized_count)],
+            config={"tags": [REPLY_TAG]},
+        ),
     )
-    return {"messages": [next_question]}
+    if conf.interview_phases and asks_closing_question(str(next_question.content)):
+        # The reply to "anything else?" is handled by the closing node
+        return {"messages": [next_question], "phase": Phase.CLOSING, **compacted}
+    return {"messages": [next_question], **compacted}
 
-async def update_case(state: State, config: RunnableConfig) -> dict:
-    """Reflect on the chat history and update the memory collection."""
-    conf = configuration.Configuration.from_runnable_config(config)
-    user_id = conf.user_id
+async def _compact(state: State, conf: configuration.Configuration) -> dict:
+    """Run ``compact_history``, building the summary model only when turns left the window."""
+    if window_start(state.messages, conf.max_context_turns) <= state.summarized_count:
+        return {}
+    summarizer = chat_model(conf.summary_model or conf.model)
+    return await compact_history(summarizer, state.messages, state.summary, state.summarized_count, conf.max_context_turns)
 
-    namespace = ('Case', user_id)
-    case_data_list = await db.get(namespace)
-    existing_memories = None
-    
-    if case_data_list:
-        existing_memories = [(item.key, "Case", item.value) for item in case_data_list]
-    
-    # Merge the chat history and the instruction
+def _extraction_messages(state: State, conf: configuration.Configuration) -> list:
+    """Merge the trustcall instruction with the recent chat history."""
     trustcall_prompt = prompts.TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages = list(merge_message_runs(messages=[
-        SystemMessage(content=trustcall_prompt), 
-        *state.messages[:-1]
+    return list(merge_message_runs(messages=[
+        SystemMessage(content=trustcall_prompt),
+        *state.messages[window_start(state.messages, conf.max_context_turns):-1]
     ]))
 
-    trustcall = create_extractor(
-        llm=llm,
-        tools=[CaseData],
-        tool_choice="CaseData",
-        enable_insert=True
-    )
+async def _extract(
+    llm: BaseChatModel, namespace: tuple[str, str], schema: type, messages: list, sections: Sequence[str] = ()
+) -> None:
+    """Run trustcall for one schema and persist the result to its document.
+
+    With ``sections`` (CaseData only), only those sections are read, extracted
+    and written; see ``_extract_sections``.
+    """
+    db = current().store
+    if sections:
+        data_list = await db.get(namespace, fields=list(sections))
+        if data_list:
+            await _extract_sections(llm, namespace, data_list, messages, sections)
+            return
+    data_list = await db.get(namespace)
+    extracted = await extract_document(llm, schema, messages, data_list)
+    if extracted is not None:
+        await _persist(namespace, schema, data_list, *extracted)
+
+async def extract_document(
+    llm: BaseChatModel, schema: type, messages: list, data_list: list
+) -> tuple[dict, str] | None:
+    """Run trustcall for ``schema`` over ``messages``, updating the stored ``data_list``.
+
+    Returns the new document value and its id, or None when the model made no
+    extraction. Nothing is written.
+    """
+    existing_memories = None
+
+    if data_list:
+        existing_memories = [(item.key, schema.__name__, item.value) for item in data_list]
 
-    updated_case_data = await trustcall.ainvoke({
-        "messages": updated_messages, 
+    trustcall = get_extractor(llm, [schema], tool_choice=schema.__name__)
+
+    updated_data = await trustcall.ainvoke({
+        "messages": messages,
         "existing": existing_memories
     })
 
-    # Save the memories from Trustcall to the store
-    for r, rmeta in zip(updated_case_data["responses"], updated_case_data["response_metadata"]):
-        doc_id = rmeta.get("json_doc_id", str(uuid.uuid4()))
-        await db.set(
-            namespace,
-            Memory(key=doc_id, value=r.model_dump(mode="json"), tool_name="Case")
-        )
+    # Every response targets the same document: keep the one that updates the
+    # stored document (or the newest).
+    responses = list(zip(updated_data["responses"], updated_data["response_metadata"]))
+    if not responses:
+        return None
+    stored_key = data_list[0].key if data_list else None
+    r, rmeta = next(
+        ((r, rmeta) for r, rmeta in responses if rmeta.get("json_doc_id") == stored_key),
+        responses[-1],
+    )
+    return r.model_dump(mode="json"), rmeta.get("json_doc_id", str(uuid.uuid4()))
+
+async def _extract_sections(
+    llm: BaseChatModel, namespace: tuple[str, str], data_list: list, messages: list, sections: Sequence[str]
+) -> None:
+    """Extract each section with its own small tool, concurrently, and merge the results.
+
+    ``data_list`` holds the stored case projected to ``sections``, so the
+    diff written back can only touch those sections.
+    """
+    stored = data_list[0].value
+    models = section_models()
+
+    async def extract(section: str) -> dict | None:
+        model = models[section]
+        trustcall = get_extractor(llm, [model], tool_choice=model.__name__)
+        updated = await trustcall.ainvoke({
+            "messages": messages,
+            "existing": [(section, model.__name__, stored.get(section) or {})],
+        })
+        responses = list(zip(updated["responses"], updated["response_metadata"]))
+        if not responses:
+            return None
+        r, _ = next(((r, m) for r, m in responses if m.get("json_doc_id") == section), responses[-1])
+        return r.model_dump(mode="json")
+
+    results = await asyncio.gather(*(extract(section) for section in sections))
+    new_value = {**stored, **{s: r for s, r in zip(sections, results) if r is not None}}
+    await _persist(namespace, CaseData, data_list, new_value, data_list[0].key)
 
+def _sections(state: State, conf: configuration.Configuration) -> tuple[str, ...]:
+    """The case sections the latest exchange is about (empty: extract the whole case)."""
+    if not conf.section_extraction:
+        return ()
+    return select_sections(*last_exchange(state.messages), max_sections=conf.max_extraction_sections)
+
+async def _persist(namespace: tuple[str, str], schema: type, data_list: list, new_value: dict, doc_id: str) -> None:
+    """Write ``new_value`` as a delta against the stored document, or create it.
+
+    The write goes through the document's single-writer queue, which merges
+    it with concurrent updates for the same user and retries lost races.
+    """
+    user_id = namespace[1]
+    base = data_list[0] if data_list else None
+    changes = diff_documents(base.value if base else {}, new_value)
+    logger.debug("%s %s: %d changed field(s)", namespace[0], user_id, len(changes))
+    result = await writes.submit(current().store, namespace, changes, base, doc_id)
+    if result.changes and schema is CaseData:
+        record_update(user_id, result.value, result.changes, result.base_update_time, result.update_time)
+
+async def _apply_fast_path(user_id: str, result: FastPathResult, schemas: dict[str, type]) -> None:
+    """Persist the values parsed locally from the latest reply."""
+    db = current().store
+    for name, schema in schemas.items():
+        fields = result.updates.get(name)
+        if not fields:
+            continue
+        namespace = (name, user_id)
+        data_list = await db.get(namespace)
+        new_value = apply_diff(data_list[0].value if data_list else {}, fields)
+        await _persist(namespace, schema, data_list, new_value, user_id)
+
+def _fast_path(state: State, conf: configuration.Configuration) -> FastPathResult:
+    """Run the deterministic pre-extraction over the latest reply (a no-op when disabled)."""
+    if not conf.fast_path:
+        return FastPathResult()
+    return pre_extract(*last_exchange(state.messages))
+
+async def update_case(state: State, config: RunnableConfig) -> dict:
+    """Reflect on the chat history and update the memory collection."""
+    conf = configuration.Configuration.from_runnable_config(config)
+    fast = _fast_path(state, conf)
+    await _apply_fast_path(conf.user_id, fast, {"Case": CaseData})
+    if "Case" not in fast.skip_llm:
+        llm = chat_model(conf.extraction_model or conf.model)
+        await _extract(llm, ('Case', conf.user_id), CaseData, _extraction_messages(state, conf), _sections(state, conf))
     return {
         "messages": [
             ToolMessage(
@@ -106,61 +244,104 @@ async def update_case(state: State, config: RunnableConfig) -> dict:
         ]
     }
 
-async def update_user(state: State, config: RunnableConfig, db: FireStore) -> dict:
+async def update_user(state: State, config: RunnableConfig) -> dict:
     """Reflect on the chat history and update the memory collection."""
     conf = configuration.Configuration.from_runnable_config(config)
-    user_id = conf.user_id
+    fast = _fast_path(state, conf)
+    await _apply_fast_path(conf.user_id, fast, {"User": UserData})
+    if "User" not in fast.skip_llm:
+        llm = chat_model(conf.extraction_model or conf.model)
+        await _extract(llm, ('User', conf.user_id), UserData, _extraction_messages(state, conf))
+    return {"messages": [ToolMessage(content="User data updated", 
+                                    tool_call_id=str(uuid.uuid4()))]}
 
-    namespace = ('User', user_id)
-    items = db.get(namespace)
-    tool_name = "User"
-    existing_memories = ([(item.key, tool_name, item.value)
-                        for item in items]
-                        if items 
-                        else None)
-    
-    trustcall = create_extractor(
-        llm=llm,
-        tools=[UserData],
-        tool_choice=tool_name,
-        enable_insert=True
-    )
+async def extract_updates(state: State, config: RunnableConfig) -> dict:
+    """Pipeline mode (and the scripted closing): extract case and user data in the background.
 
-    # Merge the chat history and the instruction
-    trustcall_prompt = prompts.TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages = list(merge_message_runs(messages=[
-        SystemMessage(content=trustcall_prompt),
-        *state.messages[:-1]
-    ]))
+    Both extractions share one message prep and run concurrently. The turn
+    returns immediately; the next turn's case_manager waits for the task
+    before reading the case.
+    """
+    conf = configuration.Configuration.from_runnable_config(config)
+    messages = _extraction_messages(state, conf)
+    fast = _fast_path(state, conf)
+    sections = _sections(state, conf)
+    # The model is only built when a collection still needs trustcall
+    llm = chat_model(conf.extraction_model or conf.model) if {"Case", "User"} - fast.skip_llm else None
 
-    updated_user_data = await trustcall.ainvoke({
-        "messages": updated_messages, 
-        "existing": existing_memories
-    })  
-    
-    ## Save the memories from Trustcall to the store
-    for r, rmeta in zip(updated_user_data["responses"], 
-                        updated_user_data["response_metadata"]):
-        db.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-        )
+    async def extract_all() -> None:
+        await _apply_fast_path(conf.user_id, fast, {"Case": CaseData, "User": UserData})
+        jobs = []
+        if "Case" not in fast.skip_llm:
+            jobs.append(_extract(llm, ('Case', conf.user_id), CaseData, messages, sections))
+        if "User" not in fast.skip_llm:
+            jobs.append(_extract(llm, ('User', conf.user_id), UserData, messages))
+        await asyncio.gather(*jobs)
 
-    return {"messages": [ToolMessage(content="User data updated", 
-                                    tool_call_id=str(uuid.uuid4()))]}
+    extractions.schedule(conf.user_id, extract_all)
+    return {}
 
 async def end_interview(state: State, config: RunnableConfig) -> dict:
     """Node to properly end the interview."""
-    return {"messages": [*state.messages, AIMessage(content="Thank you for your time. The interview is now complete.")]}
+    return {"messages": [AIMessage(content=prompts.INTERVIEW_COMPLETE)], "phase": Phase.DONE}
+
+# Scripted interview steps: fixed messages and replies parsed without a model call
+async def disclaimer(state: State, config: RunnableConfig) -> dict:
+    """Show the disclaimer and ask for consent."""
+    conf = configuration.Configuration.from_runnable_config(config)
+    return {"messages": [AIMessage(content=conf.disclaimer.strip())], "phase": Phase.AWAITING_CONSENT}
+
+async def consent(state: State, config: RunnableConfig) -> dict:
+    """Start the interview on consent, end it on a refusal, and ask again otherwise."""
+    answer, _ = last_exchange(state.messages)
+    agreed = parse_consent(answer)
+    if agreed:
+        return {"phase": Phase.INTERVIEW}
+    if agreed is None:
+        return {"messages": [AIMessage(content=prompts.CONSENT_REPROMPT)]}
+    return {"messages": [AIMessage(content=prompts.CONSENT_DECLINED)], "phase": Phase.DONE}
 
-async def router_node(state: State) -> str:
+async def closing_question(state: State, config: RunnableConfig) -> dict:
+    """Ask whether the client has anything to add once the case is complete."""
+    return {"messages": [AIMessage(content=prompts.CLOSING_QUESTION)]}
+
+async def closing(state: State, config: RunnableConfig) -> dict:
+    """End the interview if the client has nothing to add, else let the model follow up."""
+    answer, _ = last_exchange(state.messages)
+    if wants_to_finish(answer):
+        return {"messages": [AIMessage(content=prompts.INTERVIEW_COMPLETE)], "phase": Phase.DONE}
+    # The case may be complete already; FOLLOW_UP keeps case_manager from
+    # answering with the closing question again.
+    return {"phase": Phase.FOLLOW_UP}
+
+async def route_turn(state: State, config: RunnableConfig) -> str:
+    """Send the client's message to the node for the current interview phase."""
+    answer, _ = last_exchange(state.messages)
+    if is_quit(answer):
+        return "end_interview"
+    if not configuration.Configuration.from_runnable_config(config).interview_phases:
+        return "case_manager"
+    return {
+        Phase.CONSENT: "disclaimer",
+        Phase.AWAITING_CONSENT: "consent",
+        Phase.INTERVIEW: "case_manager",
+        Phase.FOLLOW_UP: "case_manager",
+        Phase.CLOSING: "closing",
+        Phase.DONE: "end_interview",
+    }[state.phase]
+
+async def resume_interview(state: State, config: RunnableConfig) -> str:
+    """After a scripted step, continue with the case manager if the interview is on."""
+    return "case_manager" if state.phase in (Phase.INTERVIEW, Phase.FOLLOW_UP) else END
+
+async def router_node(state: State, config: RunnableConfig) -> str:
     """Route the conversation based on the last message."""
     msg = state.messages[-1]
-    
-    # Check for termination
-    if isinstance(msg, HumanMessage) and msg.content.lower() in ["quit", "exit", "terminate"]:
-        return "end_interview"
-    
+
+    # The case is complete and case_manager skipped the model
+    if isinstance(msg, HumanMessage) and state.phase is Phase.CLOSING:
+        return "closing_question"
+
     # Main interview flow
     if msg.additional_kwargs.get("tool_calls"):
         tool_names = [tc["function"]["name"] for tc in msg.additional_kwargs["tool_calls"]]
@@ -168,38 +349,73 @@ async def router_node(state: State) -> str:
             return "update_user"
         if "CaseData" in tool_names:
             return "update_case"
-    return "case_manager"
+    if configuration.Configuration.from_runnable_config(config).pipeline_mode:
+        return "extract_updates"
+    return END
 
 # Create the graph
 builder = StateGraph(State, config_schema=configuration.Configuration)
 
-# Add nodes
-builder.add_node("case_manager", case_manager)
-builder.add_node("update_case", update_case)
-builder.add_node("update_user", update_user)
-builder.add_node("end_interview", end_interview)
+# Add nodes; the model and store work is measured when Configuration.telemetry is on
+builder.add_node("case_manager", instrument("case_manager", case_manager))
+builder.add_node("update_case", instrument("update_case", update_case))
+builder.add_node("update_user", instrument("update_user", update_user))
+builder.add_node("extract_updates", instrument("extract_updates", extract_updates))
+# Scripted nodes are tagged like the case_manager reply so their messages are streamed too
+builder.add_node("end_interview", instrument("end_interview", end_interview), metadata={"tags": [REPLY_TAG]})
+builder.add_node("disclaimer", instrument("disclaimer", disclaimer), metadata={"tags": [REPLY_TAG]})
+builder.add_node("consent", instrument("consent", consent), metadata={"tags": [REPLY_TAG]})
+builder.add_node("closing_question", instrument("closing_question", closing_question), metadata={"tags": [REPLY_TAG]})
+builder.add_node("closing", instrument("closing", closing), metadata={"tags": [REPLY_TAG]})
 
-# Set the entry point
-builder.add_edge("__start__", "case_manager")
+# Set the entry point: the interview phase decides who answers
+builder.add_conditional_edges(
+    "__start__",
+    route_turn,
+    ["disclaimer", "consent", "closing", "case_manager", "end_interview"],
+)
+builder.add_conditional_edges("consent", resume_interview, ["case_manager", END])
+builder.add_conditional_edges("closing", resume_interview, ["case_manager", END])
 
 # Add conditional edges for case_manager
 builder.add_conditional_edges(
     "case_manager",
-    router_node,
+    instrument("router_node", router_node),
     {
         "update_case": "update_case",
         "update_user": "update_user",
-        "end_interview": "end_interview",
+        "extract_updates": "extract_updates",
+        "closing_question": "closing_question",
         END: END
     }
 )
 
-# Add edge from end_interview to END
+# Add edges to END; the last answer before a scripted closing is extracted in the background
+builder.add_edge("closing_question", "extract_updates")
+builder.add_edge("disclaimer", END)
+builder.add_edge("extract_updates", END)
 builder.add_edge("end_interview", END)
 
 # Compile the graph
-graph = builder.compile()
-graph.name = "CaseManagerAgent"
+@cache
+def get_graph(checkpointer: BaseCheckpointSaver | None = None) -> CompiledStateGraph:
+    """Compile the graph on first use, once per checkpointer.
+
+    ``graph`` has no checkpointer of its own: the LangGraph platform provides
+    one. Standalone deployments pass ``current().checkpointer``.
+    """
+    compiled = builder.compile(checkpointer=checkpointer)
+    compiled.name = "CaseManagerAgent"
+    return compiled
+
+if TYPE_CHECKING:
+    graph: CompiledStateGraph
+
+def __getattr__(name: str) -> Any:
+    # ``graph`` is compiled lazily so importing this module stays cheap.
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["graph"]
+__all__ = ["get_graph", "graph"]
 
@@ -0,0 +1,203 @@
+"""Disk-backed cache of chat model responses, shared across processes and runs.
+
+Plug it into a chat model with ``ChatOpenAI(..., cache=SQLiteResponseCache(path))``:
+langchain looks every call up by the serialized messages and the model's
+``llm_string`` (model name plus sorted call parameters, including bound tools),
+so replays, regression runs and retried requests are answered from disk.
+
+The key ignores message ids, and of the current time the prompts stamp
+("System Time: ...") it only keeps the date, so the same turn replayed on the
+same day is a hit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from memory_agent.cache import CacheStats
+
+logger = logging.getLogger(__name__)
+
+CASE_MANAGER = "case_manager"
+EXTRACTION = "extraction"
+
+
+def default_namespace(prompt: str, llm_string: str) -> str:
+    """Calls with bound tools (trustcall) are extractions; everything else is case_manager."""
+    return EXTRACTION if '"tools"' in llm_string or "'tools'" in llm_string else CASE_MANAGER
+
+
+SYSTEM_TIME = re.compile(r"(System Time: \d{4}-\d{2}-\d{2})T[\d:.+-]*")
+
+
+def _without_ids(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_without_ids(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if value.get("type") == "constructor" and isinstance(value.get("kwargs"), dict):
+        value = {**value, "kwargs": {k: v for k, v in value["kwargs"].items() if k != "id"}}
+    return {k: _without_ids(v) for k, v in value.items()}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """``prompt`` without what changes on every run of the same turn.
+
+    Message ids (assigned afresh by the graph) are dropped and every "System
+    Time" stamp is cut down to its date.
+    """
+    try:
+        prompt = json.dumps(_without_ids(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        pass
+    return SYSTEM_TIME.sub(r"\1", prompt)
+
+
+def cache_key(prompt: str, llm_string: str, namespace: str = "") -> str:
+    """Canonical key of a call: sha256 over the namespace, the model parameters and the messages."""
+    return hashlib.sha256(json.dumps([namespace, llm_string, normalize_prompt(prompt)]).encode()).hexdigest()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class SQLiteResponseCache(BaseCache):
+    """LLM response cache in a SQLite file with size- and age-based eviction.
+
+    Entries older than ``max_age`` seconds are never served. When the stored
+    payloads exceed ``max_bytes`` the least recently used entries are evicted.
+    Each call belongs to a namespace (see ``default_namespace``): the namespace
+    is part of the key, hits and misses are counted per namespace, and
+    ``clear(namespace=...)`` drops one namespace.
+    """
+
+    def __init__(
+        self,
+        path: str = ".llm_cache.sqlite",
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float | None = 7 * 24 * 3600,
+        namespace: Callable[[str, str], str] = default_namespace,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.namespace = namespace
+        self.stats: dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _stats(self, namespace: str) -> CacheStats:
+        return self.stats.setdefault(namespace, CacheStats())
+
+    def hit_rates(self) -> dict[str, float]:
+        return {name: stats.hit_rate for name, stats in self.stats.items()}
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        namespace = self.namespace(prompt, llm_string)
+        key = cache_key(prompt, llm_string, namespace)
+        now = time.time()
+        with self._lock:
+            stats = self._stats(namespace)
+            row = self._conn.execute("SELECT payload, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.max_age is not None and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                stats.stale += 1
+                row = None
+            if row is None:
+                stats.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            stats.hits += 1
+        try:
+            return [loads(g, allowed_objects="core") for g in json.loads(row[0])]
+        except Exception:
+            logger.warning("Dropping unreadable cache entry %s", key, exc_info=True)
+            self._delete(key)
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        payload = json.dumps([dumps(g) for g in return_val])
+        namespace = self.namespace(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(prompt, llm_string, namespace), namespace, payload, len(payload), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.max_age is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, namespace, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted: list[tuple[str]] = []
+        for key, namespace, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._stats(namespace).evictions += 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every entry, or only those of ``namespace=...``."""
+        with self._lock:
+            if "namespace" in kwargs:
+                self._conn.execute("DELETE FROM responses WHERE namespace = ?", (kwargs["namespace"],))
+            else:
+                self._conn.execute("DELETE FROM responses")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def cache_from_env() -> SQLiteResponseCache | None:
+    """The response cache configured by LLM_CACHE_PATH, or None when unset.
+
+    LLM_CACHE_MAX_BYTES and LLM_CACHE_MAX_AGE (seconds, 0 disables) tune eviction.
+    """
+    path = os.environ.get("LLM_CACHE_PATH")
+    if not path:
+        return None
+    max_age = float(os.environ.get("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    return SQLiteResponseCache(
+        path,
+        max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        max_age=max_age or None,
+    )
@@ -0,0 +1,283 @@
+"""Load generator: many simulated clients interviewing against one worker.
+
+Drives ``--clients`` concurrent interviews of ``--turns`` turns each through
+the compiled graph, with a simulated chat model that answers after
+``--llm-latency`` seconds (plus jitter) instead of calling a provider. The
+store is a local SQLite file, or the Firestore emulator when
+FIRESTORE_EMULATOR_HOST is set and ``--store emulator`` is given.
+
+While the clients run, a monitor task measures event-loop lag: how late a
+``sleep(interval)`` wakes up. Any blocking call on the loop (a synchronous
+client call, heavy CPU in a node) shows up as lag, so a worker that looks
+fine on throughput but stalls every interview is caught.
+
+The report is printed as JSON for comparison across commits::
+
+    python -m memory_agent.loadtest --clients 50 --turns 8 --llm-latency 0.5 > load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from memory_agent.cache import CachedStore
+from memory_agent.models import ModelPool
+
+logger = logging.getLogger(__name__)
+
+ANSWERS = (
+    "hi",
+    "yes",
+    "My name is Jane Doe",
+    "I was rear-ended at a red light on Main Street last Tuesday",
+    "Whiplash and a sprained wrist",
+    "An ambulance took me to Memorial Hospital",
+    "State Farm, policy SF-2231-889",
+    "I work at Acme Logistics and missed two weeks",
+    "About $12,500 in medical bills so far",
+    "No other attorneys",
+)
+"""A client's replies, cycled when an interview has more turns."""
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Chat model that answers after a simulated provider latency.
+
+    Plain calls get a follow-up question. Once tools are bound with a named
+    ``tool_choice`` (as trustcall does) it calls that tool, filling its first
+    string field with the client's last message so every extraction writes.
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.2
+    """Relative spread of the latency: each call takes latency * (1 ± jitter)."""
+    tool: dict[str, Any] | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any) -> SimulatedChatModel:
+        schemas = [convert_to_openai_tool(t)["function"] for t in tools]
+        chosen = next((s for s in schemas if s["name"] == tool_choice), None)
+        return self.model_copy(update={"tool": chosen})
+
+    def _delay(self) -> float:
+        return max(self.latency * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        last = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if self.tool is None:
+            return AIMessage(content=f"Thank you. Could you tell me more about that? ({len(messages)} messages so far)")
+        properties = self.tool.get("parameters", {}).get("properties", {})
+        text_field = next(
+            (name for name, p in properties.items() if p.get("type") == "string" and "format" not in p), None
+        )
+        args = {text_field: last[:200]} if text_field else {}
+        return AIMessage(content="", tool_calls=[{"name": self.tool["name"], "args": args, "id": f"call_{id(args)}"}])
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None,
+                  **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None,
+                         **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+class SimulatedModelPool(ModelPool):
+    """Model pool handing out one simulated model for every name."""
+
+    def __init__(self, model: SimulatedChatModel):
+        super().__init__()
+        self.model = model
+
+    def get(self, name: str, **params: Any) -> BaseChatModel:
+        return self.model
+
+
+class LagMonitor:
+    """Measure event-loop lag: how late a ``sleep(interval)`` wakes up."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - start - self.interval, 0.0))
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100) of ``values``; 0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+@dataclass
+class LoadReport:
+    """Outcome of a load run; latencies and lags in milliseconds."""
+
+    clients: int
+    turns_per_client: int
+    llm_latency_s: float
+    store: str
+    completed_turns: int = 0
+    errors: int = 0
+    duration_s: float = 0.0
+    throughput_turns_per_s: float = 0.0
+    turn_latency_ms: dict[str, float] = field(default_factory=dict)
+    loop_lag_ms: dict[str, float] = field(default_factory=dict)
+    stalls: int = 0
+    """Lag samples above ``stall_threshold_ms``."""
+    stall_threshold_ms: float = 50.0
+
+
+def _summary(values_s: Sequence[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values_s, 50) * 1000, 2),
+        "p95": round(percentile(values_s, 95) * 1000, 2),
+        "p99": round(percentile(values_s, 99) * 1000, 2),
+        "max": round(max(values_s, default=0.0) * 1000, 2),
+    }
+
+
+async def run_load(
+    store: CachedStore,
+    *,
+    clients: int = 10,
+    turns: int = 8,
+    llm_latency: float = 0.5,
+    jitter: float = 0.2,
+    store_name: str = "custom",
+    configurable: dict[str, Any] | None = None,
+    lag_interval: float = 0.01,
+) -> LoadReport:
+    """Run ``clients`` concurrent interviews of ``turns`` turns against ``store``."""
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from memory_agent.app import AppContext, use_context
+    from memory_agent.graph import builder
+    from memory_agent.pipeline import extractions
+
+    graph = builder.compile(checkpointer=MemorySaver())
+    model = SimulatedChatModel(latency=llm_latency, jitter=jitter)
+    report = LoadReport(clients=clients, turns_per_client=turns, llm_latency_s=llm_latency, store=store_name)
+    latencies: list[float] = []
+
+    async def client(n: int) -> None:
+        # The interviews have a checkpointer, so they run the scripted consent steps as deployed.
+        config = {"configurable": {
+            "interview_phases": True, **(configurable or {}), "user_id": f"load-{n}", "thread_id": f"load-{n}",
+        }}
+        for turn in range(turns):
+            start = time.perf_counter()
+            try:
+                await graph.ainvoke({"messages": [("user", ANSWERS[turn % len(ANSWERS)])]}, config)
+            except Exception:
+                logger.exception("Client %d failed on turn %d", n, turn)
+                report.errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    monitor = LagMonitor(lag_interval)
+    failed_extractions = extractions.failed
+    with use_context(AppContext(store=store, models=SimulatedModelPool(model))):
+        monitor.start()
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(client(n) for n in range(clients)))
+            # In pipeline mode the last turns' extractions are still running.
+            await asyncio.gather(*(extractions.wait(f"load-{n}") for n in range(clients)))
+            report.errors += extractions.failed - failed_extractions
+            await store.flush()
+        finally:
+            report.duration_s = round(time.perf_counter() - start, 3)
+            await monitor.stop()
+
+    report.completed_turns = len(latencies)
+    report.throughput_turns_per_s = round(len(latencies) / report.duration_s, 2) if report.duration_s else 0.0
+    report.turn_latency_ms = _summary(latencies)
+    report.loop_lag_ms = _summary(monitor.lags)
+    report.stalls = sum(lag * 1000 > report.stall_threshold_ms for lag in monitor.lags)
+    return report
+
+
+def _build_store(kind: str, directory: Path) -> CachedStore:
+    if kind == "sqlite":
+        from memory_agent.sqlite_store import SQLiteStore
+
+        return CachedStore(SQLiteStore(str(directory / "load.sqlite3")))
+    if kind == "emulator":
+        # The client talks to FIRESTORE_EMULATOR_HOST without credentials.
+        from google.cloud.firestore import AsyncClient
+
+        from memory_agent.configuration import FireStore
+
+        return CachedStore(FireStore(AsyncClient(project="memory-agent-load")))
+    raise ValueError(f"Unknown store {kind!r}; expected 'sqlite' or 'emulator'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated interviews through the graph.")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="simulated model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency spread")
+    parser.add_argument("--store", choices=("sqlite", "emulator"), default="sqlite")
+    parser.add_argument("--pipeline-mode", action=argparse.BooleanOptionalAction, default=True,
+                        help="extract in the background after each reply (default: on)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = asyncio.run(run_load(
+            _build_store(args.store, Path(directory)),
+            clients=args.clients,
+            turns=args.turns,
+            llm_latency=args.llm_latency,
+            jitter=args.jitter,
+            store_name=args.store,
+            configurable={"pipeline_mode": args.pipeline_mode},
+        ))
+    text = json.dumps(asdict(report), indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Storage layout migrations for case documents."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from memory_agent.configuration import LAYOUT_FIELD, Memory, ShardedFireStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MigrationReport:
+    """Outcome of a layout migration."""
+
+    migrated: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+async def migrate_to_sections(client: Any, collection: str = "Case", *, dry_run: bool = False) -> MigrationReport:
+    """Rewrite monolithic documents of ``collection`` into the section-sharded layout.
+
+    Each document is rewritten in place with a single batch (root plus one
+    subdocument per section). Documents that already carry the layout marker
+    are skipped, so the migration can be re-run safely.
+    """
+    store = ShardedFireStore(client)
+    report = MigrationReport()
+    async for snapshot in client.collection(collection).stream():
+        value = snapshot.to_dict()
+        if LAYOUT_FIELD in value:
+            report.skipped += 1
+            continue
+        if dry_run:
+            report.migrated += 1
+            continue
+        try:
+            await store.set((collection, snapshot.id), Memory(key=collection, value=value, tool_name=collection))
+            report.migrated += 1
+        except Exception:
+            logger.exception("Failed to migrate %s/%s", collection, snapshot.id)
+            report.failed += 1
+    return report
+
+
+def main() -> None:
+    from memory_agent.app import firestore_client
+
+    parser = argparse.ArgumentParser(description="Migrate case documents to the section-sharded layout.")
+    parser.add_argument("--collection", default="Case")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    report = asyncio.run(
+        migrate_to_sections(firestore_client(), args.collection, dry_run=args.dry_run)
+    )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Shared chat model clients, one per (provider, model, parameters)."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
+
+from memory_agent.utils import split_model_and_provider
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_PROVIDER = "openai"
+
+ModelKey = tuple[str, str, tuple[tuple[str, Any], ...]]
+
+
+def _openai(model: str, params: dict[str, Any], pool: ModelPool) -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = pool.http_clients("openai")
+    return ChatOpenAI(model=model, http_client=http_client, http_async_client=http_async_client, **params)
+
+
+def _anthropic(model: str, params: dict[str, Any], pool: ModelPool) -> BaseChatModel:
+    import anthropic
+    from langchain_anthropic import ChatAnthropic
+
+    chat = ChatAnthropic(model=model, **params)
+    if chat.anthropic_proxy:
+        return chat
+    # ChatAnthropic takes no HTTP client: fill its lazily built API clients
+    # (cached properties) with ones on the pool's connection pools.
+    http_client, http_async_client = pool.http_clients("anthropic")
+    chat.__dict__["_client"] = anthropic.Client(**chat._client_params, http_client=http_client)
+    chat.__dict__["_async_client"] = anthropic.AsyncClient(**chat._client_params, http_client=http_async_client)
+    return chat
+
+
+PROVIDERS: dict[str, Callable[[str, dict[str, Any], ModelPool], BaseChatModel]] = {
+    "openai": _openai,
+    "anthropic": _anthropic,
+}
+
+
+class ModelPool:
+    """Build each chat model once and hand out the same instance afterwards.
+
+    Models are keyed by (provider, model, params), so nodes configured with the
+    same model share one client, and every client of a provider shares one pair
+    of httpx clients (and so one connection pool). Reusing instances also keeps
+    the extractor registry, which is keyed by model identity, warm.
+    """
+
+    def __init__(self, cache: BaseCache | None = None):
+        self.cache = cache
+        self._models: dict[ModelKey, BaseChatModel] = {}
+        self._http: dict[str, tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def http_clients(self, provider: str) -> tuple[httpx.Client, httpx.AsyncClient]:
+        if provider not in self._http:
+            import httpx
+
+            self._http[provider] = (httpx.Client(), httpx.AsyncClient())
+        return self._http[provider]
+
+    def get(self, name: str, **params: Any) -> BaseChatModel:
+        """The chat model for ``provider/model`` (provider defaults to openai) with ``params``."""
+        spec = split_model_and_provider(name)
+        provider = spec["provider"] or DEFAULT_PROVIDER
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown model provider {provider!r}; expected one of {sorted(PROVIDERS)}")
+        key: ModelKey = (provider, spec["model"], tuple(sorted(params.items())))
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if self.cache is not None:
+                    params = {"cache": self.cache, **params}
+                model = self._models[key] = PROVIDERS[provider](spec["model"], params, self)
+        return model
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP clients."""
+        for client, async_client in self._http.values():
+            client.close()
+            await async_client.aclose()
+        self._http.clear()
+        self._models.clear()
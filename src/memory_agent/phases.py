@@ -0,0 +1,59 @@
+"""Deterministic handling of the scripted steps of an interview.
+
+The consent step, quitting and the closing "anything else?" step have fixed
+wording and a small set of expected replies, so they are answered here
+without a model call; only the open-ended questioning goes to the LLM.
+"""
+
+from __future__ import annotations
+
+import re
+
+QUIT_WORDS = frozenset({"quit", "exit", "terminate"})
+CONSENT_WORDS = frozenset([
+    "yes", "yeah", "yep", "yup", "sure", "ok", "okay", "continue", "proceed", "i",
+    "agree", "agreed", "consent", "go", "ahead", "let's", "lets", "start", "begin",
+    "please", "no", "nope", "not", "do", "don't", "dont", "exit", "quit", "stop",
+    "decline", "disagree",
+])
+REFUSALS = frozenset([
+    "no", "nope", "not", "don't", "dont", "exit", "quit", "stop", "decline", "disagree",
+])
+# Replies to "anything else?" that end the interview, and the words that make them a "no".
+NOTHING_ELSE = frozenset([
+    "no", "nope", "nothing", "else", "that's", "thats", "that", "it", "is", "all",
+    "i'm", "im", "i", "am", "done", "set", "good", "fine", "thanks", "thank", "you",
+    "not", "really",
+])
+FINISHED = frozenset(["no", "nope", "nothing", "not", "done", "all"])
+
+CLOSING_QUESTION = re.compile(r"\banything else (?:you(?:'d| would) like to add|to add)\b", re.IGNORECASE)
+"""The case manager's own closing question, as its instructions word it."""
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[a-z']+", text.lower())
+
+
+def is_quit(reply: str) -> bool:
+    """The client asked to stop the interview ("quit", "exit" or "terminate")."""
+    return reply.strip().strip(".!").lower() in QUIT_WORDS
+
+
+def parse_consent(reply: str) -> bool | None:
+    """True for consent, False for a refusal, None when the reply is neither."""
+    words = set(_words(reply))
+    if not words or not words <= CONSENT_WORDS:
+        return None
+    return not words & REFUSALS
+
+
+def wants_to_finish(reply: str) -> bool:
+    """The client has nothing to add: "no", "nothing else", "that's all, thanks"."""
+    words = set(_words(reply))
+    return bool(words) and words <= NOTHING_ELSE and bool(words & FINISHED)
+
+
+def asks_closing_question(text: str) -> bool:
+    """The model's reply is its "anything else you would like to add?" question."""
+    return bool(CLOSING_QUESTION.search(text))
@@ -0,0 +1,63 @@
+"""Background extraction that runs off the critical path of the next question."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTracker:
+    """Track one chain of background extraction tasks per user.
+
+    A newly scheduled task first waits for the user's previous task, so
+    extractions for the same user are applied in turn order and none is lost.
+    Readers call ``wait`` before reading the user's data.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self.failed = 0
+        """Number of jobs that raised; the error itself is logged."""
+
+    def schedule(self, key: str, job: Callable[[], Awaitable[None]]) -> asyncio.Task[None]:
+        """Run ``job`` in the background after every job already scheduled for ``key``."""
+        previous = self._tasks.get(key)
+
+        async def run() -> None:
+            if previous is not None:
+                await asyncio.wait([previous])
+            try:
+                await job()
+            except Exception:
+                self.failed += 1
+                logger.exception("Background extraction failed for %s", key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    def pending(self, key: str) -> asyncio.Task[None] | None:
+        return self._tasks.get(key)
+
+    async def wait(self, key: str) -> None:
+        """Wait for every job scheduled for ``key``."""
+        task = self._tasks.get(key)
+        if task is not None:
+            # asyncio.wait never cancels the task, even if the reader is cancelled.
+            await asyncio.wait([task])
+
+    async def drain(self) -> None:
+        """Wait for every scheduled job, e.g. before shutdown."""
+        while self._tasks:
+            await asyncio.wait(list(self._tasks.values()))
+
+    def _forget(self, key: str, task: asyncio.Task[None]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+
+extractions = ExtractionTracker()
@@ -0,0 +1,444 @@
+"""Batch re-extraction of case data from stored interview transcripts.
+
+After a change to ``CaseData`` or ``TRUSTCALL_INSTRUCTION``, past interviews
+can be re-derived without replaying them turn by turn: every thread in the
+checkpointer is loaded once and its whole transcript goes through the same
+trustcall extraction ``update_case`` uses, merged into the stored document::
+
+    python -m memory_agent.reextract --concurrency 16 --rate 8 --checkpoint reextract.json
+
+At most ``concurrency`` transcripts are extracted at once. Every model call
+first takes a token from a bucket refilled at ``rate`` calls per second, so a
+large run stays inside the provider's rate limit. Failed extractions are
+retried with exponential backoff. Updated documents are written in groups of
+``batch_size``, each as a conditional update of the fields the extraction
+changed (through a DocumentWriter), so an interview that updates the same
+document meanwhile is merged in rather than overwritten. Unchanged documents
+are not written at all.
+
+With ``checkpoint`` the finished threads are recorded after each group is
+committed, and a new run with the same file picks up where the last one
+stopped. Threads that failed are skipped by later runs unless
+``retry_failed`` is set.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    merge_message_runs,
+)
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from memory_agent import prompts
+from memory_agent.configuration import Memory, _store_errors
+from memory_agent.diff import diff_documents
+from memory_agent.export import MODELS
+from memory_agent.writer import DocumentWriter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Namespace = tuple[str, str]
+
+
+def _expected_errors() -> tuple[type[Exception], ...]:
+    """Errors an extraction or a transcript read is expected to fail with: provider
+    and transport errors, model output that does not validate, and store errors."""
+    import anthropic
+    import httpx
+    import openai
+    from pydantic import ValidationError
+
+    return (*_store_errors(), openai.APIError, anthropic.APIError, httpx.HTTPError, ValidationError)
+
+
+class TokenBucket(BaseRateLimiter):
+    """Token bucket: ``rate`` tokens per second, at most ``capacity`` saved up.
+
+    Attached to a chat model as its ``rate_limiter``, each model call takes
+    one token, so short bursts go through at once and the sustained call rate
+    never exceeds ``rate``.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available; otherwise the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._take()) > 0:
+            if not blocking:
+                return False
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._take()) > 0:
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+
+async def with_retries(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    retries: int = 3,
+    backoff: float = 1.0,
+    max_backoff: float = 30.0,
+    on_retry: Callable[[Exception], None] | None = None,
+) -> T:
+    """Await ``fn()``, retrying the expected failures with full-jitter exponential backoff.
+
+    The last failure is raised once ``retries`` are used up; any other error
+    is raised at once.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except _expected_errors() as exc:
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+            attempt += 1
+            logger.debug("Retry %d in %.2fs after %r", attempt, delay, exc)
+            if on_retry is not None:
+                on_retry(exc)
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class ReextractReport:
+    """Outcome of a re-extraction run."""
+
+    threads: int = 0
+    extracted: int = 0
+    """Documents extracted (one per thread and collection)."""
+    written: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    skipped: int = 0
+    """Threads without a transcript or a user id."""
+    retries: int = 0
+    batches: int = 0
+    duration_s: float = 0.0
+    threads_per_s: float = 0.0
+
+
+class Progress:
+    """Finished threads, saved to ``path`` as a watermark plus the ids finished past it.
+
+    Threads are listed in id order but finish out of order: ``after`` is the
+    last id before which every listed thread has finished, and ``done`` the
+    finished ids beyond it. Failed threads count as finished and are listed
+    in ``failed``; ``retry_failed`` hands them out again, and they stay
+    listed there until they have finished once more.
+    """
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.after: str | None = None
+        self.done: set[str] = set()
+        self.failed: list[str] = []
+        self._listed: deque[str] = deque()
+        self._retrying: set[str] = set()
+        if path is not None and path.exists():
+            saved = json.loads(path.read_text())
+            self.after, self.done, self.failed = saved["after"], set(saved["done"]), saved["failed"]
+
+    def listed(self, thread_id: str) -> None:
+        self._listed.append(thread_id)
+
+    def retry_failed(self) -> list[str]:
+        self._retrying, self.failed = set(self.failed), []
+        return sorted(self._retrying)
+
+    def finish(self, thread_ids: Iterable[str]) -> None:
+        thread_ids = list(thread_ids)
+        self._retrying.difference_update(thread_ids)
+        self.done.update(thread_ids)
+        while self._listed and self._listed[0] in self.done:
+            self.after = self._listed.popleft()
+            self.done.discard(self.after)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        if self.after is not None:
+            self.done = {thread_id for thread_id in self.done if thread_id > self.after}
+        tmp = self.path.with_suffix(".tmp")
+        failed = [*self.failed, *sorted(self._retrying)]
+        tmp.write_text(json.dumps({"after": self.after, "done": sorted(self.done), "failed": failed}))
+        os.replace(tmp, self.path)
+
+
+def transcript_messages(messages: list[BaseMessage], now: str) -> list[BaseMessage]:
+    """The extraction prompt for a whole interview: the instruction, then its text turns.
+
+    Tool calls and tool results are dropped; only what the client and the
+    case manager said is evidence.
+    """
+    turns = [
+        type(m)(content=m.content)
+        for m in messages
+        if isinstance(m, (HumanMessage, AIMessage)) and m.content
+    ]
+    instruction = SystemMessage(content=prompts.TRUSTCALL_INSTRUCTION.format(time=now))
+    return list(merge_message_runs(messages=[instruction, *turns]))
+
+
+Pending = tuple[Memory | None, dict[str, Any]]
+"""An updated document waiting to be written: the stored version it is based on, and its new value."""
+
+
+class _Batches:
+    """Updated documents waiting to be written, committed ``batch_size`` at a time.
+
+    Extractions read a document through ``latest`` first, so a value still
+    waiting here is never overwritten by an extraction based on the store.
+    Each document is written as the diff from the version first read, on the
+    condition that the document is still at that version; the writer rebases
+    the diff onto a newer version and retries.
+    """
+
+    def __init__(self, store: Any, progress: Progress, report: ReextractReport, batch_size: int):
+        self.store = store
+        self.progress = progress
+        self.report = report
+        self.batch_size = batch_size
+        self.writer = DocumentWriter()
+        self._values: dict[Namespace, Pending] = {}
+        self._committing: dict[Namespace, Pending] = {}
+        self._threads: list[str] = []
+        self._lock = asyncio.Lock()
+
+    def latest(self, namespace: Namespace) -> Pending | None:
+        return self._values.get(namespace) or self._committing.get(namespace)
+
+    async def add(self, thread_id: str, values: dict[Namespace, Pending]) -> None:
+        self._values.update(values)
+        self._threads.append(thread_id)
+        if len(self._values) >= self.batch_size or len(self._threads) >= self.batch_size:
+            await self.commit()
+
+    async def commit(self) -> None:
+        async with self._lock:
+            values, self._values = self._values, {}
+            threads, self._threads = self._threads, []
+            if values:
+                self._committing = values
+                await asyncio.gather(*(
+                    self.writer.submit(self.store, namespace, diff_documents(base.value if base else {}, value), base)
+                    for namespace, (base, value) in values.items()
+                ))
+                self._committing = {}
+                self.report.written += len(values)
+                self.report.batches += 1
+            self.progress.finish(threads)
+            self.progress.save()
+
+
+async def reextract(
+    store: Any,
+    saver: Any,
+    llm: BaseChatModel,
+    *,
+    collections: Iterable[str] = ("Case",),
+    concurrency: int = 8,
+    rate: float | None = None,
+    burst: float | None = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    batch_size: int = 50,
+    checkpoint: Path | None = None,
+    retry_failed: bool = False,
+    progress_every: int = 100,
+) -> ReextractReport:
+    """Re-run extraction over every transcript in ``saver`` and write the results to ``store``.
+
+    ``rate`` (model calls per second, ``burst`` at once) is enforced with a
+    TokenBucket on ``llm``; None leaves the calls unlimited. With
+    ``retry_failed`` the threads ``checkpoint`` records as failed are
+    extracted again before the run continues.
+    """
+    from memory_agent.graph import extract_document
+
+    schemas = {name: MODELS[name] for name in collections}
+    if rate is not None:
+        llm = llm.model_copy(update={"rate_limiter": TokenBucket(rate, burst)})
+    progress = Progress(checkpoint)
+    retried_threads = progress.retry_failed() if retry_failed else []
+    report = ReextractReport()
+    batches = _Batches(store, progress, report, batch_size)
+    queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=concurrency * 2)
+    # Transcripts of the same user are extracted one after another.
+    user_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+    start = time.perf_counter()
+
+    async def list_threads() -> None:
+        for thread_id in retried_threads:
+            await queue.put(thread_id)
+        async for thread_id in saver.athread_ids(start_after=progress.after):
+            if thread_id not in progress.done and thread_id not in progress.failed and thread_id not in retried_threads:
+                progress.listed(thread_id)
+                await queue.put(thread_id)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    def retried(exc: Exception) -> None:
+        report.retries += 1
+
+    async def extract(namespace: Namespace, schema: type, messages: list[BaseMessage]) -> Pending | None:
+        pending = batches.latest(namespace)
+        if pending is not None:
+            base, value = pending
+            data_list = [Memory(key=namespace[0], value=value, tool_name=namespace[0])]
+        else:
+            data_list = await store.get(namespace)
+            base = data_list[0] if data_list else None
+        extracted = await with_retries(
+            lambda: extract_document(llm, schema, messages, data_list), retries=retries, backoff=backoff,
+            on_retry=retried,
+        )
+        report.extracted += 1
+        if extracted is None or (data_list and extracted[0] == data_list[0].value):
+            report.unchanged += 1
+            return None
+        return base, extracted[0]
+
+    def failed(thread_id: str) -> None:
+        logger.exception("Giving up on thread %s", thread_id)
+        report.failed += 1
+        progress.failed.append(thread_id)
+
+    async def process(thread_id: str) -> None:
+        # A thread that cannot be extracted is recorded as failed; a failed
+        # write stops the run, and a new run resumes after the last commit.
+        try:
+            state = await with_retries(
+                lambda: saver.aget_tuple({"configurable": {"thread_id": thread_id}}), retries=retries, backoff=backoff,
+                on_retry=retried,
+            )
+        except _expected_errors():
+            failed(thread_id)
+            await batches.add(thread_id, {})
+            return
+        messages = state.checkpoint["channel_values"].get("messages", []) if state else []
+        user_id = state.metadata.get("user_id") if state else None
+        if not user_id or not any(isinstance(m, HumanMessage) for m in messages):
+            report.skipped += 1
+            await batches.add(thread_id, {})
+            return
+        # Relative dates ("last Tuesday") resolve against the interview's time.
+        prompt = transcript_messages(messages, state.checkpoint.get("ts") or datetime.now().isoformat())
+        async with user_locks[user_id]:
+            try:
+                results = await asyncio.gather(*(
+                    extract((name, user_id), schema, prompt) for name, schema in schemas.items()
+                ))
+            except _expected_errors():
+                failed(thread_id)
+                results = []
+            await batches.add(thread_id, {
+                (name, user_id): value for name, value in zip(schemas, results) if value is not None
+            })
+
+    async def worker() -> None:
+        while (thread_id := await queue.get()) is not None:
+            report.threads += 1
+            await process(thread_id)
+            if report.threads % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                logger.info("%d threads (%d failed), %.1f/s", report.threads, report.failed, report.threads / elapsed)
+
+    await asyncio.gather(list_threads(), *(worker() for _ in range(concurrency)))
+    await batches.commit()
+    report.duration_s = round(time.perf_counter() - start, 3)
+    report.threads_per_s = round(report.threads / report.duration_s, 2) if report.duration_s else 0.0
+    return report
+
+
+def main() -> None:
+    from memory_agent.app import build_checkpointer, build_store, current
+    from memory_agent.configuration import Configuration
+
+    parser = argparse.ArgumentParser(description="Re-extract case data from every stored interview transcript.")
+    parser.add_argument("--collection", action="append", choices=sorted(MODELS),
+                        help="document to re-extract; repeat for several (default: Case)")
+    parser.add_argument("--concurrency", type=int, default=8, help="transcripts extracted at once")
+    parser.add_argument("--rate", type=float, help="model calls per second (default: unlimited)")
+    parser.add_argument("--burst", type=float, help="model calls allowed at once (default: --rate)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="documents written per group; progress is saved after each group")
+    parser.add_argument("--checkpoint", type=Path, help="progress file; resume from it when it exists")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="extract the threads the checkpoint records as failed again")
+    parser.add_argument("--emulator", action="store_true",
+                        help="use the Firestore emulator at FIRESTORE_EMULATOR_HOST")
+    parser.add_argument("--project", default="memory-agent", help="project id for --emulator")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    client = None
+    if args.emulator:
+        # The client talks to FIRESTORE_EMULATOR_HOST without credentials.
+        from google.cloud.firestore import AsyncClient
+
+        client = AsyncClient(project=args.project)
+    conf = Configuration.from_runnable_config()
+    report = asyncio.run(reextract(
+        build_store(client),
+        build_checkpointer(client),
+        current().models.get(conf.extraction_model or conf.model, temperature=0.3),
+        collections=args.collection or ("Case",),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=args.burst,
+        retries=args.retries,
+        batch_size=args.batch_size,
+        checkpoint=args.checkpoint,
+        retry_failed=args.retry_failed,
+    ))
+    print(json.dumps(asdict(report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Pick the CaseData sections a reply is about, so extraction can skip the rest.
+
+Each section of the case has a list of topic keywords. A section is selected
+when its keywords appear in the question the case manager asked (which
+usually names the topic) or in the client's reply (which may volunteer
+more). When nothing matches, or too much does, the caller falls back to
+extracting the whole case.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import cache
+
+from pydantic import BaseModel
+
+from memory_agent.state import CaseData
+
+# Whole words or phrases; a trailing "*" matches any ending ("injur*": injury, injuries, injured).
+SECTION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "incident_details": (
+        "accident*", "incident*", "crash*", "collision*", "collided", "happen*", "rear-end*", "rear end*",
+        "intersection*", "street", "road", "highway", "parking lot", "slip*", "fell", "fall*",
+        "red light", "stop sign", "location", "where were you", "what time",
+    ),
+    "witness_info": ("witness*", "saw it", "saw the", "bystander*", "passenger*", "anyone else", "statement*"),
+    "injury_details": (
+        "injur*", "hurt*", "pain*", "symptom*", "sprain*", "broke", "broken", "fractur*", "bruis*", "concussion*",
+        "whiplash", "swell*", "swollen", "dizz*", "headache*", "numb*", "sever*", "sore*",
+    ),
+    "medical_info": (
+        "doctor*", "dr", "hospital*", "emergency room", "er", "urgent care", "clinic*", "treatment*",
+        "treated", "therap*", "physio*", "chiropract*", "medication*", "prescri*", "physician*", "surg*",
+        "x-ray*", "mri", "scan*", "pre-existing", "preexisting", "medicine*", "pills", "ibuprofen",
+        "painkiller*", "ambulance",
+    ),
+    "insurance_info": (
+        "insur*", "policy", "policies", "claim*", "coverage", "covered", "adjuster*", "premium*",
+        "geico", "state farm", "progressive", "allstate", "blue cross",
+    ),
+    "employment_info": (
+        "employ*", "job*", "work*", "position", "boss", "supervisor*", "company", "occupation",
+        "full-time", "full time", "part-time", "part time", "shift*", "restriction*",
+    ),
+    "damages_info": (
+        "expense*", "cost*", "bill*", "paid", "pay for", "damage*", "repair*", "wage*", "income", "estimate*",
+        "totaled", "out of pocket", "dollars", "$",
+    ),
+    "legal_info": (
+        "attorney*", "lawyer*", "law firm", "signed", "sign anything", "document*", "deadline*", "statute*",
+        "settle*", "offer*", "outcome", "compensat*", "sue", "sued", "lawsuit*", "legal*",
+    ),
+}
+
+QUESTION_WEIGHT = 2
+"""A topic named in the question counts double: it is what the reply answers."""
+
+
+def _keyword(keyword: str) -> str:
+    if not keyword[0].isalnum():
+        return re.escape(keyword)  # a symbol such as "$" has no word boundary
+    if keyword.endswith("*"):
+        return rf"\b{re.escape(keyword[:-1])}\w*"
+    return rf"\b{re.escape(keyword)}\b"
+
+
+def keyword_pattern(keywords: tuple[str, ...]) -> re.Pattern[str]:
+    """Match any of ``keywords`` as a whole word or phrase ("*" as above)."""
+    return re.compile("|".join(_keyword(k) for k in keywords), re.IGNORECASE)
+
+
+_PATTERNS = {section: keyword_pattern(keywords) for section, keywords in SECTION_KEYWORDS.items()}
+
+
+@cache
+def section_models() -> dict[str, type[BaseModel]]:
+    """The sub-model of every nested section of CaseData, by field name."""
+    return {
+        name: info.annotation
+        for name, info in CaseData.model_fields.items()
+        if isinstance(info.annotation, type) and issubclass(info.annotation, BaseModel)
+    }
+
+
+def score_sections(answer: str, question: str = "") -> dict[str, int]:
+    """Keyword hits per section, counting the question's hits ``QUESTION_WEIGHT`` times."""
+    scores = {}
+    for section, pattern in _PATTERNS.items():
+        score = QUESTION_WEIGHT * len(set(pattern.findall(question))) + len(set(pattern.findall(answer)))
+        if score:
+            scores[section] = score
+    return scores
+
+
+def select_sections(answer: str, question: str = "", max_sections: int = 3) -> tuple[str, ...]:
+    """The sections to extract from ``answer``, best match first.
+
+    Returns an empty tuple when the exchange matches no section or more than
+    ``max_sections``: the whole case should be extracted then.
+    """
+    scores = score_sections(answer, question)
+    if not scores or len(scores) > max_sections:
+        return ()
+    return tuple(sorted(scores, key=lambda s: -scores[s]))
@@ -0,0 +1,233 @@
+"""Minimal ASGI entry point that streams case_manager replies as server-sent events.
+
+Run with any ASGI server, e.g. ``uvicorn memory_agent.server:app``. POST a JSON
+body ``{"message": "...", "thread_id": "..."}`` to ``/stream`` and read
+``token`` events until ``done``. ``thread_id`` is required when the graph has a
+checkpointer. ``GET /metrics`` returns the node metrics in
+the Prometheus text format (see ``memory_agent.telemetry``).
+
+The user is never taken from the body: by default it is the
+``X-Authenticated-User-Id`` header, which the authenticating proxy in front of
+the server must set (and strip from client requests). Pass ``authenticate`` to
+resolve it another way. Every other setting is the server's, from the
+environment or ``StreamingApp(configurable=...)``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from langchain_core.messages import AIMessage
+from langgraph.graph.state import CompiledStateGraph
+
+logger = logging.getLogger(__name__)
+
+REPLY_TAG = "case_manager_reply"
+"""Tag on the case_manager LLM call whose tokens are streamed to the client."""
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+REQUEST_FIELDS = ("message", "thread_id")
+"""Fields a client may send; anything else is rejected."""
+
+USER_HEADER = b"x-authenticated-user-id"
+
+
+async def user_from_header(scope: Scope) -> str | None:
+    """The user id the authenticating proxy put in the ``X-Authenticated-User-Id`` header."""
+    for name, value in scope.get("headers", ()):
+        if name.lower() == USER_HEADER:
+            return value.decode() or None
+    return None
+
+
+async def stream_reply(
+    graph: CompiledStateGraph, inputs: dict[str, Any], config: dict[str, Any] | None = None
+) -> AsyncIterator[str]:
+    """Yield the tokens of the case_manager reply as the graph produces them.
+
+    Scripted replies (disclaimer, closing) arrive as a single message.
+    """
+    async for chunk, metadata in graph.astream(inputs, config, stream_mode="messages"):
+        if (
+            isinstance(chunk, AIMessage)
+            and REPLY_TAG in (metadata.get("tags") or ())
+            and isinstance(chunk.content, str)
+            and chunk.content
+        ):
+            yield chunk.content
+
+
+def _event(name: str, data: Any) -> dict[str, Any]:
+    payload = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+    return {"type": "http.response.body", "body": payload, "more_body": True}
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send: Send, status: int, body: dict[str, Any]) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+
+async def _metrics(send: Send) -> None:
+    from memory_agent.app import current
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/plain; version=0.0.4")],
+    })
+    await send({"type": "http.response.body", "body": current().telemetry.render_prometheus().encode()})
+
+
+class StreamingApp:
+    """ASGI app forwarding case_manager tokens to the client over SSE.
+
+    The graph runs in a producer task that feeds a bounded queue; when the
+    client reads slowly the queue fills up and the producer (and so the model
+    stream) is paused until the client catches up. A client disconnect
+    cancels the producer.
+
+    ``authenticate`` resolves the user of a request (None answers 401), and
+    ``configurable`` holds the Configuration values applied to every run.
+    """
+
+    def __init__(
+        self,
+        graph_factory: Callable[[], CompiledStateGraph],
+        max_buffered_tokens: int = 64,
+        *,
+        authenticate: Callable[[Scope], Awaitable[str | None]] = user_from_header,
+        configurable: dict[str, Any] | None = None,
+    ):
+        self.graph_factory = graph_factory
+        self.max_buffered_tokens = max_buffered_tokens
+        self.authenticate = authenticate
+        self.configurable = configurable or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return
+        if scope["path"] == "/metrics" and scope["method"] == "GET":
+            await _metrics(send)
+            return
+        if scope["path"] != "/stream" or scope["method"] != "POST":
+            await _respond(send, 404, {"error": "not found"})
+            return
+        user_id = await self.authenticate(scope)
+        if not user_id:
+            await _respond(send, 401, {"error": "not authenticated"})
+            return
+        try:
+            request = json.loads(await _read_body(receive) or b"{}")
+        except ConnectionError:
+            return
+        except ValueError:
+            request = None
+        if not isinstance(request, dict) or not isinstance(request.get("message"), str):
+            await _respond(send, 400, {"error": "expected a JSON object with a 'message' string"})
+            return
+        unexpected = sorted(set(request) - set(REQUEST_FIELDS))
+        if unexpected:
+            await _respond(send, 400, {"error": f"unexpected fields {unexpected}; expected {list(REQUEST_FIELDS)}"})
+            return
+        if "thread_id" in request and not (isinstance(request["thread_id"], str) and request["thread_id"]):
+            await _respond(send, 400, {"error": "'thread_id' must be a non-empty string"})
+            return
+
+        configurable = {**self.configurable, "user_id": user_id}
+        if "thread_id" in request:
+            configurable["thread_id"] = request["thread_id"]
+        try:
+            graph = self.graph_factory()
+        except Exception:
+            logger.exception("Building the graph failed")
+            await _respond(send, 500, {"error": "internal error"})
+            return
+        if graph.checkpointer is not None and "thread_id" not in configurable:
+            # The checkpointer keys every run by thread; without one the run fails mid-stream.
+            await _respond(send, 400, {"error": "this server keeps conversations: a 'thread_id' is required"})
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+            ],
+        })
+
+        queue: asyncio.Queue[str | Exception | None] = asyncio.Queue(maxsize=self.max_buffered_tokens)
+        producer = asyncio.create_task(self._produce(graph, queue, request["message"], configurable))
+        disconnect = asyncio.create_task(self._wait_for_disconnect(receive))
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({get, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+                if get not in done:
+                    get.cancel()
+                    return
+                item = get.result()
+                if item is None:
+                    await send(_event("done", {}))
+                    break
+                if isinstance(item, Exception):
+                    await send(_event("error", {"error": str(item)}))
+                    break
+                await send(_event("token", {"content": item}))
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            producer.cancel()
+            disconnect.cancel()
+
+    async def _produce(
+        self,
+        graph: CompiledStateGraph,
+        queue: asyncio.Queue[str | Exception | None],
+        message: str,
+        configurable: dict[str, Any],
+    ) -> None:
+        """Feed reply tokens into the queue, ending with None (or the error raised)."""
+        try:
+            async for token in stream_reply(graph, {"messages": [("user", message)]}, {"configurable": configurable}):
+                await queue.put(token)
+        except Exception as error:
+            logger.exception("Streaming the reply failed")
+            await queue.put(error)
+            return
+        await queue.put(None)
+
+    @staticmethod
+    async def _wait_for_disconnect(receive: Receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+
+def _default_graph() -> CompiledStateGraph:
+    from memory_agent.app import current
+    from memory_agent.graph import get_graph
+
+    return get_graph(current().checkpointer)
+
+
+app = StreamingApp(_default_graph)
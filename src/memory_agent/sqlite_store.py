@@ -0,0 +1,303 @@
+"""Embedded document store on SQLite, with the same surface as FireStore.
+
+Documents are JSON rows keyed by (collection, id). Field updates are applied
+in SQL with the JSON1 functions, so a delta write never reads the document
+back into Python. The database runs in WAL mode so readers never block the
+writer, and blocking calls run on a small pool of connections in worker
+threads to keep the event loop free.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from langgraph.store.base import BaseStore
+
+from memory_agent.configuration import (
+    DocumentNotFound,
+    Memory,
+    StoreStats,
+    WriteConflict,
+    _payload_size,
+    _read_size,
+    _set_size,
+    _update_size,
+)
+from memory_agent.diff import DELETED
+from memory_agent.telemetry import store_operation
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    update_time INTEGER NOT NULL,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+"""
+
+
+def _json_path(path: tuple[str, ...]) -> str:
+    """JSON1 path for a field path, e.g. ``$."medical_info"."medications"``."""
+    return "$" + "".join('."{}"'.format(key.replace('"', '\\"')) for key in path)
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared across worker threads."""
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 30.0):
+        self.path = path
+        self._idle: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._idle.put(conn)
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class SQLiteStore(BaseStore):
+    """Document store in a local SQLite database (WAL mode).
+
+    Drop-in replacement for FireStore for single-node deployments and CI: the
+    same ``get``/``set``/``update``/``delete`` and ``batch``/``put``/``commit``
+    methods, the same ``stats`` counters, and an increasing ``update_time``
+    per document so CachedStore can validate its entries.
+    """
+
+    def __init__(self, path: str = "memory_agent.sqlite3", pool_size: int = 4):
+        self.pool = ConnectionPool(path, size=pool_size)
+        self._batch: list[tuple[str, str, dict[str, Any]]] | None = None
+        self._clock_lock = threading.Lock()
+        self._last_time = 0
+        self.stats = StoreStats()
+
+    def _now(self) -> int:
+        """A strictly increasing timestamp in nanoseconds."""
+        with self._clock_lock:
+            self._last_time = max(time.time_ns(), self._last_time + 1)
+            return self._last_time
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        def call() -> T:
+            with self.pool.connection() as conn:
+                return fn(conn)
+
+        return await asyncio.to_thread(call)
+
+    @store_operation("get", size=_read_size)
+    async def get(self, namespace: tuple[str, str], fields: list[str] | None = None) -> list[Memory]:
+        """Get a document, optionally projected to the top-level ``fields``."""
+        if fields is None:
+            sql = "SELECT value, update_time FROM documents WHERE collection = ? AND id = ?"
+            params: tuple = tuple(namespace)
+        else:
+            placeholders = ", ".join("?" for _ in fields) or "NULL"
+            sql = (
+                "SELECT (SELECT json_group_object(key, value) FROM json_each(documents.value)"
+                f" WHERE key IN ({placeholders})), update_time FROM documents WHERE collection = ? AND id = ?"
+            )
+            params = (*fields, *namespace)
+        self.stats.reads += 1
+        row = await self._run(lambda conn: conn.execute(sql, params).fetchone())
+        if row is None:
+            return []
+        value = json.loads(row[0]) if row[0] else {}
+        self.stats.bytes_read += _payload_size(value)
+        return [Memory(key=namespace[0], value=value, tool_name=namespace[0], update_time=row[1])]
+
+    @store_operation("get_update_time")
+    async def get_update_time(self, namespace: tuple[str, str]) -> Any | None:
+        """Get only the document's last update time, or None if it does not exist."""
+        self.stats.reads += 1
+        row = await self._run(lambda conn: conn.execute(
+            "SELECT update_time FROM documents WHERE collection = ? AND id = ?", namespace
+        ).fetchone())
+        return row[0] if row else None
+
+    async def scan(
+        self,
+        collection: str,
+        *,
+        start_at: str | None = None,
+        start_after: str | None = None,
+        end_before: str | None = None,
+        limit: int = 500,
+    ) -> list[tuple[str, Memory]]:
+        """One page of ``collection`` in document id order; see ``FireStore.scan``."""
+        where, params = ["collection = ?"], [collection]
+        for op, bound in ((">=", start_at), (">", start_after), ("<", end_before)):
+            if bound is not None:
+                where.append(f"id {op} ?")
+                params.append(bound)
+        sql = f"SELECT id, value, update_time FROM documents WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        rows = await self._run(lambda conn: conn.execute(sql, (*params, limit)).fetchall())
+        page = [(doc_id, Memory(key=collection, value=json.loads(value), tool_name=collection, update_time=update_time))
+                for doc_id, value, update_time in rows]
+        self.stats.reads += len(page)
+        self.stats.bytes_read += sum(_payload_size(memory.value) for _, memory in page)
+        return page
+
+    def _write(self, conn: sqlite3.Connection, collection: str, doc_id: str, value: dict[str, Any]) -> int:
+        update_time = self._now()
+        conn.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+            (collection, doc_id, json.dumps(value, default=str), update_time),
+        )
+        return update_time
+
+    @store_operation("set", write=True, size=_set_size)
+    async def set(self, namespace: tuple[str, str], memory: Memory, *, create: bool = False) -> Any | None:
+        """Replace the document and return the write's update time.
+
+        With ``create`` the write fails with WriteConflict if the document
+        already exists.
+        """
+        self.stats.writes += 1
+        self.stats.fields_written += len(memory.value)
+        self.stats.bytes_written += _payload_size(memory.value)
+        if not create:
+            return await self._run(lambda conn: self._write(conn, namespace[0], namespace[1], memory.value))
+
+        def insert(conn: sqlite3.Connection) -> int:
+            update_time = self._now()
+            conn.execute(
+                "INSERT INTO documents VALUES (?, ?, ?, ?)",
+                (*namespace, json.dumps(memory.value, default=str), update_time),
+            )
+            return update_time
+
+        try:
+            return await self._run(insert)
+        except sqlite3.IntegrityError as exc:
+            self.stats.conflicts += 1
+            raise WriteConflict(f"{'/'.join(namespace)} already exists") from exc
+
+    @store_operation("update", write=True, size=_update_size)
+    async def update(
+        self,
+        namespace: tuple[str, str],
+        changes: dict[tuple[str, ...], Any],
+        *,
+        last_update_time: Any | None = None,
+    ) -> Any | None:
+        """Write only the changed field paths of an existing document, in SQL.
+
+        ``changes`` maps field paths (as produced by ``diff.diff_documents``)
+        to their new values. An empty diff is skipped without touching the
+        database; a missing document raises DocumentNotFound. With ``last_update_time``
+        the write only succeeds if the document is still at that version, and
+        raises WriteConflict otherwise.
+        """
+        if not changes:
+            self.stats.skipped_writes += 1
+            return None
+        self.stats.writes += 1
+        self.stats.fields_written += len(changes)
+        self.stats.bytes_written += _payload_size({_json_path(p): v for p, v in changes.items() if v is not DELETED})
+
+        def apply(conn: sqlite3.Connection) -> int:
+            where = "WHERE collection = ? AND id = ?"
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(f"SELECT update_time FROM documents {where}", namespace).fetchone()
+                if row is None:
+                    raise DocumentNotFound(f"No document to update: {'/'.join(namespace)}")
+                if last_update_time is not None and row[0] != last_update_time:
+                    self.stats.conflicts += 1
+                    raise WriteConflict(f"{'/'.join(namespace)} changed since {last_update_time}")
+                for path, value in changes.items():
+                    if value is DELETED:
+                        conn.execute(f"UPDATE documents SET value = json_remove(value, ?) {where}", (_json_path(path), *namespace))
+                        continue
+                    # Like Firestore, replace any non-map parent on the way to the field.
+                    for depth in range(1, len(path)):
+                        parent = _json_path(path[:depth])
+                        conn.execute(
+                            f"UPDATE documents SET value = json_set(value, ?, json('{{}}')) {where}"
+                            " AND json_type(value, ?) IS NOT 'object'",
+                            (parent, *namespace, parent),
+                        )
+                    conn.execute(
+                        f"UPDATE documents SET value = json_set(value, ?, json(?)) {where}",
+                        (_json_path(path), json.dumps(value, default=str), *namespace),
+                    )
+                update_time = self._now()
+                conn.execute(f"UPDATE documents SET update_time = ? {where}", (update_time, *namespace))
+                conn.execute("COMMIT")
+                return update_time
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return await self._run(apply)
+
+    @store_operation("delete", write=True)
+    async def delete(self, namespace: tuple[str, str]) -> None:
+        """Delete the document."""
+        self.stats.deletes += 1
+        await self._run(lambda conn: conn.execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?", namespace
+        ))
+
+    async def batch(self) -> None:
+        """Start a new batch operation."""
+        self._batch = []
+
+    async def abatch(self) -> None:
+        """Start a new batch operation."""
+        await self.batch()
+
+    def put(self, namespace: tuple[str, str], key: str, value: dict[str, Any]) -> None:
+        """Put a value into the batch."""
+        if self._batch is None:
+            raise RuntimeError("No batch operation in progress")
+        self.stats.writes += 1
+        self.stats.fields_written += len(value)
+        self.stats.bytes_written += _payload_size(value)
+        self._batch.append((namespace[0], key, value))
+
+    async def commit(self) -> None:
+        """Commit the current batch operation in one transaction."""
+        if self._batch is None:
+            return
+        writes, self._batch = self._batch, None
+        self.stats.commits += 1
+
+        def apply(conn: sqlite3.Connection) -> None:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for collection, doc_id, value in writes:
+                    self._write(conn, collection, doc_id, value)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        await self._run(apply)
+
+    def close(self) -> None:
+        self.pool.close()
@@ -3,11 +3,14 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import date, datetime
+from enum import Enum
+from functools import cache
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, List
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from typing_extensions import Annotated
+import json
 import uuid
 
 class UserData(BaseModel):
@@ -125,15 +128,37 @@ class CaseData(BaseModel):
     damages_info: DamagesInfo = Field(default_factory=DamagesInfo, description="Financial impact of the incident including medical costs, property damage and lost wages")
     legal_info: LegalInfo = Field(default_factory=LegalInfo, description="Legal aspects of the case including prior representation, documents and settlement information")
 
-def get_schema_json():
+@cache
+def _schema_text(model: type[BaseModel]) -> str:
+    """Build and serialize a model's JSON schema once per model class."""
     # Get the full schema with descriptions and examples
-    schema_json = CaseData.model_json_schema()
+    schema_json = model.model_json_schema()
     # Remove unnecessary schema metadata to keep it clean
-    if "title" in schema_json:
-        del schema_json["title"]
-    if "$defs" in schema_json:
-        del schema_json["$defs"]
-    return schema_json
+    schema_json.pop("title", None)
+    schema_json.pop("$defs", None)
+    return json.dumps(schema_json, indent=2)
+
+def get_schema_text(model: type[BaseModel] = CaseData) -> str:
+    """Return the cached, serialized JSON schema of ``model``."""
+    return _schema_text(model)
+
+def get_schema_json(model: type[BaseModel] = CaseData) -> dict:
+    """Return a fresh copy of the cached JSON schema of ``model``."""
+    return json.loads(_schema_text(model))
+
+class Phase(str, Enum):
+    """Steps of an intake interview."""
+
+    CONSENT = "consent"
+    """The disclaimer has not been shown yet."""
+    AWAITING_CONSENT = "awaiting_consent"
+    INTERVIEW = "interview"
+    """Open-ended questioning by the case manager."""
+    CLOSING = "closing"
+    """The client was asked whether there is anything else to add."""
+    FOLLOW_UP = "follow_up"
+    """The client had more to add: the case manager asks again, even about a complete case."""
+    DONE = "done"
 
 @dataclass(kw_only=True)
 class State:
@@ -141,7 +166,17 @@ class State:
 
     messages: Annotated[list[AnyMessage], add_messages] = field(default_factory=list)
     """The messages in the conversation."""
+
+    summary: str = ""
+    """Compacted summary of the turns that fell out of the context window."""
+
+    summarized_count: int = 0
+    """Number of leading messages folded into ``summary``."""
+
+    phase: Phase = Phase.CONSENT
+    """Where the interview stands; only the INTERVIEW phase calls the model."""
     
 __all__ = [
+    "Phase",
     "State"
 ]
@@ -0,0 +1,272 @@
+"""Per-node metrics and tracing: latency, model tokens, store traffic and cache hits.
+
+Turned on with ``Configuration.telemetry`` (TELEMETRY). Each instrumented
+graph node then runs in an OpenTelemetry span (when opentelemetry-api is
+installed) and records into ``current().telemetry``:
+
+- its wall time, as a latency histogram per node;
+- the prompt and completion tokens of the model calls made while it runs;
+- its store reads and writes, with their latency and the bytes transferred;
+- the cache hits and misses of its reads;
+- under ``tracemalloc``, the peak memory it allocated.
+
+``Telemetry.render_prometheus`` renders the totals in the Prometheus text
+format; the streaming server serves them at ``GET /metrics``.
+
+When telemetry is off a node pays one dictionary lookup and a store
+operation one context variable read.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import os
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from typing import Any, TypeVar
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Upper bounds (seconds) of the latency histogram buckets."""
+
+
+def enabled(config: dict[str, Any] | None) -> bool:
+    """``Configuration.telemetry`` for ``config``, read without building a whole Configuration."""
+    configurable = config.get("configurable", {}) if config else {}
+    value = os.environ.get("TELEMETRY", configurable.get("telemetry"))
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass
+class Histogram:
+    """Fixed-bucket histogram, cumulative like Prometheus' when rendered."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.counts = self.counts or [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (inf past the last bucket)."""
+        rank, seen = q * self.count, 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return 0.0
+
+
+@dataclass
+class NodeMetrics:
+    """Counters of one node, for a single run or summed over all of them."""
+
+    runs: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    store_reads: int = 0
+    store_writes: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    allocated_bytes: int = 0
+    """Peak memory allocated during the run; only measured while tracemalloc is tracing."""
+
+
+class _NodeRun(AsyncCallbackHandler):
+    """One run of an instrumented node, active in its context while it runs.
+
+    Registered as a LangChain configure hook, so every model call made in the
+    node reports its token usage here.
+    """
+
+    run_inline = True
+
+    def __init__(self, telemetry: Telemetry, node: str):
+        self.telemetry = telemetry
+        self.node = node
+        self.metrics = NodeMetrics(runs=1)
+        self.totals = telemetry.nodes.setdefault(node, NodeMetrics())
+        self.totals.runs += 1
+
+    def add(self, name: str, value: int = 1) -> None:
+        # Totals are updated as the work happens, so background work started
+        # by the node (pipeline extraction) is counted after the node returns.
+        setattr(self.metrics, name, getattr(self.metrics, name) + value)
+        setattr(self.totals, name, getattr(self.totals, name) + value)
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        prompt = completion = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt += usage.get("input_tokens", 0)
+                    completion += usage.get("output_tokens", 0)
+        if not prompt and not completion:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        self.add("prompt_tokens", prompt)
+        self.add("completion_tokens", completion)
+
+
+_run: ContextVar[_NodeRun | None] = ContextVar("memory_agent_node_run", default=None)
+register_configure_hook(_run, inheritable=True)
+
+
+class Telemetry:
+    """In-process metrics of the instrumented nodes and store operations."""
+
+    def __init__(self, tracer: Any | None = None):
+        self.nodes: dict[str, NodeMetrics] = {}
+        self.node_latency: dict[str, Histogram] = {}
+        self.store_latency: dict[str, Histogram] = {}
+        self._tracer = tracer
+
+    @property
+    def tracer(self) -> Any | None:
+        """The OpenTelemetry tracer, or None without opentelemetry-api."""
+        if self._tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                self._tracer = False
+            else:
+                self._tracer = trace.get_tracer("memory_agent")
+        return self._tracer or None
+
+    def _span(self, name: str, attributes: dict[str, Any]) -> contextlib.AbstractContextManager[Any]:
+        tracer = self.tracer
+        if tracer is None:
+            return contextlib.nullcontext()
+        return tracer.start_as_current_span(name, attributes=attributes)
+
+    @contextlib.asynccontextmanager
+    async def node(self, name: str) -> AsyncIterator[NodeMetrics]:
+        """Measure one run of the node ``name``; yields the run's counters."""
+        run = _NodeRun(self, name)
+        token = _run.set(run)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            with self._span(f"node.{name}", {"langgraph.node": name}) as span:
+                yield run.metrics
+                if tracing:
+                    run.add("allocated_bytes", max(tracemalloc.get_traced_memory()[1] - allocated, 0))
+                if span is not None:
+                    span.set_attributes({
+                        f"memory_agent.{f.name}": getattr(run.metrics, f.name)
+                        for f in fields(NodeMetrics) if f.name != "runs"
+                    })
+        finally:
+            _run.reset(token)
+            self.node_latency.setdefault(name, Histogram()).observe(time.perf_counter() - start)
+
+    def render_prometheus(self) -> str:
+        """The totals in the Prometheus text exposition format."""
+        lines: list[str] = []
+        _histograms(lines, "memory_agent_node_seconds", "Wall time of a graph node run.", "node", self.node_latency)
+        _histograms(
+            lines, "memory_agent_store_operation_seconds", "Latency of a store operation.", "operation", self.store_latency
+        )
+        counters = [
+            ("memory_agent_llm_tokens_total", "Model tokens used by a node.", "kind",
+             {"prompt": "prompt_tokens", "completion": "completion_tokens"}),
+            ("memory_agent_store_operations_total", "Store reads and writes of a node.", "kind",
+             {"read": "store_reads", "write": "store_writes"}),
+            ("memory_agent_store_bytes_total", "Document bytes a node read and wrote.", "direction",
+             {"read": "bytes_read", "written": "bytes_written"}),
+            ("memory_agent_cache_lookups_total", "Store cache lookups of a node.", "result",
+             {"hit": "cache_hits", "miss": "cache_misses"}),
+        ]
+        for metric, help_text, label, series in counters:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for node, metrics in sorted(self.nodes.items()):
+                for value, attribute in series.items():
+                    lines.append(f'{metric}{{node="{node}",{label}="{value}"}} {getattr(metrics, attribute)}')
+        return "\n".join(lines) + "\n"
+
+
+def _histograms(lines: list[str], metric: str, help_text: str, label: str, histograms: dict[str, Histogram]) -> None:
+    lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+    for name, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum}')
+        lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+
+
+def instrument(name: str, node: F) -> F:
+    """Wrap the graph node (or routing function) ``node`` to be measured as ``name``."""
+
+    @functools.wraps(node)
+    async def instrumented(state: Any, config: Any) -> Any:
+        if not enabled(config):
+            return await node(state, config)
+        from memory_agent.app import current
+
+        async with current().telemetry.node(name):
+            return await node(state, config)
+
+    return instrumented  # type: ignore[return-value]
+
+
+def store_operation(op: str, *, write: bool = False, size: Callable[..., int] | None = None) -> Callable[[F], F]:
+    """Measure a store method inside an instrumented node.
+
+    ``size(result, namespace, *args, **kwargs)`` gives the bytes the call
+    transferred; they count as written for a ``write`` operation, else as read.
+    """
+
+    def decorate(method: F) -> F:
+        @functools.wraps(method)
+        async def measured(self: Any, namespace: tuple[str, str], *args: Any, **kwargs: Any) -> Any:
+            run = _run.get()
+            if run is None:
+                return await method(self, namespace, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                with run.telemetry._span(f"store.{op}", {"db.operation": op, "db.collection": namespace[0]}):
+                    result = await method(self, namespace, *args, **kwargs)
+            finally:
+                run.telemetry.store_latency.setdefault(op, Histogram()).observe(time.perf_counter() - start)
+            run.add("store_writes" if write else "store_reads")
+            if size is not None:
+                run.add("bytes_written" if write else "bytes_read", size(result, namespace, *args, **kwargs))
+            return result
+
+        return measured  # type: ignore[return-value]
+
+    return decorate
+
+
+def cache_lookup(hit: bool) -> None:
+    """Count a store cache hit or miss against the running node."""
+    run = _run.get()
+    if run is not None:
+        run.add("cache_hits" if hit else "cache_misses")
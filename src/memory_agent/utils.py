@@ -1,5 +1,10 @@
 """Utility functions used in our graph."""
 
+from functools import lru_cache
+from string import Formatter
+
+from memory_agent.completeness import CompletenessIndex
+
 
 def split_model_and_provider(fully_specified_name: str) -> dict:
     """Initialize the configured chat model."""
@@ -9,3 +14,52 @@ def split_model_and_provider(fully_specified_name: str) -> dict:
         provider = None
         model = fully_specified_name
     return {"model": model, "provider": provider}
+
+
+@lru_cache(maxsize=32)
+def render_static_prompt(template: str) -> str:
+    """Render the per-turn invariant part of a prompt (the instructions) once.
+
+    The schema is not part of it: the per-turn context carries the fields
+    that are still missing.
+    """
+    return template.format()
+
+
+@lru_cache(maxsize=32)
+def prompt_fields(template: str) -> frozenset[str]:
+    """Names of the ``{placeholders}`` in ``template``."""
+    return frozenset(name for _, name, _, _ in Formatter().parse(template) if name)
+
+
+def build_case_manager_prompt(
+    template: str, context_template: str, index: CompletenessIndex, time: str, disclaimer: str = ""
+) -> str:
+    """Assemble the case manager system prompt.
+
+    The static prefix is rendered once per template and reused byte-for-byte.
+    The per-turn context after it carries only the unfilled slice of the
+    schema and a compact rendering of the collected data.
+
+    A custom template written for the earlier single-prompt layout, with
+    ``{schema}``, ``{case_memory}``, ``{disclaimer}`` or ``{time}`` in it, is
+    still accepted: it is rendered every turn, with ``{schema}`` filled from
+    the missing slice. Such a prompt has no cacheable prefix.
+    """
+    context = context_template.format(
+        completion=index.completion,
+        missing_fields=index.render_missing(),
+        case_memory=index.render_collected(),
+        time=time,
+    )
+    fields = prompt_fields(template)
+    if not fields:
+        return render_static_prompt(template) + context
+    prompt = template.format(
+        schema=index.render_missing(),
+        case_memory=index.render_collected(),
+        disclaimer=disclaimer,
+        time=time,
+    )
+    # The context would repeat the case data the template already placed.
+    return prompt if fields & {"schema", "case_memory"} else prompt + context
@@ -0,0 +1,182 @@
+"""Single writer per document: coalesced, conditional updates of stored data.
+
+Two tabs, or a retried request, can run update_case for the same user at the
+same time. Each update goes through the document's queue instead of writing
+directly: updates that arrive while a write is in flight are merged into one
+follow-up write, and every write carries the version it was computed against
+(``last_update_time``, or ``create`` for a new document). A write that loses
+to another process is rebased onto the latest document with a three-way
+merge and retried, so neither side's fields are lost.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from memory_agent.configuration import Memory, WriteConflict, _store_errors
+from memory_agent.diff import FieldPath, apply_diff, merge_changes, rebase_changes
+
+logger = logging.getLogger(__name__)
+
+Namespace = tuple[str, str]
+
+
+@dataclass
+class WriteResult:
+    """The committed version of a document after a (possibly coalesced) write."""
+
+    value: dict[str, Any]
+    changes: dict[FieldPath, Any]
+    """Changes written against ``base_update_time``: every coalesced update, rebased."""
+    base_update_time: Any | None
+    update_time: Any | None
+
+
+@dataclass
+class WriterStats:
+    """Counters reported by the writer."""
+
+    submitted: int = 0
+    writes: int = 0
+    coalesced: int = 0
+    conflicts: int = 0
+    rebased: int = 0
+
+
+@dataclass
+class _Queue:
+    store: Any
+    doc_id: str
+    # The newest version this writer knows of: None for a missing document.
+    value: dict[str, Any] | None
+    update_time: Any | None
+    known: bool = True
+    changes: dict[FieldPath, Any] = field(default_factory=dict)
+    waiters: list[asyncio.Future[WriteResult]] = field(default_factory=list)
+
+
+class DocumentWriter:
+    """Route the writes to each document through one queue at a time.
+
+    ``submit`` returns once the update is committed, together with whatever
+    was merged into the same write. After ``max_retries`` lost races the
+    waiting callers get the WriteConflict.
+    """
+
+    def __init__(self, max_retries: int = 3):
+        self.max_retries = max_retries
+        self.stats = WriterStats()
+        self._queues: dict[Namespace, _Queue] = {}
+        # The event loop only keeps weak references to tasks.
+        self._drains: set[asyncio.Task[None]] = set()
+
+    async def submit(
+        self,
+        store: Any,
+        namespace: Namespace,
+        changes: dict[FieldPath, Any],
+        base: Memory | None,
+        doc_id: str | None = None,
+    ) -> WriteResult:
+        """Write ``changes``, computed against ``base`` (None if the document did not exist)."""
+        self.stats.submitted += 1
+        queue = self._queues.get(namespace)
+        if queue is None:
+            queue = self._queues[namespace] = _Queue(
+                store=store,
+                doc_id=doc_id or namespace[1],
+                value=base.value if base else None,
+                update_time=base.update_time if base else None,
+            )
+            task = asyncio.get_running_loop().create_task(self._drain(namespace, queue))
+            self._drains.add(task)
+            task.add_done_callback(self._drains.discard)
+        else:
+            self.stats.coalesced += 1
+            if (base.update_time if base else None) != queue.update_time:
+                # Computed against another version than the queue's: rebase first.
+                changes = rebase_changes(changes, base.value if base else {}, queue.value or {})
+        queue.changes = merge_changes(queue.changes, changes)
+        waiter: asyncio.Future[WriteResult] = asyncio.get_running_loop().create_future()
+        queue.waiters.append(waiter)
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The write goes on without the caller: report a failure here instead.
+            waiter.add_done_callback(lambda w: _log_abandoned(namespace, w))
+            raise
+
+    def pending(self, namespace: Namespace) -> bool:
+        return namespace in self._queues
+
+    async def _drain(self, namespace: Namespace, queue: _Queue) -> None:
+        try:
+            while queue.waiters:
+                changes, queue.changes = queue.changes, {}
+                waiters, queue.waiters = queue.waiters, []
+                try:
+                    result = await self._write(namespace, queue, changes)
+                except _store_errors() as exc:
+                    for waiter in waiters:
+                        waiter.set_exception(exc)
+                    # Later updates start over from the stored document.
+                    queue.known = False
+                    continue
+                except Exception as exc:
+                    # Not a store failure but a bug: fail every caller with it and stop the queue.
+                    for waiter in [*waiters, *queue.waiters]:
+                        waiter.set_exception(exc)
+                    raise
+                for waiter in waiters:
+                    waiter.set_result(result)
+        finally:
+            del self._queues[namespace]
+
+    @staticmethod
+    async def _read(store: Any, namespace: Namespace) -> tuple[dict[str, Any] | None, Any | None]:
+        memories = await store.get(namespace)
+        return (memories[0].value, memories[0].update_time) if memories else (None, None)
+
+    async def _write(self, namespace: Namespace, queue: _Queue, changes: dict[FieldPath, Any]) -> WriteResult:
+        if not queue.known:
+            latest, latest_time = await self._read(queue.store, namespace)
+            changes = rebase_changes(changes, queue.value or {}, latest or {})
+            queue.value, queue.update_time, queue.known = latest, latest_time, True
+        attempt = 0
+        while True:
+            value = apply_diff(queue.value or {}, changes)
+            try:
+                if queue.value is None:
+                    memory = Memory(key=queue.doc_id, value=value, tool_name=namespace[0])
+                    update_time = await queue.store.set(namespace, memory, create=True)
+                else:
+                    update_time = await queue.store.update(namespace, changes, last_update_time=queue.update_time)
+            except WriteConflict:
+                self.stats.conflicts += 1
+                if attempt == self.max_retries:
+                    raise
+                attempt += 1
+                latest, latest_time = await self._read(queue.store, namespace)
+                changes = rebase_changes(changes, queue.value or {}, latest or {})
+                queue.value, queue.update_time = latest, latest_time
+                self.stats.rebased += 1
+                logger.debug("%s: rebased onto a concurrent write (retry %d)", "/".join(namespace), attempt)
+                continue
+            if update_time is None:
+                # An empty diff: nothing was written.
+                return WriteResult(value, changes, queue.update_time, queue.update_time)
+            self.stats.writes += 1
+            result = WriteResult(value, changes, queue.update_time, update_time)
+            queue.value, queue.update_time = value, update_time
+            return result
+
+
+def _log_abandoned(namespace: Namespace, waiter: asyncio.Future[WriteResult]) -> None:
+    if not waiter.cancelled() and waiter.exception() is not None:
+        logger.error("Write to %s failed after its caller was cancelled: %r", "/".join(namespace), waiter.exception())
+
+
+writes = DocumentWriter()
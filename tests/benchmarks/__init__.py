@@ -0,0 +1 @@
+"""Micro- and end-to-end benchmarks for the intake agent."""
@@ -0,0 +1,175 @@
+"""Canned intake transcripts and the scripted model and extractor that replay them offline.
+
+A transcript is the client's side of an interview plus, per turn, the case
+manager's next question and the data the answer holds. ``replay`` runs it
+through the compiled graph against an in-memory Firestore, so every run makes
+the same model calls and the same store operations. The model replies with
+plain text, as the deployed case manager does: data is only extracted in
+pipeline mode.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+
+from memory_agent.app import AppContext, use_context
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from memory_agent.context import count_tokens
+from memory_agent.telemetry import Telemetry
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+CLOSING = "Thank you. Is there anything else you would like to add?"
+
+
+@dataclass
+class Turn:
+    user: str
+    reply: str = ""
+    """The case manager's next question; empty when a scripted step answers."""
+    case: dict[str, dict[str, Any]] = field(default_factory=dict)
+    """CaseData sections the answer fills."""
+    client: dict[str, Any] = field(default_factory=dict)
+    """UserData fields the answer fills."""
+
+
+TRANSCRIPTS: dict[str, list[Turn]] = {
+    "rear_end": [
+        Turn("hi"),
+        Turn("yes", "Thanks. Could you start by telling me your full name?"),
+        Turn("Jane Doe", "What happened?", client={"first_name": "Jane", "last_name": "Doe"}),
+        Turn("I was rear-ended at a red light on Main Street", "When did the accident happen?",
+             case={"incident_details": {"incident_type": "car accident", "incident_location": "Main Street"}}),
+        Turn("Last Tuesday around 5pm", "Were you injured?",
+             case={"incident_details": {"incident_time": "afternoon"}}),
+        Turn("Whiplash and a sprained wrist", "Did you get medical treatment?",
+             case={"injury_details": {"injury_type": "whiplash, sprained wrist"}}),
+        Turn("An ambulance took me to Memorial Hospital", "Who is your insurance company?",
+             case={"medical_info": {"treatment_facilities": ["Memorial Hospital"]}}),
+        Turn("State Farm, policy SF-2231-889", CLOSING,
+             case={"insurance_info": {"insurance_company": "State Farm", "policy_number": "SF-2231-889"}}),
+        Turn("No, that's all"),
+    ],
+    "slip_and_fall": [
+        Turn("hello"),
+        Turn("what is this?"),
+        Turn("ok, let's start", "What is your name?"),
+        Turn("Sam Ortiz", "What is the best phone number to reach you?", client={"first_name": "Sam", "last_name": "Ortiz"}),
+        Turn("(555) 123-4567", "Can you describe what happened?", client={"phone": "(555) 123-4567"}),
+        Turn("I slipped on a wet floor at the grocery store on Elm", "Were there any witnesses?",
+             case={"incident_details": {"incident_type": "slip and fall", "incident_location": "grocery store on Elm"}}),
+        Turn("Yes, a bystander named Tom Reed saw the whole thing", "How can we reach Tom?",
+             case={"witness_info": {"name": "Tom Reed"}}),
+        Turn("His number is 555-987-6543", "What injuries did you suffer?",
+             case={"witness_info": {"contact_info": "555-987-6543"}}),
+        Turn("I broke my arm and they put a cast on it at the ER", "Are you taking any medications?",
+             case={"injury_details": {"injury_type": "broken arm"}, "medical_info": {"treatment_facilities": ["ER"]}}),
+        Turn("Ibuprofen and a muscle relaxer", "Where do you work?",
+             case={"medical_info": {"medications": ["Ibuprofen", "muscle relaxer"]}}),
+        Turn("Acme Logistics, I'm a forklift operator", "Have you missed any work?",
+             case={"employment_info": {"employer_name": "Acme Logistics"}}),
+        Turn("Two weeks so far", "How much are your medical bills?",
+             case={"employment_info": {"time_missed": "two weeks"}}),
+        Turn("About $12,500 so far", "Have you spoken to any other attorneys?",
+             case={"damages_info": {"medical_expenses": 12500.0}}),
+        Turn("No, this is the first lawyer I've called", CLOSING, case={"legal_info": {"other_attorneys": "none"}}),
+        Turn("nothing else"),
+    ],
+}
+
+
+class IntakeChatModel(BaseChatModel):
+    """Replies with the current turn's question, reporting the prompt size as token usage.
+
+    ``replay`` advances ``turn``. An extraction call passes its output as
+    ``reply``; a summary call gets the turn's question, which is as good a
+    summary as any for measuring.
+    """
+
+    turns: list[Turn]
+    turn: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "intake-fake"
+
+    def current(self) -> Turn:
+        return self.turns[self.turn]
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None,
+                  reply: AIMessage | None = None, **kwargs: Any) -> ChatResult:
+        message = reply or AIMessage(content=self.current().reply)
+        message = message.model_copy(update={"usage_metadata": {
+            "input_tokens": count_tokens(messages),
+            "output_tokens": count_tokens([message]),
+            "total_tokens": count_tokens(messages) + count_tokens([message]),
+        }})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ScriptedExtractor:
+    """Stands in for trustcall: merges the turn's scripted data into each existing document.
+
+    The prompt and the result still go through the model, so extraction
+    shows up in the token counts.
+    """
+
+    def __init__(self, llm: IntakeChatModel, tools: list[type]):
+        self.llm = llm
+        self.tools = {tool.__name__: tool for tool in tools}
+
+    async def ainvoke(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        turn = self.llm.current()
+        existing = inputs.get("existing") or [(str(uuid.uuid4()), name, {}) for name in self.tools]
+        responses, metadata = [], []
+        for doc_id, tool_name, value in existing:
+            updates = turn.client if tool_name == "UserData" else turn.case
+            if tool_name not in ("UserData", "CaseData"):
+                updates = turn.case.get(doc_id, {})  # a single CaseData section
+            merged = _merge(value if isinstance(value, dict) else {}, updates)
+            responses.append(self.tools[tool_name].model_construct(**merged))
+            metadata.append({"json_doc_id": doc_id})
+        prompt = [*inputs["messages"], SystemMessage(content=json.dumps([e[2] for e in existing], default=str))]
+        output = AIMessage(content=json.dumps([r.__dict__ for r in responses], default=str))
+        await self.llm.ainvoke(prompt, reply=output)
+        return {"responses": responses, "response_metadata": metadata}
+
+
+def _merge(base: dict[str, Any], updates: dict[str, Any]) -> dict[str, Any]:
+    merged = dict(base)
+    for key, value in updates.items():
+        merged[key] = _merge(merged[key], value) if isinstance(value, dict) and isinstance(merged.get(key), dict) else value
+    return merged
+
+
+async def replay(
+    monkeypatch: pytest.MonkeyPatch, name: str, user_id: str, telemetry: Telemetry, *, pipeline_mode: bool = False
+) -> list[str]:
+    """Run transcript ``name`` through the graph, recording into ``telemetry``; returns the replies."""
+    turns = TRANSCRIPTS[name]
+    llm = IntakeChatModel(turns=turns)
+    monkeypatch.setattr(graph_module, "chat_model", lambda model: llm)
+    monkeypatch.setattr(graph_module, "get_extractor", lambda model, tools, **kwargs: ScriptedExtractor(llm, tools))
+    app = graph_module.builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"user_id": user_id, "thread_id": user_id, "telemetry": True,
+                               "interview_phases": True, "pipeline_mode": pipeline_mode}}
+    replies = []
+    with use_context(AppContext(store=CachedStore(FireStore(FakeAsyncClient())), telemetry=telemetry)):
+        for i, turn in enumerate(turns):
+            llm.turn = i
+            state = await app.ainvoke({"messages": [("user", turn.user)]}, config)
+            # The scripted extractor answers for the current turn: finish before moving on
+            await graph_module.extractions.wait(user_id)
+            replies.append(next(m.content for m in reversed(state["messages"]) if isinstance(m, AIMessage)))
+    return replies
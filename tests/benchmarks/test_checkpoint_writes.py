@@ -0,0 +1,33 @@
+"""Checkpoint writes per turn: full message history per step vs. the incremental message log."""
+import pytest
+from langchain_core.messages import HumanMessage
+
+from memory_agent.checkpointer import FirestoreSaver
+from tests.unit_tests.fakes import FakeAsyncClient
+from tests.unit_tests.test_checkpoint import CONFIG, _graph
+
+TURNS = 60
+
+
+@pytest.mark.asyncio
+async def test_write_volume_per_turn() -> None:
+    client = FakeAsyncClient()
+    saver = FirestoreSaver(client)
+    graph = _graph(saver)
+    writes, written, full = [], [], []
+    for turn in range(TURNS):
+        start_writes, start_bytes = client.writes, client.bytes_written
+        await graph.ainvoke({"messages": [HumanMessage(f"Here is a fairly detailed answer number {turn}. " * 8)]}, CONFIG)
+        writes.append(client.writes - start_writes)
+        written.append(client.bytes_written - start_bytes)
+        # What a saver storing the whole channel value writes for ``messages``, twice per turn.
+        messages = (await graph.aget_state(CONFIG)).values["messages"]
+        full.append(2 * len(repr(saver.serde.dumps_typed(messages))))
+
+    print("\nturn  full-history bytes  incremental bytes  incremental writes")
+    for turn in range(0, TURNS, 10):
+        print(f"{turn:4d}  {full[turn]:18d}  {written[turn]:17d}  {writes[turn]:18d}")
+    # Constant per turn, except for a new message chunk document now and then.
+    assert max(writes[1:]) - min(writes[1:]) <= 1
+    assert max(written[1:]) < 1.2 * min(written[1:])
+    assert written[-1] < full[-1] / 10
@@ -0,0 +1,32 @@
+"""Prompt tokens per turn with the full history vs. a bounded context window."""
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from memory_agent.context import (
+    bounded_messages,
+    conversation,
+    count_tokens,
+    window_start,
+)
+
+TURNS = 40
+MAX_TURNS = 6
+SUMMARY = "Client described a rear-end collision, injuries and treatment so far. " * 3
+
+
+def test_prompt_tokens_per_turn() -> None:
+    system = SystemMessage(content="case manager instructions")
+    messages: list = []
+    before, after = [], []
+    for turn in range(TURNS):
+        messages.append(HumanMessage(content=f"Here is a fairly detailed answer number {turn}. " * 8))
+        start = window_start(messages, MAX_TURNS)
+        before.append(count_tokens([system, *conversation(messages)]))
+        after.append(count_tokens([system, *bounded_messages(messages, SUMMARY if start else "", start)]))
+        messages.append(AIMessage(content=f"Thank you. Follow-up question number {turn}?"))
+
+    print("\nturn  full-history  bounded")
+    for turn in range(0, TURNS, 5):
+        print(f"{turn:4d}  {before[turn]:12d}  {after[turn]:7d}")
+    assert after[-1] < before[-1] / 4
+    # The bounded prompt stops growing once the window is full.
+    assert max(after[MAX_TURNS + 1:]) - min(after[MAX_TURNS + 1:]) < 50
@@ -0,0 +1,99 @@
+"""Share of intake turns answered by the deterministic fast path, and the latency it saves."""
+import asyncio
+import importlib
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from memory_agent.app import AppContext, use_context
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from memory_agent.state import CaseData, UserData
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph = importlib.import_module("memory_agent.graph")
+
+EXTRACTION_LATENCY = 0.05  # simulated trustcall round-trip
+
+# (question asked by the case manager, client reply)
+CORPUS = [
+    ("Before we begin, please read the disclaimer above. Shall we continue?", "yes"),
+    ("What is your full name?", "Jane Doe"),
+    ("What is your date of birth?", "04/15/1990"),
+    ("What is the best phone number to reach you?", "(555) 123-4567"),
+    ("And your email address?", "jane.doe@example.com"),
+    ("What is your home address?", "12 Elm St, Springfield"),
+    ("Can you describe what happened?", "A truck ran a red light and hit my car on the driver side."),
+    ("When did the accident happen?", "Last Tuesday around 5pm"),
+    ("Did anyone witness the accident?", "yes, a pedestrian named Tom Reyes"),
+    ("How can we reach the witness?", "555-987-6543"),
+    ("What injuries did you suffer?", "Whiplash and a fractured wrist"),
+    ("Where were you treated?", "Mercy Hospital ER, then my primary care doctor"),
+    ("What is your insurance company?", "State Farm"),
+    ("What is your policy number?", "SF-4481923"),
+    ("Have you notified your insurer?", "yes, last week"),
+    ("Do you have a claim number yet?", "it's CLM-20240117"),
+    ("Let me know when you're ready to talk about damages.", "ok, go ahead"),
+    ("How much are your medical expenses so far?", "$12,500"),
+    ("What was the property damage to your car?", "about 8k dollars"),
+    ("How much in lost wages?", "$3,200"),
+    ("Who is your employer?", "Acme Logistics"),
+    ("What is your employer's phone number?", "555-222-3333"),
+    ("Have you spoken to any other attorneys?", "no"),
+    ("Is there anything else you'd like to add?", "continue"),
+]
+
+
+class _SlowExtractor:
+    async def ainvoke(self, inputs: dict) -> dict:
+        await asyncio.sleep(EXTRACTION_LATENCY)
+        return {"responses": [], "response_metadata": []}
+
+
+async def _run(monkeypatch: pytest.MonkeyPatch, fast_path: bool) -> tuple[float, int, int]:
+    calls = 0
+
+    def extractor(*args, **kwargs) -> _SlowExtractor:
+        nonlocal calls
+        calls += 1
+        return _SlowExtractor()
+
+    monkeypatch.setattr(graph, "get_extractor", extractor)
+    config = {"configurable": {"user_id": "bench", "fast_path": fast_path}}
+    start = time.perf_counter()
+    with use_context(AppContext(store=CachedStore(FireStore(FakeAsyncClient())))):
+        skipped_turns = await _replay(config)
+    return time.perf_counter() - start, calls, skipped_turns
+
+
+async def _replay(config: dict) -> int:
+    """Replay the corpus; returns the number of turns that needed no trustcall at all."""
+    skipped_turns = 0
+    for question, answer in CORPUS:
+        state = graph.State(messages=[AIMessage(content=question), HumanMessage(content=answer), AIMessage(content="ok")])
+        fast = graph._fast_path(state, graph.configuration.Configuration.from_runnable_config(config))
+        await graph._apply_fast_path("bench", fast, {"Case": CaseData, "User": UserData})
+        messages = graph._extraction_messages(state, graph.configuration.Configuration())
+        await asyncio.gather(*(
+            graph._extract(None, (name, "bench"), schema, messages)
+            for name, schema in (("Case", CaseData), ("User", UserData))
+            if name not in fast.skip_llm
+        ))
+        skipped_turns += fast.skip_llm == {"Case", "User"}
+    return skipped_turns
+
+
+@pytest.mark.asyncio
+async def test_fast_path_skip_rate(monkeypatch: pytest.MonkeyPatch) -> None:
+    baseline, baseline_calls, _ = await _run(monkeypatch, fast_path=False)
+    fast, fast_calls, skipped_turns = await _run(monkeypatch, fast_path=True)
+    skipped = 1 - fast_calls / baseline_calls
+
+    print(f"\nturns: {len(CORPUS)}  trustcall calls: {baseline_calls} -> {fast_calls}  skipped: {skipped:.0%}")
+    print(f"turns without any trustcall: {skipped_turns}")
+    print(f"extraction wall time: {baseline * 1000:.0f} ms -> {fast * 1000:.0f} ms")
+    # A reply with nothing beyond structured values skips the LLM for both collections.
+    assert skipped_turns / len(CORPUS) > 0.4
+    assert skipped > 0.4
+    assert fast < baseline
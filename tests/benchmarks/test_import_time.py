@@ -0,0 +1,31 @@
+"""Cold import cost of memory_agent, measured in a fresh interpreter without credentials."""
+import json
+import os
+import subprocess
+import sys
+
+# Loaded on first use of the store or a model, never by importing the package.
+DEFERRED = ["firebase_admin", "google.cloud.firestore_v1", "langchain_openai", "langchain_anthropic", "httpx"]
+
+SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import memory_agent
+package = time.perf_counter() - start
+start = time.perf_counter()
+import memory_agent.graph
+graph_module = time.perf_counter() - start
+loaded = [m for m in {DEFERRED!r} if m in sys.modules]
+print(json.dumps({{"package": package, "graph_module": graph_module, "loaded": loaded}}))
+"""
+
+
+def test_import_is_fast_and_side_effect_free() -> None:
+    env = {k: v for k, v in os.environ.items() if k not in ("FIREBASE_CREDENTIALS", "OPENAI_API_KEY")}
+    result = subprocess.run([sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print(f"\nimport memory_agent: {timings['package'] * 1000:.1f} ms")
+    print(f"import memory_agent.graph: {timings['graph_module'] * 1000:.1f} ms")
+    assert timings["loaded"] == []
+    assert timings["package"] < 0.05
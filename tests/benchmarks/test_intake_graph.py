@@ -0,0 +1,120 @@
+"""Per-node cost of replaying canned intakes through the graph, checked against saved baselines.
+
+Each transcript in ``intake.TRANSCRIPTS`` is replayed with a scripted model
+and an in-memory Firestore, with telemetry on, once as deployed by default
+and once in pipeline mode (``name/pipeline``), which extracts the answers. Per node we record wall time,
+prompt and completion tokens, store reads and writes, bytes and peak
+allocations, and compare them with ``baselines/intake_graph.json``: a node
+that got more expensive than its baseline (beyond the tolerance of the
+metric) fails the run.
+
+After an intended change, refresh the baselines with
+``UPDATE_BASELINES=1 python -m pytest tests/benchmarks/test_intake_graph.py``
+(or ``make benchmark_baselines``) and commit the JSON.
+"""
+import dataclasses
+import gc
+import json
+import os
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from memory_agent import prompts
+from memory_agent.telemetry import Telemetry
+from tests.benchmarks.intake import CLOSING, TRANSCRIPTS, replay
+
+BASELINES = Path(__file__).parent / "baselines" / "intake_graph.json"
+
+TOLERANCES = {
+    # metric: (factor, slack) -- fail above baseline * factor + slack
+    "wall_ms": (3.0, 5.0),
+    "allocated_bytes": (1.5, 64 * 1024),
+    "prompt_tokens": (1.02, 0),
+    "completion_tokens": (1.02, 0),
+    "bytes_read": (1.02, 0),
+    "bytes_written": (1.02, 0),
+}
+EXACT = (1.0, 0)
+HIGHER_IS_BETTER = {"cache_hits"}
+
+pytestmark = pytest.mark.filterwarnings("ignore:Pydantic serializer warnings")
+
+
+def _telemetry() -> Telemetry:
+    return Telemetry(tracer=False)  # no spans: keep OpenTelemetry out of the numbers
+
+
+async def _measure(monkeypatch: pytest.MonkeyPatch, name: str, pipeline_mode: bool) -> dict[str, dict[str, float]]:
+    await replay(monkeypatch, name, f"{name}-warmup", _telemetry(), pipeline_mode=pipeline_mode)
+
+    timed = _telemetry()
+    gc.collect()
+    gc.disable()  # a full collection landing in one node would dwarf its wall time
+    try:
+        replies = await replay(monkeypatch, name, f"{name}-timed", timed, pipeline_mode=pipeline_mode)
+    finally:
+        gc.enable()
+    assert replies[-2:] == [CLOSING, prompts.INTERVIEW_COMPLETE]
+
+    traced = _telemetry()
+    tracemalloc.start()
+    try:
+        await replay(monkeypatch, name, f"{name}-traced", traced, pipeline_mode=pipeline_mode)
+    finally:
+        tracemalloc.stop()
+
+    results = {}
+    for node, metrics in sorted(timed.nodes.items()):
+        row = dataclasses.asdict(metrics)
+        row["wall_ms"] = round(timed.node_latency[node].sum * 1000, 2)
+        row["allocated_bytes"] = traced.nodes[node].allocated_bytes
+        results[node] = row
+    return results
+
+
+def _regressions(name: str, results: dict, baseline: dict) -> list[str]:
+    failures = []
+    for node, row in results.items():
+        expected = baseline.get(node)
+        if expected is None:
+            failures.append(f"{name}/{node}: no baseline")
+            continue
+        for metric, value in row.items():
+            if metric in HIGHER_IS_BETTER:
+                if value < expected.get(metric, 0):
+                    failures.append(f"{name}/{node}: {metric} {value} < baseline {expected[metric]}")
+                continue
+            factor, slack = TOLERANCES.get(metric, EXACT)
+            limit = expected.get(metric, 0) * factor + slack
+            if value > limit:
+                failures.append(f"{name}/{node}: {metric} {value} > {limit:g} (baseline {expected.get(metric, 0)})")
+    return failures
+
+
+@pytest.mark.asyncio
+async def test_intake_costs_stay_within_baselines(monkeypatch: pytest.MonkeyPatch) -> None:
+    results = {
+        f"{name}/pipeline" if pipeline_mode else name: await _measure(monkeypatch, name, pipeline_mode)
+        for name in TRANSCRIPTS
+        for pipeline_mode in (False, True)
+    }
+
+    for name, nodes in results.items():
+        print(f"\n{name} ({len(TRANSCRIPTS[name.split('/')[0]])} turns)")
+        print(f"  {'node':16s} {'runs':>4s} {'wall ms':>8s} {'prompt tok':>10s} {'reads':>5s} {'writes':>6s} "
+              f"{'bytes in':>8s} {'bytes out':>9s} {'peak alloc':>10s}")
+        for node, row in nodes.items():
+            print(f"  {node:16s} {row['runs']:4d} {row['wall_ms']:8.1f} {row['prompt_tokens']:10d} "
+                  f"{row['store_reads']:5d} {row['store_writes']:6d} {row['bytes_read']:8d} "
+                  f"{row['bytes_written']:9d} {row['allocated_bytes']:10d}")
+
+    if os.environ.get("UPDATE_BASELINES") or not BASELINES.exists():
+        BASELINES.parent.mkdir(exist_ok=True)
+        BASELINES.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        pytest.skip(f"baselines written to {BASELINES}")
+
+    baselines = json.loads(BASELINES.read_text())
+    failures = [f for name, nodes in results.items() for f in _regressions(name, nodes, baselines.get(name, {}))]
+    assert not failures, "regressions against baselines/intake_graph.json:\n" + "\n".join(failures)
@@ -0,0 +1,77 @@
+"""A scripted intake with the LLM answering every turn vs. the rule-driven interview phases.
+
+The disclaimer, the consent reply and the reply to the closing question need
+no model: with ``interview_phases`` on they cost no LLM call and no model
+latency.
+"""
+import asyncio
+import importlib
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from memory_agent import prompts
+from memory_agent.app import AppContext, use_context
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+LLM_LATENCY = 0.02
+INTAKES = 5
+ANSWERS = ["I was rear-ended on Main Street", "Last Tuesday", "My neck hurts", "State Farm"]
+SCRIPT = ["hi", "yes", *ANSWERS, "No, that's all"]
+
+
+class _SlowModel(GenericFakeChatModel):
+    calls: int = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(LLM_LATENCY)
+        return await super()._agenerate(*args, **kwargs)
+
+
+def _replies(phases: bool):
+    questions = [f"Question {i}?" for i in range(len(ANSWERS))]
+    closing = AIMessage(content="Thanks. Is there anything else you would like to add?")
+    if phases:
+        return [*map(AIMessage, questions), closing]
+    return [AIMessage(content=prompts.DISCLAIMER), *map(AIMessage, questions), closing,
+            AIMessage(content=prompts.INTERVIEW_COMPLETE)]
+
+
+async def _run(monkeypatch: pytest.MonkeyPatch, phases: bool) -> tuple[int, float]:
+    llm = _SlowModel(messages=iter(_replies(phases) * INTAKES))
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    app = graph_module.builder.compile(checkpointer=MemorySaver())
+    start = time.perf_counter()
+    with use_context(AppContext(store=CachedStore(FireStore(FakeAsyncClient())))):
+        for intake in range(INTAKES):
+            config = {"configurable": {
+                "user_id": f"user-{intake}", "thread_id": f"t{intake}", "max_context_turns": 0,
+                "interview_phases": phases,
+            }}
+            for message in SCRIPT:
+                state = await app.ainvoke({"messages": [("user", message)]}, config)
+            assert state["messages"][-1].content.strip() == prompts.INTERVIEW_COMPLETE
+    return llm.calls, time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+async def test_scripted_steps_save_llm_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    llm_calls, llm_time = await _run(monkeypatch, phases=False)
+    phase_calls, phase_time = await _run(monkeypatch, phases=True)
+
+    turns = len(SCRIPT)
+    print(f"\n{INTAKES} intakes of {turns} turns, model latency {LLM_LATENCY * 1000:.0f} ms simulated:")
+    print(f"  {'mode':16s} {'LLM calls/intake':>16s} {'s/intake':>9s}")
+    print(f"  {'LLM every turn':16s} {llm_calls / INTAKES:16.1f} {llm_time / INTAKES:9.3f}")
+    print(f"  {'interview phases':16s} {phase_calls / INTAKES:16.1f} {phase_time / INTAKES:9.3f}")
+    assert llm_calls == INTAKES * turns
+    assert phase_calls == INTAKES * (turns - 2)
+    assert phase_time < llm_time
@@ -0,0 +1,34 @@
+"""Concurrent interviews against one worker: throughput should scale and the loop should stay responsive.
+
+With the model latency simulated, a worker that awaits every store and model
+call serves N clients in about the time it serves one. A blocking call
+anywhere in a turn serializes the clients instead, which shows up here as
+flat throughput and as event-loop lag.
+"""
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.loadtest import run_load
+from memory_agent.sqlite_store import SQLiteStore
+
+LLM_LATENCY = 0.05
+
+pytestmark = pytest.mark.filterwarnings("ignore:Pydantic serializer warnings")
+
+
+@pytest.mark.asyncio
+async def test_throughput_scales_with_clients(tmp_path) -> None:
+    single = await run_load(CachedStore(SQLiteStore(str(tmp_path / "one.sqlite3"))),
+                            clients=1, turns=4, llm_latency=LLM_LATENCY, jitter=0.0)
+    many = await run_load(CachedStore(SQLiteStore(str(tmp_path / "many.sqlite3"))),
+                          clients=8, turns=4, llm_latency=LLM_LATENCY, jitter=0.0)
+
+    for report in (single, many):
+        print(f"\n{report.clients:2d} clients: {report.throughput_turns_per_s:7.1f} turns/s, "
+              f"turn p50 {report.turn_latency_ms['p50']:.0f} ms p99 {report.turn_latency_ms['p99']:.0f} ms, "
+              f"loop lag p99 {report.loop_lag_ms['p99']:.1f} ms, {report.stalls} stalls")
+
+    assert single.errors == many.errors == 0
+    # Eight clients should get well over twice the throughput of one.
+    assert many.throughput_turns_per_s > 2.5 * single.throughput_turns_per_s
+    assert single.stalls == 0
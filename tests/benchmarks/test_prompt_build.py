@@ -0,0 +1,91 @@
+"""Microbenchmark of case manager prompt assembly."""
+import json
+import time
+from datetime import datetime
+
+from memory_agent import prompts
+from memory_agent.completeness import CompletenessIndex
+from memory_agent.context import count_tokens
+from memory_agent.state import CaseData, get_schema_json
+from memory_agent.utils import build_case_manager_prompt
+
+ROUNDS = 200
+
+# The pre-optimization prompt: full schema and the full case as indented JSON, every turn.
+LEGACY_CONTEXT = """
+The following is the complete schema for the required case information to be collected:
+{schema}
+
+The following is the current user's case information, stored in your memory:
+{case_memory}
+
+System Time: {time}
+"""
+
+
+def _legacy_build(case_memory: dict, now: str) -> str:
+    schema = CaseData.model_json_schema()
+    schema.pop("title", None)
+    schema.pop("$defs", None)
+    return (prompts.CASE_MANAGER_SYSTEM_PROMPT + LEGACY_CONTEXT).format(
+        schema=schema, case_memory=json.dumps(case_memory, indent=2), time=now
+    )
+
+
+def _build(case_memory: dict, now: str) -> str:
+    return build_case_manager_prompt(
+        prompts.CASE_MANAGER_SYSTEM_PROMPT,
+        prompts.CASE_MANAGER_CONTEXT_PROMPT,
+        CompletenessIndex.from_document(case_memory),
+        now,
+    )
+
+
+def _time(fn, case_memory: dict) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(case_memory, datetime.now().isoformat())
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def _half_filled_case() -> dict:
+    case = CaseData().model_dump(mode="json")
+    case["incident_details"].update(
+        incident_date="2024-03-02T17:30:00",
+        incident_time="evening",
+        incident_location="Main St and 5th Ave",
+        incident_description="Rear-ended at a red light",
+        incident_type="car accident",
+    )
+    case["medical_info"].update(initial_treatment="Went to ER", treatment_facilities=["Memorial Hospital"])
+    case["injury_details"].update(list_injury_details=["whiplash"], injury_severity="moderate")
+    return case
+
+
+def test_static_prefix_is_byte_stable() -> None:
+    first = _build({}, "2024-01-01T00:00:00")
+    second = _build(_half_filled_case(), "2024-06-01T12:00:00")
+    static = first[: first.index("The case file is")]
+    assert second.startswith(static)
+    assert "{" not in static
+
+
+def test_prompt_build_benchmark() -> None:
+    case_memory = get_schema_json()
+    legacy = _time(_legacy_build, case_memory)
+    cached = _time(_build, case_memory)
+    print(f"\nprompt build: legacy {legacy * 1e6:.1f}us, cached {cached * 1e6:.1f}us")
+    assert cached < legacy
+
+
+def test_prompt_shrinks_as_case_fills() -> None:
+    now = datetime.now().isoformat()
+    empty, half = CaseData().model_dump(mode="json"), _half_filled_case()
+    sizes = {
+        name: (count_tokens([("system", _legacy_build(doc, now))]), count_tokens([("system", _build(doc, now))]))
+        for name, doc in (("empty", empty), ("half filled", half))
+    }
+    print("\nprompt tokens (legacy, missing-slice):", sizes)
+    assert all(new < legacy for legacy, new in sizes.values())
+    missing = [len(CompletenessIndex.from_document(doc).render_missing()) for doc in (empty, half)]
+    assert missing[1] < missing[0]
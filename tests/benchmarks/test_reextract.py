@@ -0,0 +1,67 @@
+"""Offline throughput of batch re-extraction, with real trustcall and a simulated model.
+
+Every model call takes ``LLM_LATENCY`` seconds, so extracting ``THREADS``
+transcripts one at a time costs about THREADS * LLM_LATENCY; with bounded
+concurrency the same batch should finish several times faster, and a rate
+limit should cap the calls per second whatever the concurrency.
+"""
+from typing import Annotated
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.graph import StateGraph, add_messages
+from typing_extensions import TypedDict
+
+from memory_agent.checkpointer import FirestoreSaver
+from memory_agent.configuration import FireStore
+from memory_agent.loadtest import ANSWERS, SimulatedChatModel
+from memory_agent.reextract import reextract
+from tests.unit_tests.fakes import FakeAsyncClient
+
+THREADS = 16
+LLM_LATENCY = 0.05
+
+pytestmark = pytest.mark.filterwarnings("ignore:Pydantic serializer warnings")
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+async def _seeded_client() -> FakeAsyncClient:
+    builder = StateGraph(ChatState)
+    builder.add_node("ask", lambda state: {"messages": [AIMessage("Could you tell me more?")]})
+    builder.add_edge("__start__", "ask")
+    client = FakeAsyncClient()
+    graph = builder.compile(checkpointer=FirestoreSaver(client))
+    for n in range(THREADS):
+        config = {"configurable": {"thread_id": f"thread-{n:03d}", "user_id": f"user-{n:03d}"}}
+        for answer in ANSWERS[2:6]:
+            await graph.ainvoke({"messages": [HumanMessage(answer)]}, config)
+    return client
+
+
+async def _run(concurrency: int, rate=None):
+    client = await _seeded_client()
+    model = SimulatedChatModel(latency=LLM_LATENCY, jitter=0.0)
+    report = await reextract(FireStore(client), FirestoreSaver(client), model, concurrency=concurrency, rate=rate,
+                             burst=1, batch_size=10)
+    print(f"\nconcurrency {concurrency:2d} rate {rate}: {report.threads_per_s:6.1f} threads/s, "
+          f"{report.written} written in {report.batches} batches, {report.retries} retries")
+    assert (report.threads, report.failed) == (THREADS, 0)
+    assert report.written == THREADS
+    return report
+
+
+@pytest.mark.asyncio
+async def test_concurrency_scales_throughput() -> None:
+    serial = await _run(1)
+    concurrent = await _run(8)
+    assert concurrent.threads_per_s > 2.5 * serial.threads_per_s
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_caps_throughput() -> None:
+    limited = await _run(8, rate=20)
+    # At least one model call per thread, at most 20 calls per second.
+    assert limited.threads_per_s <= 20 * 1.1
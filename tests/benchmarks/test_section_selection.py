@@ -0,0 +1,92 @@
+"""Section selection on labelled interview turns: accuracy and the tool/output size it saves.
+
+A turn is extracted correctly when every section its answer fills is
+selected (or the whole case is extracted as a fallback): the per-section
+tools then see the same information the whole-case tool would.
+"""
+import json
+
+from langchain_core.messages import SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from memory_agent.context import count_tokens
+from memory_agent.sections import section_models, select_sections
+from memory_agent.state import CaseData
+
+# (question, answer, sections the answer holds data for)
+CORPUS = [
+    ("Can you tell me what happened?", "I was rear-ended at a red light on Main Street", {"incident_details"}),
+    ("When did the accident happen?", "Last Tuesday around 5pm", {"incident_details"}),
+    ("Where did it happen?", "In the parking lot of the grocery store on Elm", {"incident_details"}),
+    ("What kind of incident was it?", "I slipped on a wet floor at work", {"incident_details"}),
+    ("Were there any witnesses?", "Yes, a bystander named Tom Reed saw the whole thing", {"witness_info"}),
+    ("How can we reach the witness?", "Tom's number is 555-987-6543", {"witness_info"}),
+    ("What did the witness say?", "He told police the other driver ran the light", {"witness_info"}),
+    ("What injuries did you suffer?", "Whiplash and a sprained wrist", {"injury_details"}),
+    ("How severe is the pain?", "Pretty bad, I can't turn my neck", {"injury_details"}),
+    ("What symptoms do you have now?", "Headaches and some numbness in my fingers", {"injury_details"}),
+    ("Did you get medical treatment?", "An ambulance took me to Memorial Hospital", {"medical_info"}),
+    ("Which doctors are treating you?", "Dr. Patel, an orthopedic surgeon", {"medical_info"}),
+    ("Are you taking any medications?", "Ibuprofen and a muscle relaxer", {"medical_info"}),
+    ("Any current treatment?", "Physical therapy twice a week", {"medical_info"}),
+    ("Do you have any pre-existing conditions?", "I had a back injury in 2015", {"medical_info"}),
+    ("How were you hurt?", "I broke my arm and they put a cast on it at the ER", {"injury_details", "medical_info"}),
+    ("Who is your insurance company?", "State Farm", {"insurance_info"}),
+    ("What is your policy number?", "SF-2231-889", {"insurance_info"}),
+    ("Have you notified your insurer?", "Yes, I filed a claim on Monday", {"insurance_info"}),
+    ("What is the status of your claim?", "The adjuster said it's pending", {"insurance_info"}),
+    ("Where do you work?", "Acme Logistics, I'm a forklift operator", {"employment_info"}),
+    ("Are you employed full-time?", "Yes, full-time on the night shift", {"employment_info"}),
+    ("Have you missed any work?", "Two weeks so far, my boss put me on light duty", {"employment_info"}),
+    ("How much are your medical bills?", "About $12,500 so far", {"damages_info"}),
+    ("What was the property damage?", "The repair estimate for my car is $4,000", {"damages_info"}),
+    ("How much in lost wages?", "Around $3,200", {"damages_info"}),
+    ("Any other expenses?", "I paid $300 for rides to therapy", {"damages_info", "medical_info"}),
+    ("Have you spoken to any other attorneys?", "No, this is the first lawyer I've called", {"legal_info"}),
+    ("Did you sign anything for the insurance company?", "I signed a medical release form", {"legal_info", "insurance_info"}),
+    ("Have you received any settlement offers?", "They offered $5,000 last week", {"legal_info", "damages_info"}),
+    ("What outcome are you hoping for?", "Enough to cover my bills and lost pay", {"legal_info", "damages_info"}),
+    ("Is there anything else you'd like to add?", "My neck still hurts when I drive", {"injury_details"}),
+]
+
+
+def _tokens(text: str) -> int:
+    return count_tokens([SystemMessage(content=text)])
+
+
+def _tool_tokens(model: type) -> int:
+    return _tokens(json.dumps(convert_to_openai_tool(model)))
+
+
+def _output_tokens(value: dict) -> int:
+    return _tokens(json.dumps(value, default=str))
+
+
+def test_selection_accuracy_and_savings() -> None:
+    models = section_models()
+    full_case = CaseData().model_dump(mode="json")
+    whole_tool, whole_output = _tool_tokens(CaseData), _output_tokens(full_case)
+    correct = fallbacks = selected_total = 0
+    tool_tokens = output_tokens = 0
+    for question, answer, expected in CORPUS:
+        sections = select_sections(answer, question)
+        if not sections:
+            fallbacks += 1
+            correct += 1
+            tool_tokens += whole_tool
+            output_tokens += whole_output
+            continue
+        correct += expected <= set(sections)
+        selected_total += len(sections)
+        tool_tokens += sum(_tool_tokens(models[s]) for s in sections)
+        output_tokens += sum(_output_tokens(full_case[s]) for s in sections)
+
+    turns = len(CORPUS)
+    accuracy = correct / turns
+    print(f"\n{turns} turns: {accuracy:.0%} with every needed section selected, {fallbacks} whole-case fallbacks, "
+          f"{selected_total / max(turns - fallbacks, 1):.1f} sections per scoped turn")
+    print(f"tool schema tokens per turn: {whole_tool} -> {tool_tokens / turns:.0f}")
+    print(f"tool output tokens per turn: {whole_output} -> {output_tokens / turns:.0f}")
+    assert accuracy >= 0.95
+    assert tool_tokens / turns < whole_tool / 2
+    assert output_tokens / turns < whole_output / 2
@@ -0,0 +1,46 @@
+"""Latency per store operation: Firestore (simulated round-trip) vs the local SQLite backend."""
+import time
+
+import pytest
+
+from memory_agent.configuration import FireStore, Memory
+from memory_agent.sqlite_store import SQLiteStore
+from memory_agent.state import CaseData
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+ROUNDS = 50
+FIRESTORE_RTT = 0.002  # a low, same-region round-trip; real ones are usually higher
+
+
+async def _timings(store) -> dict[str, float]:
+    case = CaseData().model_dump(mode="json")
+    memory = Memory(key="Case", value=case, tool_name="Case")
+    operations = {
+        "set": lambda i: store.set(NAMESPACE, memory),
+        "get": lambda i: store.get(NAMESPACE),
+        "get (projected)": lambda i: store.get(NAMESPACE, fields=["medical_info"]),
+        "update": lambda i: store.update(NAMESPACE, {("medical_info", "medications"): [f"drug-{i}"]}),
+        "get_update_time": lambda i: store.get_update_time(NAMESPACE),
+    }
+    timings = {}
+    for name, operation in operations.items():
+        start = time.perf_counter()
+        for i in range(ROUNDS):
+            await operation(i)
+        timings[name] = (time.perf_counter() - start) / ROUNDS
+    return timings
+
+
+@pytest.mark.asyncio
+async def test_backend_latency(tmp_path) -> None:
+    firestore = await _timings(FireStore(FakeAsyncClient(latency=FIRESTORE_RTT)))
+    sqlite_store = SQLiteStore(str(tmp_path / "bench.sqlite3"))
+    sqlite = await _timings(sqlite_store)
+    sqlite_store.close()
+
+    print(f"\nmean latency per operation (ms), Firestore RTT {FIRESTORE_RTT * 1000:.0f} ms simulated:")
+    print(f"  {'operation':18s} {'firestore':>10s} {'sqlite':>8s}")
+    for name in firestore:
+        print(f"  {name:18s} {firestore[name] * 1000:10.2f} {sqlite[name] * 1000:8.2f}")
+    assert sqlite["get"] < firestore["get"]
@@ -0,0 +1,43 @@
+"""Bytes read and written per turn: monolithic document vs section-sharded layout."""
+import pytest
+
+from memory_agent.configuration import FireStore, Memory, ShardedFireStore
+from memory_agent.diff import diff_documents
+from memory_agent.state import CaseData
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+TURNS = 10
+
+
+def _filled_case() -> dict:
+    case = CaseData().model_dump(mode="json")
+    case["incident_details"]["incident_description"] = "Rear-ended at a red light on Main St. " * 20
+    case["injury_details"]["list_injury_details"] = ["whiplash", "concussion", "bruised ribs"]
+    case["legal_info"]["desired_outcome"] = "Cover all medical bills and lost wages. " * 10
+    return case
+
+
+async def _run_turns(store: FireStore, fields: list[str] | None) -> tuple[float, float]:
+    case = _filled_case()
+    await store.set(NAMESPACE, Memory(key="Case", value=case, tool_name="Case"))
+    store.stats = type(store.stats)()
+    for turn in range(TURNS):
+        await store.get(NAMESPACE, fields=fields)
+        new = diff_documents(case, {**case, "medical_info": {**case["medical_info"], "medications": [f"drug-{turn}"]}})
+        await store.update(NAMESPACE, new)
+        case["medical_info"]["medications"] = [f"drug-{turn}"]
+    return store.stats.bytes_read / TURNS, store.stats.bytes_written / TURNS
+
+
+@pytest.mark.asyncio
+async def test_layout_bytes_per_turn() -> None:
+    document = await _run_turns(FireStore(FakeAsyncClient()), None)
+    sharded_full = await _run_turns(ShardedFireStore(FakeAsyncClient()), None)
+    sharded_projected = await _run_turns(ShardedFireStore(FakeAsyncClient()), ["medical_info"])
+    print("\nbytes/turn (read, written):")
+    print(f"  document          {document[0]:8.0f} {document[1]:6.0f}")
+    print(f"  sections, full    {sharded_full[0]:8.0f} {sharded_full[1]:6.0f}")
+    print(f"  sections, masked  {sharded_projected[0]:8.0f} {sharded_projected[1]:6.0f}")
+    assert sharded_projected[0] < document[0] / 5
+    assert sharded_full[0] == pytest.approx(document[0], rel=0.05)
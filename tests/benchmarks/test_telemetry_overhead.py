@@ -0,0 +1,61 @@
+"""Cost of the node and store instrumentation, with telemetry off and on.
+
+Off, an instrumented node pays a config lookup and a store operation a
+context variable read; both should vanish next to a Firestore round trip.
+"""
+import time
+
+import pytest
+
+from memory_agent.app import AppContext, use_context
+from memory_agent.configuration import FireStore, Memory
+from memory_agent.telemetry import instrument
+from tests.unit_tests.fakes import FakeAsyncClient
+
+CALLS = 1000
+REPEATS = 5
+FIRESTORE_READ = 0.005  # a typical single-document read, for scale
+NAMESPACE = ("Case", "user")
+
+
+async def _per_call(node, config: dict) -> float:
+    """Best of ``REPEATS`` runs, to keep scheduler noise out of a microsecond difference."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            await node({}, config)
+        best = min(best, (time.perf_counter() - start) / CALLS)
+    return best
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_overhead() -> None:
+    store = FireStore(FakeAsyncClient())
+    await store.set(NAMESPACE, Memory(key="Case", value={"incident_details": {"incident_type": "rear-end"}}, tool_name="Case"))
+
+    async def node(state: dict, config: dict) -> dict:
+        await store.get(NAMESPACE)
+        return {}
+
+    # Bypass both the node wrapper and the store decorator for the baseline.
+    raw_get = FireStore.get.__wrapped__
+
+    async def bare(state: dict, config: dict) -> dict:
+        await raw_get(store, NAMESPACE)
+        return {}
+
+    with use_context(AppContext(store=None)):
+        wrapped = instrument("node", node)
+        await _per_call(wrapped, {"configurable": {"telemetry": True}})  # warm up
+        bare_time = await _per_call(bare, {})
+        off_time = await _per_call(wrapped, {"configurable": {}})
+        on_time = await _per_call(wrapped, {"configurable": {"telemetry": True}})
+
+    print(f"\nper node call with one in-memory store read (best of {REPEATS} x {CALLS} calls):")
+    print(f"  uninstrumented  {bare_time * 1e6:7.1f} us")
+    print(f"  telemetry off   {off_time * 1e6:7.1f} us  (+{(off_time - bare_time) * 1e6:.1f} us)")
+    print(f"  telemetry on    {on_time * 1e6:7.1f} us  (+{(on_time - bare_time) * 1e6:.1f} us)")
+    print(f"  disabled overhead next to a {FIRESTORE_READ * 1000:.0f} ms Firestore read: "
+          f"{(off_time - bare_time) / FIRESTORE_READ:.2%}")
+    assert off_time - bare_time < FIRESTORE_READ / 500
@@ -0,0 +1,83 @@
+"""Bursty concurrent updates to one case: read-modify-set vs. the per-document writer.
+
+Firestore sustains roughly one write per second to a single document, so the
+number of writes, not the simulated wall time, bounds a bursty client's
+throughput.
+"""
+import asyncio
+import time
+
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore, Memory
+from memory_agent.diff import diff_documents
+from memory_agent.writer import DocumentWriter
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+PROCESSES = 2
+UPDATES = 50  # per process, all in one burst
+FIRESTORE_RTT = 0.002
+
+
+def _field(process: int, i: int) -> str:
+    return f"p{process}-expense-{i}"
+
+
+async def _seed(client: FakeAsyncClient) -> None:
+    await FireStore(client).set(NAMESPACE, Memory(key="Case", value={"damages_info": {"other_expenses": {}}}, tool_name="Case"))
+
+
+async def _read_modify_set(client: FakeAsyncClient) -> tuple[float, int]:
+    """Every update reads the case and writes it back whole: the last writer wins."""
+    await _seed(client)
+
+    async def update(store: FireStore, process: int, i: int) -> None:
+        [memory] = await store.get(NAMESPACE)
+        memory.value["damages_info"]["other_expenses"][_field(process, i)] = float(i)
+        await store.set(NAMESPACE, memory)
+
+    stores = [FireStore(client) for _ in range(PROCESSES)]
+    start = time.perf_counter()
+    await asyncio.gather(*(update(stores[p], p, i) for p in range(PROCESSES) for i in range(UPDATES)))
+    return time.perf_counter() - start, sum(s.stats.writes for s in stores)
+
+
+async def _coalesced(client: FakeAsyncClient) -> tuple[float, int, list[DocumentWriter]]:
+    """Every update goes through its process's writer, from the base it read."""
+    await _seed(client)
+    stores = [CachedStore(FireStore(client)) for _ in range(PROCESSES)]
+    writers = [DocumentWriter() for _ in range(PROCESSES)]
+
+    async def update(process: int, i: int) -> None:
+        [base] = await stores[process].get(NAMESPACE)
+        new = {"damages_info": {"other_expenses": {**base.value["damages_info"]["other_expenses"], _field(process, i): float(i)}}}
+        await writers[process].submit(stores[process], NAMESPACE, diff_documents(base.value, new), base)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(update(p, i) for p in range(PROCESSES) for i in range(UPDATES)))
+    return time.perf_counter() - start, sum(w.stats.writes for w in writers), writers
+
+
+async def _kept(client: FakeAsyncClient) -> int:
+    [memory] = await FireStore(client).get(NAMESPACE)
+    return len(memory.value["damages_info"]["other_expenses"])
+
+
+@pytest.mark.asyncio
+async def test_bursty_updates_keep_every_field() -> None:
+    naive_client, writer_client = FakeAsyncClient(latency=FIRESTORE_RTT), FakeAsyncClient(latency=FIRESTORE_RTT)
+    naive_time, naive_writes = await _read_modify_set(naive_client)
+    writer_time, writer_writes, writers = await _coalesced(writer_client)
+    naive_kept, writer_kept = await _kept(naive_client), await _kept(writer_client)
+    conflicts = sum(w.stats.conflicts for w in writers)
+
+    total = PROCESSES * UPDATES
+    print(f"\n{total} updates from {PROCESSES} processes, Firestore RTT {FIRESTORE_RTT * 1000:.0f} ms simulated:")
+    print(f"  {'strategy':16s} {'writes':>6s} {'fields kept':>11s} {'wall ms':>8s}")
+    print(f"  {'read-modify-set':16s} {naive_writes:6d} {naive_kept:11d} {naive_time * 1000:8.1f}")
+    print(f"  {'writer':16s} {writer_writes:6d} {writer_kept:11d} {writer_time * 1000:8.1f}  ({conflicts} conflicts rebased)")
+    assert writer_kept == total
+    assert naive_kept < total
+    assert writer_writes <= 2 * PROCESSES + conflicts
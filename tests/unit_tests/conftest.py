@@ -0,0 +1,21 @@
+"""Shared fixtures for the unit tests."""
+from collections.abc import Iterator
+
+import pytest
+
+from memory_agent.app import AppContext, use_context
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from tests.unit_tests.fakes import FakeAsyncClient, FakeModelPool
+
+
+@pytest.fixture
+def fake_client() -> FakeAsyncClient:
+    return FakeAsyncClient()
+
+
+@pytest.fixture
+def app_context(fake_client: FakeAsyncClient) -> Iterator[AppContext]:
+    """Run the graph nodes against an in-memory store backed by ``fake_client`` and fake models."""
+    with use_context(AppContext(store=CachedStore(FireStore(fake_client)), models=FakeModelPool())) as context:
+        yield context
@@ -0,0 +1,285 @@
+"""In-memory fakes of the external services used by memory_agent."""
+import asyncio
+import copy
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import DELETE_FIELD
+from google.cloud.firestore_v1.field_path import parse_field_path
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+from memory_agent.models import ModelPool
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=UTC)
+
+Path = tuple[str, ...]
+
+
+@dataclass
+class FakeWriteResult:
+    update_time: datetime
+
+
+@dataclass
+class FakeWriteOption:
+    last_update_time: datetime
+
+
+class FakeSnapshot:
+    """Minimal stand-in for an async Firestore DocumentSnapshot."""
+
+    def __init__(self, reference: "FakeDocument", data: dict[str, Any] | None, update_time: datetime | None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+def _apply_updates(value: dict[str, Any], field_updates: dict[str, Any]) -> dict[str, Any]:
+    value = copy.deepcopy(value)
+    for path, field_value in field_updates.items():
+        *parents, leaf = parse_field_path(path)
+        target = value
+        for key in parents:
+            target = target.setdefault(key, {})
+        if field_value is DELETE_FIELD:
+            target.pop(leaf, None)
+        else:
+            target[leaf] = field_value
+    return value
+
+
+def _merge(existing: dict[str, Any], value: dict[str, Any]) -> dict[str, Any]:
+    """Firestore ``set(..., merge=True)``: nested maps are merged, other values replaced."""
+    merged = copy.deepcopy(existing)
+    for key, field_value in value.items():
+        if isinstance(field_value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], field_value)
+        else:
+            merged[key] = field_value
+    return merged
+
+
+class FakeDocument:
+    def __init__(self, client: "FakeAsyncClient", path: Path):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, self._path + (name,))
+
+    async def get(self, field_paths: Iterable[str] | None = None) -> FakeSnapshot:
+        await self._client.round_trip()
+        return self._client.snapshot(self, field_paths)
+
+    async def set(self, value: dict[str, Any], merge: bool = False) -> FakeWriteResult:
+        await self._client.round_trip()
+        return self._client.write(self._path, value, merge=merge)
+
+    async def create(self, value: dict[str, Any]) -> FakeWriteResult:
+        await self._client.round_trip()
+        self._client.check("create", self._path, None)
+        return self._client.write(self._path, value)
+
+    async def update(self, field_updates: dict[str, Any], option: FakeWriteOption | None = None) -> FakeWriteResult:
+        await self._client.round_trip()
+        self._client.check("update", self._path, option)
+        return self._client.update(self._path, field_updates)
+
+    async def delete(self) -> None:
+        await self._client.round_trip()
+        self._client.remove(self._path)
+
+
+class FakeCollection:
+    def __init__(self, client: "FakeAsyncClient", path: Path):
+        self._client = client
+        self._path = path
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self._client, self._path + (doc_id,))
+
+    def order_by(self, field_path: str) -> "FakeQuery":
+        return FakeQuery(self).order_by(field_path)
+
+    async def stream(self) -> AsyncIterator[FakeSnapshot]:
+        async for snapshot in FakeQuery(self).stream():
+            yield snapshot
+
+
+class FakeQuery:
+    """A collection query ordered by document id, with id cursors and a limit."""
+
+    def __init__(self, collection: FakeCollection, bounds: tuple = (), limit: int | None = None):
+        self._collection = collection
+        self._bounds = bounds
+        self._limit = limit
+
+    def order_by(self, field_path: str) -> "FakeQuery":
+        if field_path != "__name__":
+            raise NotImplementedError("FakeQuery only orders by document id")
+        return self
+
+    def _bound(self, op: str, cursor: dict[str, Any]) -> "FakeQuery":
+        return FakeQuery(self._collection, self._bounds + ((op, cursor["__name__"]),), self._limit)
+
+    def start_at(self, cursor: dict[str, Any]) -> "FakeQuery":
+        return self._bound("ge", cursor)
+
+    def start_after(self, cursor: dict[str, Any]) -> "FakeQuery":
+        return self._bound("gt", cursor)
+
+    def end_before(self, cursor: dict[str, Any]) -> "FakeQuery":
+        return self._bound("lt", cursor)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return FakeQuery(self._collection, self._bounds, count)
+
+    def _matches(self, doc_id: str) -> bool:
+        checks = {"ge": doc_id.__ge__, "gt": doc_id.__gt__, "lt": doc_id.__lt__}
+        return all(checks[op](bound) for op, bound in self._bounds)
+
+    async def stream(self) -> AsyncIterator[FakeSnapshot]:
+        client, path = self._collection._client, self._collection._path
+        await client.round_trip()
+        paths = sorted(p for p in client.docs if p[:-1] == path and self._matches(p[-1]))
+        for doc_path in paths[:self._limit]:
+            yield client.snapshot(FakeDocument(client, doc_path))
+
+
+class FakeBatch:
+    def __init__(self, client: "FakeAsyncClient"):
+        self._client = client
+        self._writes: list[tuple[str, FakeDocument, Any, FakeWriteOption | None]] = []
+
+    def set(self, doc_ref: FakeDocument, value: dict[str, Any], merge: bool = False) -> None:
+        self._writes.append(("merge" if merge else "set", doc_ref, value, None))
+
+    def create(self, doc_ref: FakeDocument, value: dict[str, Any]) -> None:
+        self._writes.append(("create", doc_ref, value, None))
+
+    def update(self, doc_ref: FakeDocument, field_updates: dict[str, Any], option: FakeWriteOption | None = None) -> None:
+        self._writes.append(("update", doc_ref, field_updates, option))
+
+    def delete(self, doc_ref: FakeDocument) -> None:
+        self._writes.append(("delete", doc_ref, None, None))
+
+    async def commit(self) -> list[FakeWriteResult]:
+        await self._client.round_trip()
+        # Like Firestore, a batch with a failing precondition writes nothing.
+        for op, doc_ref, _, option in self._writes:
+            self._client.check(op, doc_ref._path, option)
+        results = []
+        for op, doc_ref, value, _ in self._writes:
+            if op in ("set", "merge", "create"):
+                results.append(self._client.write(doc_ref._path, value, merge=op == "merge"))
+            elif op == "update":
+                results.append(self._client.update(doc_ref._path, value))
+            else:
+                self._client.remove(doc_ref._path)
+        return results
+
+
+class FakeAsyncClient:
+    """In-memory client mirroring the async Firestore API used by FireStore.
+
+    Each round-trip sleeps for ``latency`` seconds so tests can observe whether
+    concurrent operations overlap.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.docs: dict[Path, dict[str, Any]] = {}
+        self.update_times: dict[Path, datetime] = {}
+        self.round_trips = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+    async def round_trip(self) -> None:
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+
+    def write_option(self, last_update_time: datetime) -> FakeWriteOption:
+        return FakeWriteOption(last_update_time)
+
+    def check(self, op: str, path: Path, option: FakeWriteOption | None) -> None:
+        """Raise the error Firestore returns when a write's precondition fails."""
+        if op == "create" and path in self.docs:
+            raise Conflict(f"Document already exists: {'/'.join(path)}")
+        if op == "update" and path not in self.docs:
+            raise NotFound(f"No document to update: {'/'.join(path)}")
+        if option is not None and self.update_times.get(path) != option.last_update_time:
+            raise FailedPrecondition(f"Document changed: {'/'.join(path)}")
+
+    def snapshot(self, doc_ref: FakeDocument, field_paths: Iterable[str] | None = None) -> FakeSnapshot:
+        data = self.docs.get(doc_ref._path)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in set(field_paths)}
+        return FakeSnapshot(doc_ref, data, self.update_times.get(doc_ref._path))
+
+    def write(self, path: Path, value: dict[str, Any], merge: bool = False) -> FakeWriteResult:
+        self.writes += 1
+        self.bytes_written += len(repr(value))
+        if merge and path in self.docs:
+            value = _merge(self.docs[path], value)
+        self.docs[path] = copy.deepcopy(value)
+        self.update_times[path] = _EPOCH + timedelta(microseconds=self.writes)
+        return FakeWriteResult(self.update_times[path])
+
+    def update(self, path: Path, field_updates: dict[str, Any]) -> FakeWriteResult:
+        if path not in self.docs:
+            raise NotFound(f"No document to update: {'/'.join(path)}")
+        return self.write(path, _apply_updates(self.docs[path], field_updates))
+
+    def remove(self, path: Path) -> None:
+        self.docs.pop(path, None)
+        self.update_times.pop(path, None)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, (name,))
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Scripted chat model that accepts tool bindings, for trustcall extractors."""
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeToolChatModel":
+        return self
+
+
+class FakeModelPool(ModelPool):
+    """Model pool handing out one unscripted fake per model name, so no provider client is built.
+
+    Tests that expect model calls script them by monkeypatching ``graph.chat_model``;
+    a call to one of these fakes fails.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fakes: dict[str, FakeToolChatModel] = {}
+
+    def get(self, name: str, **params: Any) -> FakeToolChatModel:
+        return self.fakes.setdefault(name, FakeToolChatModel(messages=iter([])))
+
+
+class SlowStreamingChatModel(GenericFakeChatModel):
+    """Scripted chat model that streams its reply one token every ``token_delay`` seconds."""
+
+    token_delay: float = 0.01
+    emitted: int = 0
+
+    async def _astream(self, messages: Any, stop: Any = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            await asyncio.sleep(self.token_delay)
+            self.emitted += 1
+            yield chunk
@@ -0,0 +1,61 @@
+import importlib
+
+import pytest
+
+from memory_agent import app, configuration
+from memory_agent.app import AppContext, current, firestore_client, use_context
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from memory_agent.models import ModelPool
+from tests.unit_tests.fakes import FakeAsyncClient
+
+
+def test_services_are_built_once_on_first_use() -> None:
+    built: list[str] = []
+
+    def store_factory() -> CachedStore:
+        built.append("store")
+        return CachedStore(FireStore(FakeAsyncClient()))
+
+    context = AppContext(store_factory=store_factory, models_factory=lambda: built.append("models") or ModelPool())
+    assert built == []
+    assert context.store is context.store
+    assert context.models is context.models
+    assert built == ["store", "models"]
+
+
+def test_use_context_injects_and_restores() -> None:
+    default = current()
+    store = CachedStore(FireStore(FakeAsyncClient()))
+    with use_context(AppContext(store=store)) as context:
+        assert current() is context
+        # ``configuration.db`` resolves through the active context.
+        assert configuration.db is store
+    assert current() is default
+
+
+def test_store_needs_credentials_only_when_built(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("FIREBASE_CREDENTIALS", raising=False)
+    monkeypatch.setattr("firebase_admin._apps", {})
+    with pytest.raises(ValueError, match="FIREBASE_CREDENTIALS"):
+        firestore_client()
+    with pytest.raises(ValueError, match="FIREBASE_CREDENTIALS"):
+        _ = AppContext().store
+    assert app.build_store(FakeAsyncClient()).store.__class__ is FireStore
+
+
+def test_graph_is_compiled_lazily() -> None:
+    graph_module = importlib.import_module("memory_agent.graph")
+    assert graph_module.graph is graph_module.get_graph()
+    assert graph_module.graph.name == "CaseManagerAgent"
+
+
+def test_store_backend_is_selected_from_environment(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    from memory_agent.sqlite_store import SQLiteStore
+
+    monkeypatch.setenv("STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "agent.sqlite3"))
+    assert isinstance(app.build_store().store, SQLiteStore)
+    monkeypatch.setenv("STORE_BACKEND", "nope")
+    with pytest.raises(ValueError, match="Unknown store backend"):
+        app.build_store()
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore, Memory, WriteConflict
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+
+
+def _memory(value: dict) -> Memory:
+    return Memory(key="user", value=value, tool_name="Case")
+
+
+@pytest.mark.asyncio
+async def test_read_through_hits_and_misses(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), validate=False)
+    await store.set(NAMESPACE, _memory({"a": 1}))
+    store.clear()
+
+    first = await store.get(NAMESPACE)
+    second = await store.get(NAMESPACE)
+
+    assert first[0].value == second[0].value == {"a": 1}
+    assert (store.stats.hits, store.stats.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_entry(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), validate=False)
+    await store.set(NAMESPACE, _memory({"a": 1}))
+    await store.set(NAMESPACE, _memory({"a": 2}))
+    assert (await store.get(NAMESPACE))[0].value == {"a": 2}
+
+
+@pytest.mark.asyncio
+async def test_lru_and_ttl_eviction(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), max_entries=2, validate=False)
+    for user in ("a", "b", "c"):
+        await store.set(("Case", user), _memory({"user": user}))
+    assert store.stats.evictions == 1
+
+    expired = CachedStore(FireStore(fake_client), ttl=0, validate=False)
+    await expired.get(("Case", "a"))
+    await expired.get(("Case", "a"))
+    assert expired.stats.hits == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_not_served_after_other_worker_writes(fake_client: FakeAsyncClient) -> None:
+    worker_a = CachedStore(FireStore(fake_client))
+    worker_b = CachedStore(FireStore(fake_client))
+    await worker_a.set(NAMESPACE, _memory({"a": 1}))
+    assert (await worker_a.get(NAMESPACE))[0].value == {"a": 1}
+
+    await worker_b.set(NAMESPACE, _memory({"a": 2}))
+
+    assert (await worker_a.get(NAMESPACE))[0].value == {"a": 2}
+    assert worker_a.stats.stale == 1
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_writes(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), write_behind=True, flush_delay=0.01)
+    for i in range(5):
+        await store.set(NAMESPACE, _memory({"a": i}))
+    assert (await store.get(NAMESPACE))[0].value == {"a": 4}
+    assert fake_client.writes == 0
+
+    await asyncio.sleep(0.05)
+
+    assert fake_client.writes == 1
+    assert fake_client.docs[NAMESPACE] == {"a": 4}
+    assert store.stats.coalesced_writes == 4
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flush_keeps_concurrent_writes(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), write_behind=True, flush_delay=10)
+    await FireStore(fake_client).set(NAMESPACE, _memory({"a": 0, "b": 0}))
+    memory = (await store.get(NAMESPACE))[0]
+    # Another worker writes b after this one read the document.
+    await FireStore(fake_client).update(NAMESPACE, {("b",): 1})
+
+    memory.value["a"] = 1
+    await store.set(NAMESPACE, memory)
+    await store.flush()
+
+    assert fake_client.docs[NAMESPACE] == {"a": 1, "b": 1}
+    assert (await store.get(NAMESPACE))[0].value == {"a": 1, "b": 1}
+
+
+class _UnavailableFireStore(FireStore):
+    attempts = 0
+
+    async def set(self, namespace, memory, *, create=False):
+        self.attempts += 1
+        raise OSError("unavailable")
+
+
+@pytest.mark.asyncio
+async def test_failing_flush_backs_off_and_drops_the_value(
+    fake_client: FakeAsyncClient, caplog: pytest.LogCaptureFixture
+) -> None:
+    backend = _UnavailableFireStore(fake_client)
+    store = CachedStore(backend, write_behind=True, flush_delay=0.02, max_flush_attempts=3)
+    await store.set(NAMESPACE, _memory({"a": 1}))
+
+    # Flushes at 0.02s, 0.06s and 0.14s: without the backoff there would be five by now.
+    await asyncio.sleep(0.1)
+    assert backend.attempts == 2 and store.stats.dropped_writes == 0
+    await asyncio.sleep(0.15)
+
+    assert backend.attempts == 3
+    assert store.stats.dropped_writes == 1 and (await store.get(NAMESPACE)) == []
+    assert "Dropping write-behind value for Case/user after 3 failed flushes" in caplog.text
+    assert "{'a': 1}" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_conditional_update_flushes_pending_write(fake_client: FakeAsyncClient) -> None:
+    store = CachedStore(FireStore(fake_client), write_behind=True, flush_delay=10)
+    read_at = await FireStore(fake_client).set(NAMESPACE, _memory({"a": 0}))
+    await store.set(NAMESPACE, _memory({"a": 1}))
+
+    with pytest.raises(WriteConflict):
+        await store.update(NAMESPACE, {("b",): 2}, last_update_time=read_at)
+
+    assert fake_client.docs[NAMESPACE] == {"a": 1}
+    current = (await store.get(NAMESPACE))[0]
+    await store.update(NAMESPACE, {("b",): 2}, last_update_time=current.update_time)
+    assert fake_client.docs[NAMESPACE] == {"a": 1, "b": 2}
+    await store.aclose()
@@ -0,0 +1,184 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Annotated
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, RemoveMessage
+from langgraph.graph import StateGraph, add_messages
+
+from memory_agent.checkpointer import FirestoreSaver
+from tests.unit_tests.fakes import FakeAsyncClient
+
+
+@dataclass(kw_only=True)
+class EchoState:
+    messages: Annotated[list[AnyMessage], add_messages] = field(default_factory=list)
+    turns: int = 0
+
+
+async def echo(state: EchoState) -> dict:
+    return {"messages": [AIMessage(f"echo: {state.messages[-1].content}")], "turns": state.turns + 1}
+
+
+def _graph(saver: FirestoreSaver):
+    builder = StateGraph(EchoState)
+    builder.add_node(echo)
+    builder.add_edge("__start__", "echo")
+    return builder.compile(checkpointer=saver)
+
+
+CONFIG = {"configurable": {"thread_id": "t1"}}
+
+
+async def _chat(graph, n: int, config: dict = CONFIG) -> None:
+    for i in range(n):
+        await graph.ainvoke({"messages": [HumanMessage(f"turn {i}")]}, config)
+
+
+@pytest.mark.asyncio
+async def test_resume_thread_from_a_new_saver(fake_client: FakeAsyncClient) -> None:
+    await _chat(_graph(FirestoreSaver(fake_client, chunk_size=3)), 4)
+
+    # A fresh process has none of the writer's in-memory state.
+    graph = _graph(FirestoreSaver(fake_client, chunk_size=3))
+    state = await graph.aget_state(CONFIG)
+    assert state.values["turns"] == 4
+    assert [m.content for m in state.values["messages"]][-2:] == ["turn 3", "echo: turn 3"]
+
+    await _chat(graph, 1)
+    state = await graph.aget_state(CONFIG)
+    assert len(state.values["messages"]) == 10
+    assert state.values["turns"] == 5
+    # The resumed history is recognized as an append to the logged one.
+    assert fake_client.docs[("checkpoint_threads", "t1", "heads", "_")]["epoch"] == 0
+
+
+@pytest.mark.asyncio
+async def test_workers_never_overwrite_a_newer_head(fake_client: FakeAsyncClient) -> None:
+    first, second = _graph(FirestoreSaver(fake_client)), _graph(FirestoreSaver(fake_client))
+    await _chat(first, 1)
+    stale = (await first.aget_state(CONFIG)).config
+
+    await _chat(second, 1)
+
+    # The first worker's cached head is stale now: its step is rebuilt on the
+    # new head instead of overwriting it, and the other worker reads it.
+    await first.aupdate_state(stale, {"messages": [HumanMessage("fork")]})
+    messages = (await second.aget_state(CONFIG)).values["messages"]
+    assert [m.content for m in messages] == ["turn 0", "echo: turn 0", "fork"]
+
+
+@pytest.mark.asyncio
+async def test_sync_interface_runs_on_the_saver_loop(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client)
+    await _chat(_graph(saver), 1)
+
+    checkpoint = await asyncio.to_thread(saver.get_tuple, CONFIG)
+    assert checkpoint is not None and len(checkpoint.checkpoint["channel_values"]["messages"]) == 2
+    assert len(await asyncio.to_thread(lambda: list(saver.list(CONFIG)))) == 3
+    with pytest.raises(asyncio.InvalidStateError):
+        saver.get_tuple(CONFIG)
+
+
+@pytest.mark.asyncio
+async def test_history_and_older_checkpoints(fake_client: FakeAsyncClient) -> None:
+    graph = _graph(FirestoreSaver(fake_client, chunk_size=2))
+    await _chat(graph, 3)
+
+    history = [s async for s in graph.aget_state_history(CONFIG)]
+    lengths = [len(s.values.get("messages", [])) for s in history]
+    assert lengths == sorted(lengths, reverse=True)
+    assert lengths[0] == 6
+    only_input = [s async for s in graph.aget_state_history(CONFIG, filter={"source": "input"})]
+    assert len(only_input) == 3
+    assert len([s async for s in graph.aget_state_history(CONFIG, limit=2)]) == 2
+
+
+@pytest.mark.asyncio
+async def test_rewritten_history_starts_a_new_epoch(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client)
+    graph = _graph(saver)
+    await _chat(graph, 2)
+    first = (await graph.aget_state(CONFIG)).values["messages"][0]
+
+    await graph.aupdate_state(CONFIG, {"messages": [RemoveMessage(id=first.id)]})
+    messages = (await graph.aget_state(CONFIG)).values["messages"]
+    assert [m.content for m in messages] == ["echo: turn 0", "turn 1", "echo: turn 1"]
+
+    # Older checkpoints still read the previous epoch.
+    oldest_full = [s async for s in graph.aget_state_history(CONFIG)][1]
+    assert len(oldest_full.values["messages"]) == 4
+    assert len((await _graph(FirestoreSaver(fake_client)).aget_state(CONFIG)).values["messages"]) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("same_saver", [True, False])
+async def test_message_replaced_by_id_is_stored(fake_client: FakeAsyncClient, same_saver: bool) -> None:
+    graph = _graph(FirestoreSaver(fake_client))
+    await _chat(graph, 2)
+    first = (await graph.aget_state(CONFIG)).values["messages"][0]
+
+    if not same_saver:
+        graph = _graph(FirestoreSaver(fake_client))
+    await graph.aupdate_state(CONFIG, {"messages": [HumanMessage("edited", id=first.id)]})
+    messages = (await _graph(FirestoreSaver(fake_client)).aget_state(CONFIG)).values["messages"]
+    assert [m.content for m in messages] == ["edited", "echo: turn 0", "turn 1", "echo: turn 1"]
+
+
+@pytest.mark.asyncio
+async def test_head_cache_is_bounded(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client, max_cached_heads=2)
+    graph = _graph(saver)
+    for thread in ("t1", "t2", "t3"):
+        await _chat(graph, 1, {"configurable": {"thread_id": thread}})
+    assert [key[0] for key in saver._heads] == ["t2", "t3"]
+
+    # An evicted thread's head is read back from Firestore.
+    await _chat(graph, 1)
+    assert len((await graph.aget_state(CONFIG)).values["messages"]) == 4
+    assert [key[0] for key in saver._heads] == ["t3", "t1"]
+
+
+@pytest.mark.asyncio
+async def test_paged_message_loading(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client, chunk_size=4)
+    await _chat(_graph(saver), 10)
+
+    reader = FirestoreSaver(fake_client, chunk_size=4)
+    reads = fake_client.round_trips
+    page = await reader.aload_messages(CONFIG, offset=6, limit=3)
+    assert [m.content for m in page] == ["turn 3", "echo: turn 3", "turn 4"]
+    # Head, checkpoint and blob, then only the two chunks covering the page.
+    assert fake_client.round_trips - reads == 5
+    assert len(await reader.aload_messages(CONFIG)) == 20
+    assert await reader.aload_messages({"configurable": {"thread_id": "missing"}}) == []
+
+
+@pytest.mark.asyncio
+async def test_compact_keeps_latest_state(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client)
+    graph = _graph(saver)
+    await _chat(graph, 5)
+    before = len(fake_client.docs)
+
+    deleted = await saver.acompact("t1", keep=1)
+    assert deleted > 0 and len(fake_client.docs) == before - deleted
+    assert len([s async for s in graph.aget_state_history(CONFIG)]) == 1
+    state = await _graph(FirestoreSaver(fake_client)).aget_state(CONFIG)
+    assert len(state.values["messages"]) == 10 and state.values["turns"] == 5
+
+    await _chat(graph, 1)
+    assert len((await graph.aget_state(CONFIG)).values["messages"]) == 12
+
+
+@pytest.mark.asyncio
+async def test_delete_thread(fake_client: FakeAsyncClient) -> None:
+    saver = FirestoreSaver(fake_client)
+    graph = _graph(saver)
+    await _chat(graph, 2)
+    await _chat(graph, 1, {"configurable": {"thread_id": "t2"}})
+
+    await saver.adelete_thread("t1")
+    assert all(path[1] != "t1" for path in fake_client.docs)
+    assert (await graph.aget_state(CONFIG)).values == {}
+    assert [t.config["configurable"]["thread_id"] async for t in saver.alist(None, limit=1)] == ["t2"]
@@ -0,0 +1,49 @@
+from memory_agent import completeness
+from memory_agent.completeness import CompletenessIndex, FieldStatus, leaf_fields
+from memory_agent.diff import diff_documents
+from memory_agent.state import CaseData
+
+
+def test_statuses_and_completion() -> None:
+    case = CaseData().model_dump(mode="json")
+    case["medical_info"]["medications"] = ["Ibuprofen"]
+    case["insurance_info"]["notification_date"] = "last week"
+    index = CompletenessIndex.from_document(case)
+
+    assert index.statuses[("medical_info", "medications")] is FieldStatus.FILLED
+    assert index.statuses[("medical_info", "initial_treatment")] is FieldStatus.EMPTY
+    assert index.statuses[("insurance_info", "notification_date")] is FieldStatus.NEEDS_CONFIRMATION
+    assert ("insurance_info", "client_insurance", "policy_number") in {leaf.path for leaf in leaf_fields()}
+    # intake_date is always set, plus medications.
+    assert index.completion == round(100 * 2 / len(leaf_fields()), 1)
+    missing = index.render_missing()
+    assert "medical_info:\n- initial_treatment: Initial medical treatment received\n" in missing
+    assert "- treating_physicians (list of str): Names of treating doctors\n" in missing
+    assert "- injury_severity\n" in missing
+    assert '- notification_date (date): Date when the insurance company was notified (confirm "last week")' in missing
+    assert "medications" not in missing
+    assert 'medical_info.medications: ["Ibuprofen"]' in index.render_collected()
+
+
+def test_incremental_update_matches_full_rebuild() -> None:
+    old = CaseData().model_dump(mode="json")
+    new = CaseData().model_dump(mode="json")
+    new["incident_details"]["incident_type"] = "car accident"
+    new["damages_info"]["lost_wages"] = 3000.0
+    index = CompletenessIndex.from_document(old)
+
+    index.update(new, diff_documents(old, new))
+
+    assert index.statuses == CompletenessIndex.from_document(new).statuses
+
+
+def test_record_update_requires_matching_version() -> None:
+    doc = CaseData().model_dump(mode="json")
+    index = completeness.index_for("user", doc, update_time=1)
+    new = {**doc, "legal_info": {**doc["legal_info"], "prior_attorneys": "None"}}
+
+    completeness.record_update("user", new, diff_documents(doc, new), base_update_time=1, update_time=2)
+    assert completeness.index_for("user", new, update_time=2) is index
+
+    completeness.record_update("user", new, [], base_update_time=1, update_time=3)
+    assert completeness.index_for("user", new, update_time=3) is not index
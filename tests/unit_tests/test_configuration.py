@@ -1,5 +1,12 @@
-from case_agent.configuration import Configuration
+from memory_agent.configuration import Configuration
 
 
 def test_configuration_from_none() -> None:
     Configuration.from_runnable_config()
+
+
+def test_configuration_coerces_environment_values(monkeypatch) -> None:
+    monkeypatch.setenv("MAX_CONTEXT_TURNS", "3")
+    assert Configuration.from_runnable_config().max_context_turns == 3
+    monkeypatch.setenv("MAX_CONTEXT_TURNS", "0")
+    assert Configuration.from_runnable_config().max_context_turns == 0
@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import Field
+
+from memory_agent.context import bounded_messages, compact_history, window_start
+from tests.unit_tests.fakes import FakeToolChatModel
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+
+def _turns(n: int) -> list:
+    messages = []
+    for i in range(n):
+        messages += [HumanMessage(content=f"answer {i}"), AIMessage(content=f"question {i + 1}")]
+    return messages
+
+
+class _RecordingModel(FakeToolChatModel):
+    calls: list = Field(default_factory=list)
+
+    async def ainvoke(self, messages, *args, **kwargs):  # type: ignore[override]
+        self.calls.append(messages)
+        return await super().ainvoke(messages, *args, **kwargs)
+
+
+def test_window_start_keeps_last_turns() -> None:
+    messages = _turns(5)
+    assert window_start(messages, 2) == 6
+    assert window_start(messages, 10) == 0
+    assert window_start(messages, 0) == 0
+
+
+@pytest.mark.asyncio
+async def test_summary_is_extended_incrementally() -> None:
+    llm = _RecordingModel(messages=iter([AIMessage(content="summary 1"), AIMessage(content="summary 2")]))
+    messages = _turns(4)
+
+    first = await compact_history(llm, messages, "", 0, max_turns=2)
+    assert first == {"summary": "summary 1", "summarized_count": 4}
+    assert await compact_history(llm, messages, "summary 1", 4, max_turns=2) == {}
+
+    messages += _turns(1)
+    second = await compact_history(llm, messages, "summary 1", 4, max_turns=2)
+    assert second == {"summary": "summary 2", "summarized_count": 6}
+    # Only the newly overflowed turn is sent, along with the existing summary.
+    system, transcript = llm.calls[-1]
+    assert "summary 1" in system.content
+    assert transcript.content == "Client: answer 2\nCase manager: question 3"
+
+
+def test_bounded_messages_prepends_summary() -> None:
+    messages = _turns(3)
+    bounded = bounded_messages(messages, "earlier turns", 4)
+    assert isinstance(bounded[0], SystemMessage) and "earlier turns" in bounded[0].content
+    assert bounded[1:] == messages[4:]
+    assert bounded_messages(messages, "", 0) == messages
+
+
+class _SlowModel(FakeToolChatModel):
+    delay: float = 0.0
+    calls: list = Field(default_factory=list)
+
+    async def ainvoke(self, messages, *args, **kwargs):  # type: ignore[override]
+        self.calls.append((time.perf_counter(), messages))
+        await asyncio.sleep(self.delay)
+        return await super().ainvoke(messages, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_summary_runs_alongside_the_reply(monkeypatch: pytest.MonkeyPatch, app_context) -> None:
+    summarizer = _SlowModel(messages=iter([AIMessage(content="summary 1")]), delay=0.1)
+    reply = _SlowModel(messages=iter([AIMessage(content="question 4")]))
+    monkeypatch.setattr(graph_module, "chat_model", {"summary-model": summarizer, "reply-model": reply}.__getitem__)
+    config = {"configurable": {"user_id": "user", "model": "reply-model", "summary_model": "summary-model",
+                               "max_context_turns": 2, "interview_phases": False, "fast_path": False}}
+
+    state = await graph_module.builder.compile().ainvoke({"messages": [*_turns(2), HumanMessage("answer 2")]}, config)
+
+    assert state["summary"] == "summary 1" and state["summarized_count"] == 2
+    # The reply did not wait for the summary and still saw the folded turn verbatim.
+    (summarized_at, _), = summarizer.calls
+    (replied_at, prompt), = reply.calls
+    assert replied_at - summarized_at < summarizer.delay
+    assert [m.content for m in prompt[1:]] == ["answer 0", "question 1", "answer 1", "question 2", "answer 2"]
@@ -0,0 +1,98 @@
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from memory_agent.app import AppContext
+from memory_agent.configuration import FireStore, Memory
+from memory_agent.diff import (
+    DELETED,
+    apply_diff,
+    diff_documents,
+    merge_changes,
+    rebase_changes,
+)
+from memory_agent.state import CaseData
+from tests.unit_tests.fakes import FakeAsyncClient
+
+# The package re-exports the compiled graph under the same name as the module.
+graph = importlib.import_module("memory_agent.graph")
+
+
+def test_diff_reports_only_changed_leaves() -> None:
+    old = {"a": 1, "medical_info": {"medications": None, "initial_treatment": "ER"}, "gone": 1}
+    new = {"a": 1, "medical_info": {"medications": ["Ibuprofen"], "initial_treatment": "ER"}, "extra": {"x": 1}}
+    changes = diff_documents(old, new)
+    assert changes == {
+        ("medical_info", "medications"): ["Ibuprofen"],
+        ("extra",): {"x": 1},
+        ("gone",): DELETED,
+    }
+    assert apply_diff(old, changes) == new
+    assert diff_documents(new, new) == {}
+
+
+def test_merge_changes_matches_sequential_application() -> None:
+    doc = {"a": 1, "medical_info": {"medications": None}, "legal_info": {"prior_attorneys": "x"}}
+    first = {("medical_info",): {"medications": ["A"]}, ("legal_info", "prior_attorneys"): DELETED}
+    second = {("medical_info", "doctor"): "Lee", ("legal_info",): {"police_report": True}, ("a",): 2}
+    merged = merge_changes(first, second)
+    assert apply_diff(doc, merged) == apply_diff(apply_diff(doc, first), second)
+    assert merged[("medical_info",)] == {"medications": ["A"], "doctor": "Lee"}
+
+
+def test_rebase_keeps_both_writers_fields() -> None:
+    base = {"medical_info": {"medications": ["A"], "doctor": None}, "intake_date": None}
+    theirs = {"medical_info": {"medications": ["A", "B"], "doctor": "Lee"}, "intake_date": None}
+    ours = {"medical_info": {"medications": ["A", "C"], "doctor": None}, "intake_date": "2024-01-01"}
+    changes = rebase_changes(diff_documents(base, ours), base, theirs)
+    assert apply_diff(theirs, changes) == {
+        "medical_info": {"medications": ["A", "B", "C"], "doctor": "Lee"},
+        "intake_date": "2024-01-01",
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_writes_changed_paths_only(fake_client: FakeAsyncClient) -> None:
+    store = FireStore(fake_client)
+    namespace = ("Case", "user")
+    old = {"damages_info": {"other_expenses": {"Home care": 1.0}, "lost_wages": None}}
+    await store.set(namespace, Memory(key="Case", value=old, tool_name="Case"))
+    new = {"damages_info": {"other_expenses": {"Home care": 2.0}, "lost_wages": 10.0}}
+
+    await store.update(namespace, diff_documents(old, new))
+    await store.update(namespace, {})
+
+    assert fake_client.docs[namespace] == new
+    assert store.stats.writes == 2
+    assert store.stats.skipped_writes == 1
+
+
+class _StubExtractor:
+    def __init__(self, response: CaseData):
+        self.response = response
+
+    async def ainvoke(self, inputs: dict) -> dict:
+        return {"responses": [self.response], "response_metadata": [{"json_doc_id": "Case"}]}
+
+
+@pytest.mark.asyncio
+async def test_update_case_writes_once_and_skips_unchanged(
+    monkeypatch: pytest.MonkeyPatch, fake_client: FakeAsyncClient, app_context: AppContext
+) -> None:
+    client, store = fake_client, app_context.store
+    stored = CaseData().model_dump(mode="json")
+    await store.set(("Case", "user"), Memory(key="Case", value=stored, tool_name="Case"))
+    extracted = CaseData()
+    extracted.medical_info.medications = ["Ibuprofen"]
+    monkeypatch.setattr(graph, "get_extractor", lambda *args, **kwargs: _StubExtractor(extracted))
+    state = graph.State(messages=[HumanMessage(content="I take ibuprofen"), AIMessage(content="ok")])
+    config = {"configurable": {"user_id": "user", "section_extraction": False}}
+
+    await graph.update_case(state, config)
+    await graph.update_case(state, config)
+
+    assert client.docs[("Case", "user")]["medical_info"]["medications"] == ["Ibuprofen"]
+    assert store.store.stats.writes == 2  # initial set + one delta update
+    assert store.store.stats.fields_written == len(stored) + 1
+    assert store.store.stats.skipped_writes == 1
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from memory_agent.configuration import FireStore, Memory, ShardedFireStore
+from memory_agent.export import export_collections, split_points
+from memory_agent.sqlite_store import SQLiteStore
+from tests.unit_tests.fakes import FakeAsyncClient
+
+CASE_IDS = ["0a", "3f", "Ab", "Kq", "Zz", "ba", "mm", "user-1", "user-2", "zz"]
+
+
+def _case(doc_id: str) -> dict:
+    return {"incident_details": {"incident_type": "car accident", "incident_location": doc_id}}
+
+
+async def _seed(store) -> None:
+    for doc_id in CASE_IDS:
+        await store.set(("Case", doc_id), Memory(key="Case", value=_case(doc_id), tool_name="Case"))
+    await store.set(("Case", "broken"), Memory(key="Case", value={"incident_details": "n/a"}, tool_name="Case"))
+    await store.set(("User", "user-1"), Memory(key="User", value={"first_name": "Jane", "age": 34}, tool_name="User"))
+
+
+def _exported(output) -> dict[str, list[dict]]:
+    rows: dict[str, list[dict]] = {}
+    for path in sorted(output.glob("*.ndjson")):
+        collection = path.name.split("-")[0]
+        rows.setdefault(collection, []).extend(json.loads(line) for line in path.read_text().splitlines())
+    return rows
+
+
+def test_split_points_cover_the_id_space_in_order() -> None:
+    assert split_points(1) == []
+    points = split_points(4)
+    assert len(points) == 3 and points == sorted(points)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", [FireStore, ShardedFireStore])
+async def test_export_validates_and_writes_every_document_once(tmp_path, layout) -> None:
+    store = layout(FakeAsyncClient())
+    await _seed(store)
+
+    report = await export_collections(store, tmp_path, partitions=3, page_size=2, chunk_size=3)
+
+    rows = _exported(tmp_path)
+    assert sorted(r["id"] for r in rows["Case"]) == CASE_IDS
+    assert rows["Case"][0]["incident_details"]["incident_type"] == "car accident"
+    assert rows["User"] == [{"id": "user-1", "first_name": "Jane", "age": 34}]
+    assert (report.exported, report.invalid) == (11, 1)
+    # Each chunk holds at most chunk_size records.
+    assert all(len(p.read_text().splitlines()) <= 3 for p in tmp_path.glob("*.ndjson"))
+
+
+class _FlakyStore(FireStore):
+    def __init__(self, db, fail_after: int):
+        super().__init__(db)
+        self.pages_left = fail_after
+
+    async def scan(self, collection, **kwargs):
+        if self.pages_left == 0:
+            raise ConnectionError("stream reset")
+        self.pages_left -= 1
+        return await super().scan(collection, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_from_checkpoint(tmp_path) -> None:
+    client = FakeAsyncClient()
+    await _seed(FireStore(client))
+
+    with pytest.raises(ConnectionError):
+        await export_collections(_FlakyStore(client, fail_after=3), tmp_path, collections=["Case"],
+                                 partitions=1, concurrency=1, page_size=2, chunk_size=2)
+    written = len(_exported(tmp_path)["Case"])
+    assert 0 < written < len(CASE_IDS)
+
+    store = FireStore(client)
+    report = await export_collections(store, tmp_path, collections=["Case"], partitions=1, page_size=2, chunk_size=2)
+
+    assert sorted(r["id"] for r in _exported(tmp_path)["Case"]) == CASE_IDS
+    assert report.exported == len(CASE_IDS) - written
+    # Finished partitions are not read again.
+    reads = store.stats.reads
+    assert (await export_collections(store, tmp_path, collections=["Case"], partitions=1)).resumed_partitions == 1
+    assert store.stats.reads == reads
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_rejects_different_partitioning(tmp_path) -> None:
+    store = FireStore(FakeAsyncClient())
+    await export_collections(store, tmp_path, partitions=2)
+    with pytest.raises(ValueError, match="partitions=2"):
+        await export_collections(store, tmp_path, partitions=4)
+
+
+@pytest.mark.asyncio
+async def test_export_from_sqlite(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "store.sqlite3"))
+    await _seed(store)
+
+    report = await export_collections(store, tmp_path / "out", partitions=4, page_size=3)
+
+    assert sorted(r["id"] for r in _exported(tmp_path / "out")["Case"]) == CASE_IDS
+    assert (report.exported, report.invalid) == (11, 1)
+
+
+@pytest.mark.asyncio
+async def test_parquet_chunks_share_one_schema(tmp_path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    store = FireStore(FakeAsyncClient())
+    await _seed(store)
+
+    await export_collections(store, tmp_path, collections=["Case"], fmt="parquet", partitions=2, chunk_size=4)
+
+    tables = [pq.read_table(p) for p in sorted(tmp_path.glob("Case-*.parquet"))]
+    assert len({t.schema for t in tables}) == 1
+    assert sum(t.num_rows for t in tables) == len(CASE_IDS)
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from memory_agent import extractors
+from memory_agent.state import CaseData, UserData
+from tests.unit_tests.fakes import FakeToolChatModel
+
+
+@pytest.fixture(autouse=True)
+def _clear_registry() -> None:
+    extractors.clear_extractors()
+
+
+def _model(*messages: AIMessage) -> FakeToolChatModel:
+    return FakeToolChatModel(messages=iter(messages))
+
+
+def test_extractor_is_built_once_and_reused() -> None:
+    llm = _model()
+    first = extractors.get_extractor(llm, [UserData], "UserData")
+    second = extractors.get_extractor(llm, [UserData], "UserData")
+    assert first is second
+    assert extractors.stats.builds == 1
+    assert extractors.stats.hits == 1
+    assert extractors.stats.build_seconds > 0
+
+
+def test_distinct_keys_get_distinct_extractors() -> None:
+    llm = _model()
+    user = extractors.get_extractor(llm, [UserData], "UserData")
+    case = extractors.get_extractor(llm, [CaseData], "CaseData")
+    other_model = extractors.get_extractor(_model(), [UserData], "UserData")
+    assert len({id(user), id(case), id(other_model)}) == 3
+
+
+def test_concurrent_lookups_build_once() -> None:
+    llm = _model()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: extractors.get_extractor(llm, [CaseData], "CaseData"), range(32)))
+    assert all(r is results[0] for r in results)
+    assert extractors.stats.builds == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_extractor_extracts() -> None:
+    llm = _model(AIMessage(content="", tool_calls=[{"name": "UserData", "args": {"first_name": "Ann"}, "id": "1"}]))
+    result = await extractors.get_extractor(llm, [UserData], "UserData").ainvoke(
+        {"messages": [("user", "My name is Ann")]}
+    )
+    assert result["responses"][0].first_name == "Ann"
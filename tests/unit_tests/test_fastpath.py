@@ -0,0 +1,118 @@
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from memory_agent.app import AppContext
+from memory_agent.configuration import Memory
+from memory_agent.fastpath import last_exchange, pre_extract
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph = importlib.import_module("memory_agent.graph")
+
+
+@pytest.mark.parametrize(
+    "question, answer, namespace, path, value",
+    [
+        ("What's the best number to reach you?", "(555) 123-4567", "User", ("phone",), "5551234567"),
+        ("What is your email address?", "it's jane.doe@example.com", "User", ("email",), "jane.doe@example.com"),
+        ("What is your date of birth?", "March 3rd, 1985", "User", ("date_of_birth",), "1985-03-03"),
+        ("What is your date of birth?", "04/15/1990", "User", ("date_of_birth",), "1990-04-15"),
+        ("What is your policy number?", "POL-884213", "Case", ("insurance_info", "client_insurance", "policy_number"), "POL-884213"),
+        ("Do you have a claim number?", "CLM20240117", "Case", ("insurance_info", "claim_number"), "CLM20240117"),
+        ("How much are your medical bills so far?", "about $12,500", "Case", ("damages_info", "medical_expenses"), 12500.0),
+        ("What was the property damage?", "3k dollars", "Case", ("damages_info", "property_damage"), 3000.0),
+        ("How can we reach the witness?", "555-987-6543", "Case", ("witness_info", "contact_info"), "555-987-6543"),
+    ],
+)
+def test_structured_answers_skip_the_llm(question, answer, namespace, path, value) -> None:
+    result = pre_extract(answer, question)
+    assert result.updates == {namespace: {path: value}}
+    assert result.skip_llm == {"Case", "User"}
+
+
+def test_free_text_still_goes_to_the_llm() -> None:
+    result = pre_extract("I broke my arm, call me at 555-123-4567", "How were you hurt?")
+    assert result.updates == {"User": {("phone",): "5551234567"}}
+    assert not result.skip_llm
+
+
+def test_contact_details_need_to_be_the_clients_own() -> None:
+    assert pre_extract("The other driver's number is 555-123-4567", "What happened next?").updates == {}
+    assert pre_extract("he gave me tom@example.com", "Who else was there?").updates == {}
+    assert pre_extract("you can reach me at jane@example.com", "Anything else?").updates == {"User": {("email",): "jane@example.com"}}
+
+
+def test_topics_are_whole_words() -> None:
+    # "mobile" in "automobile's" is not the client's mobile number.
+    assert pre_extract("the automobile's driver gave me his number 555-111-2222", "What happened next?").updates == {}
+    # "born" in "stubborn" is not a date of birth.
+    assert pre_extract("since 01/02/2023", "Was the insurer stubborn about it?").updates == {}
+    assert pre_extract("I was born 01/02/1980", "Tell me about yourself.").updates == {
+        "User": {("date_of_birth",): "1980-01-02"}
+    }
+
+
+def test_acknowledgements_skip_unless_they_answer_a_yes_no_question() -> None:
+    assert pre_extract("Yes, continue.", "Shall we move on to your medical treatment?").updates == {}
+    assert pre_extract("ok", "Please tell me when you're ready.").skip_llm == {"Case", "User"}
+    assert not pre_extract("yes", "Did you miss any work?").skip_llm
+    assert not pre_extract("no", "Have you notified your insurer?").skip_llm
+
+
+def test_amounts_and_identifiers_need_a_topic() -> None:
+    assert pre_extract("$500", "What happened next?").updates == {}
+    assert pre_extract("ABC12345", "Where did it happen?").updates == {}
+
+
+def test_last_exchange_pairs_the_reply_with_the_question() -> None:
+    messages = [
+        AIMessage(content="What's your email?"),
+        HumanMessage(content="jo@example.com"),
+        AIMessage(content="", additional_kwargs={"tool_calls": []}),
+    ]
+    assert last_exchange(messages) == ("jo@example.com", "What's your email?")
+    assert last_exchange([]) == ("", "")
+
+
+@pytest.mark.asyncio
+async def test_update_user_applies_parsed_values_without_trustcall(
+    monkeypatch: pytest.MonkeyPatch, fake_client: FakeAsyncClient, app_context: AppContext
+) -> None:
+    client, store = fake_client, app_context.store
+    await store.set(("User", "user"), Memory(key="user", value={"first_name": "Jane", "phone": ""}, tool_name="User"))
+    monkeypatch.setattr(graph, "get_extractor", lambda *args, **kwargs: pytest.fail("trustcall was called"))
+    state = graph.State(messages=[
+        AIMessage(content="What's the best phone number to reach you?"),
+        HumanMessage(content="555.123.4567"),
+        AIMessage(content="Thanks!"),
+    ])
+
+    await graph.update_user(state, {"configurable": {"user_id": "user"}})
+
+    assert client.docs[("User", "user")] == {"first_name": "Jane", "phone": "5551234567"}
+    assert store.store.stats.fields_written == 2 + 1  # initial set + the one parsed field
+
+
+@pytest.mark.asyncio
+async def test_a_bare_structured_answer_skips_trustcall(monkeypatch: pytest.MonkeyPatch, app_context: AppContext) -> None:
+    extracted = []
+
+    async def extract(llm, namespace, schema, messages, sections=()) -> None:
+        extracted.append(namespace[0])
+
+    monkeypatch.setattr(graph, "_extract", extract)
+    monkeypatch.setattr(graph, "chat_model", lambda name: pytest.fail("the extraction model was built"))
+    state = graph.State(messages=[
+        AIMessage(content="What's the best phone number to reach you?"),
+        HumanMessage(content="555.123.4567"),
+        AIMessage(content="Thanks!"),
+    ])
+    config = {"configurable": {"user_id": "user"}}
+
+    await graph.update_user(state, config)
+    await graph.update_case(state, config)
+    await graph.extract_updates(state, config)
+    await graph.extractions.wait("user")
+
+    assert extracted == []
@@ -0,0 +1,107 @@
+import importlib
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from memory_agent.llm_cache import (
+    CASE_MANAGER,
+    EXTRACTION,
+    SQLiteResponseCache,
+    cache_key,
+    default_namespace,
+)
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+
+def _generation(text: str) -> list[ChatGeneration]:
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+@pytest.mark.asyncio
+async def test_repeated_calls_are_served_from_disk(tmp_path) -> None:
+    path = str(tmp_path / "llm.sqlite")
+    cache = SQLiteResponseCache(path)
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="first"), AIMessage(content="second")]), cache=cache)
+
+    assert (await llm.ainvoke([HumanMessage(content="hi")])).content == "first"
+    assert (await llm.ainvoke([HumanMessage(content="hi")])).content == "first"
+    assert (await llm.ainvoke([HumanMessage(content="other")])).content == "second"
+    assert cache.stats[CASE_MANAGER].hits == 1
+    assert cache.stats[CASE_MANAGER].misses == 2
+
+    # A new process reading the same file replays the stored response.
+    reopened = SQLiteResponseCache(path)
+    assert reopened.lookup(*_args(llm, "hi"))[0].message.content == "first"
+
+
+def _args(llm: GenericFakeChatModel, text: str) -> tuple[str, str]:
+    from langchain_core.load import dumps
+
+    return dumps([HumanMessage(content=text)]), llm._get_llm_string()
+
+
+def test_key_depends_on_parameters_and_messages() -> None:
+    assert cache_key("p", "model=a") == cache_key("p", "model=a")
+    assert cache_key("p", "model=a") != cache_key("p", "model=b")
+    assert cache_key("p", "model=a") != cache_key("q", "model=a")
+    assert cache_key("p", "model=a", EXTRACTION) != cache_key("p", "model=a", CASE_MANAGER)
+
+
+def test_key_keeps_only_the_date_of_the_system_time() -> None:
+    morning = "...\\nSystem Time: 2024-06-01T09:12:45.123456\\n"
+    assert cache_key(morning, "m") == cache_key("...\\nSystem Time: 2024-06-01T17:03:00.5\\n", "m")
+    assert cache_key(morning, "m") != cache_key("...\\nSystem Time: 2024-06-02T09:12:45.123456\\n", "m")
+
+
+@pytest.mark.asyncio
+async def test_replayed_turn_is_a_cache_hit(tmp_path, monkeypatch: pytest.MonkeyPatch, app_context) -> None:
+    cache = SQLiteResponseCache(str(tmp_path / "llm.sqlite"))
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="first"), AIMessage(content="second")]), cache=cache)
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    app = graph_module.builder.compile()
+
+    replies = []
+    for user_id in ("replay-1", "replay-2"):
+        config = {"configurable": {"user_id": user_id, "interview_phases": False, "max_context_turns": 0}}
+        state = await app.ainvoke({"messages": [HumanMessage(content="I was rear-ended")]}, config)
+        replies.append(state["messages"][-1].content)
+
+    # The second turn differs only in its System Time stamp.
+    assert replies == ["first", "first"]
+    assert (cache.stats[CASE_MANAGER].hits, cache.stats[CASE_MANAGER].misses) == (1, 1)
+
+
+def test_tool_calls_count_as_extraction(tmp_path) -> None:
+    cache = SQLiteResponseCache(str(tmp_path / "llm.sqlite"))
+    with_tools = "[('_type', 'openai-chat'), ('tools', [{'name': 'CaseData'}])]"
+    assert default_namespace("p", with_tools) == EXTRACTION
+    assert default_namespace("p", "[('_type', 'openai-chat')]") == CASE_MANAGER
+
+    cache.update("p", with_tools, _generation("extracted"))
+    cache.lookup("p", with_tools)
+    cache.lookup("p", "[('_type', 'openai-chat')]")
+    assert cache.hit_rates() == {EXTRACTION: 1.0, CASE_MANAGER: 0.0}
+    cache.clear(namespace=EXTRACTION)
+    assert cache.count() == 0
+
+
+def test_eviction_by_size_and_age(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = SQLiteResponseCache(str(tmp_path / "llm.sqlite"), max_bytes=1_000_000, max_age=60)
+    for i in range(5):
+        cache.update(f"p{i}", "m", _generation("x" * 1000))
+    cache.lookup("p0", "m")  # p0 becomes the most recently used
+    entry = cache._conn.execute("SELECT size FROM responses LIMIT 1").fetchone()[0]
+    cache.max_bytes = 3 * entry
+    cache.update("p5", "m", _generation("x" * 1000))
+    assert cache.lookup("p0", "m") is not None
+    assert cache.lookup("p1", "m") is None
+    assert cache.stats[CASE_MANAGER].evictions >= 1
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.lookup("p0", "m") is None
+    assert cache.stats[CASE_MANAGER].stale == 1
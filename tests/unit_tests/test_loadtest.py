@@ -0,0 +1,66 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore
+from memory_agent.loadtest import percentile, run_load
+from memory_agent.sqlite_store import SQLiteStore
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+pytestmark = pytest.mark.filterwarnings("ignore:Pydantic serializer warnings")
+
+
+def test_percentile() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+    assert percentile([3.0], 99) == 3.0 and percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_clients_complete_every_turn(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "load.sqlite3"))
+    report = await run_load(CachedStore(store), clients=4, turns=4, llm_latency=0.005, configurable={"pipeline_mode": True})
+
+    assert (report.completed_turns, report.errors) == (16, 0)
+    assert 0 < report.turn_latency_ms["p50"] <= report.turn_latency_ms["p99"] <= report.turn_latency_ms["max"]
+    # Consent plus two answers extracted per client.
+    assert store.stats.writes > 4
+
+
+@pytest.mark.asyncio
+async def test_failed_background_extractions_are_errors(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    async def extract(*args, **kwargs) -> None:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("extraction failed")
+
+    monkeypatch.setattr(graph_module, "_extract", extract)
+    store = SQLiteStore(str(tmp_path / "load.sqlite3"))
+    report = await run_load(CachedStore(store), clients=2, turns=3, llm_latency=0.005, configurable={"pipeline_mode": True})
+
+    # Every turn was answered, but the extraction behind each client's answer failed.
+    assert (report.completed_turns, report.errors) == (6, 2)
+    assert graph_module.extractions.pending("load-0") is None
+
+
+class _BlockingFireStore(FireStore):
+    """A store whose reads block the event loop, like a synchronous client call would."""
+
+    async def get(self, namespace, fields=None):
+        # Deliberately blocking: this store stands in for a synchronous client call.
+        time.sleep(0.06)  # noqa: ASYNC251
+        return await super().get(namespace, fields)
+
+
+@pytest.mark.asyncio
+async def test_blocking_store_shows_up_as_loop_lag() -> None:
+    store = CachedStore(_BlockingFireStore(FakeAsyncClient()), validate=False)
+    report = await run_load(store, clients=2, turns=3, llm_latency=0.005)
+
+    assert report.errors == 0
+    assert report.stalls >= 1
+    assert report.loop_lag_ms["max"] >= 50
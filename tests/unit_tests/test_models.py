@@ -0,0 +1,56 @@
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from memory_agent.configuration import Configuration
+from memory_agent.models import ModelPool
+
+graph = importlib.import_module("memory_agent.graph")
+
+
+def test_models_are_shared_per_provider_model_and_params(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The OpenAI client is real here; it only needs a key to be constructed.
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    pool = ModelPool()
+    first = pool.get("gpt-4o-mini", temperature=0.0)
+
+    assert pool.get("openai/gpt-4o-mini", temperature=0.0) is first
+    assert pool.get("gpt-4o-mini", temperature=0.3) is not first
+    assert pool.get("gpt-4o") is not first
+    assert len(pool) == 3
+    # Every OpenAI client shares one pair of HTTP connection pools.
+    assert pool.get("gpt-4o").http_async_client is first.http_async_client
+
+
+def test_anthropic_models_share_the_pool_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    pool = ModelPool()
+    first = pool.get("anthropic/claude-3-5-haiku-latest", temperature=0.0)
+    second = pool.get("anthropic/claude-3-5-sonnet-latest")
+
+    http_client, http_async_client = pool.http_clients("anthropic")
+    assert first._client._client is http_client
+    assert second._async_client._client is http_async_client
+
+
+def test_unknown_provider_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown model provider"):
+        ModelPool().get("nope/model")
+
+
+def test_per_node_models_default_to_model() -> None:
+    conf = Configuration.from_runnable_config({"configurable": {"model": "openai/gpt-4o", "extraction_model": "gpt-4o-mini"}})
+    assert (conf.case_manager_model or conf.model) == "openai/gpt-4o"
+    assert conf.extraction_model == "gpt-4o-mini"
+
+
+@pytest.mark.asyncio
+async def test_nodes_build_no_model_they_do_not_call(app_context) -> None:
+    state = graph.State(messages=[AIMessage(content="Let me know when you're ready."), HumanMessage(content="ok")])
+    config = {"configurable": {"user_id": "user", "max_context_turns": 2}}
+
+    await graph.extract_updates(state, config)
+    await graph.extractions.drain()
+
+    assert app_context.models.fakes == {}
@@ -0,0 +1,144 @@
+import importlib
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from memory_agent import prompts
+from memory_agent.phases import (
+    asks_closing_question,
+    is_quit,
+    parse_consent,
+    wants_to_finish,
+)
+from memory_agent.server import stream_reply
+from memory_agent.state import Phase
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+
+@pytest.mark.parametrize(
+    "reply, expected",
+    [("Yes", True), ("ok, let's start", True), ("I agree.", True), ("no", False), ("Exit", False),
+     ("don't", False), ("what data do you keep?", None), ("", None)],
+)
+def test_parse_consent(reply: str, expected) -> None:
+    assert parse_consent(reply) is expected
+
+
+def test_closing_replies() -> None:
+    assert wants_to_finish("No, that's all. Thanks!")
+    assert wants_to_finish("nothing else")
+    assert not wants_to_finish("No, but my neck still hurts")
+    assert not wants_to_finish("thanks")
+    assert asks_closing_question("Great. Is there anything else you would like to add?")
+    assert not asks_closing_question("Is there anything else about the accident?")
+    assert is_quit(" Quit. ") and not is_quit("I won't quit my job")
+
+
+class _CountingModel(GenericFakeChatModel):
+    calls: int = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        self.calls += 1
+        return await super()._agenerate(*args, **kwargs)
+
+
+@pytest.fixture
+def interview(monkeypatch: pytest.MonkeyPatch, app_context):
+    llm = _CountingModel(messages=iter([
+        AIMessage(content="What happened?"),
+        AIMessage(content="Thank you. Is there anything else you would like to add?"),
+    ]))
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    app = graph_module.builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"user_id": "user", "thread_id": "t", "max_context_turns": 0, "fast_path": False,
+                               "interview_phases": True}}
+
+    async def turn(message: str) -> tuple[str, Phase]:
+        state = await app.ainvoke({"messages": [("user", message)]}, config)
+        return state["messages"][-1].content, state["phase"]
+
+    return turn, llm, app, config
+
+
+@pytest.mark.asyncio
+async def test_scripted_steps_skip_the_model(interview) -> None:
+    turn, llm, _, _ = interview
+    assert await turn("hi") == (prompts.DISCLAIMER.strip(), Phase.AWAITING_CONSENT)
+    assert await turn("what is this?") == (prompts.CONSENT_REPROMPT, Phase.AWAITING_CONSENT)
+    assert llm.calls == 0
+
+    assert await turn("yes") == ("What happened?", Phase.INTERVIEW)
+    assert llm.calls == 1
+    assert await turn("I was rear-ended") == (
+        "Thank you. Is there anything else you would like to add?", Phase.CLOSING
+    )
+    assert await turn("No, that's all") == (prompts.INTERVIEW_COMPLETE, Phase.DONE)
+    assert await turn("hello?") == (prompts.INTERVIEW_COMPLETE, Phase.DONE)
+    assert llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_declining_consent_ends_the_interview(interview) -> None:
+    turn, llm, _, _ = interview
+    await turn("hi")
+    assert await turn("no") == (prompts.CONSENT_DECLINED, Phase.DONE)
+    assert llm.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_complete_case_gets_the_scripted_closing_question(
+    monkeypatch: pytest.MonkeyPatch, interview
+) -> None:
+    turn, llm, app, config = interview
+    extracted = []
+
+    async def extract(llm, namespace, schema, messages, sections=()) -> None:
+        extracted.append(namespace[0])
+
+    monkeypatch.setattr(graph_module, "_extract", extract)
+    config["configurable"]["closing_completion"] = 0.0
+    await turn("hi")
+    # Scripted replies reach the streaming endpoint as well.
+    tokens = [t async for t in stream_reply(app, {"messages": [("user", "yes")]}, config)]
+    assert tokens == [prompts.CLOSING_QUESTION]
+    assert llm.calls == 0
+    # The last answer before the closing question is still extracted.
+    await graph_module.extractions.wait("user")
+    assert sorted(extracted) == ["Case", "User"]
+
+
+@pytest.mark.asyncio
+async def test_more_to_add_after_closing_goes_back_to_the_model(
+    monkeypatch: pytest.MonkeyPatch, interview
+) -> None:
+    turn, llm, _, config = interview
+
+    async def extract(llm, namespace, schema, messages, sections=()) -> None:
+        pass
+
+    monkeypatch.setattr(graph_module, "_extract", extract)
+    config["configurable"]["closing_completion"] = 0.0
+    await turn("hi")
+    assert await turn("yes") == (prompts.CLOSING_QUESTION, Phase.CLOSING)
+    # The case is complete, but the client has more to say: the model asks about it.
+    assert await turn("yes, I also want to tell you about my back pain") == ("What happened?", Phase.FOLLOW_UP)
+    assert await turn("It started a week after the accident") == (
+        "Thank you. Is there anything else you would like to add?", Phase.CLOSING
+    )
+    assert await turn("No, that's all") == (prompts.INTERVIEW_COMPLETE, Phase.DONE)
+    assert llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_phases_are_off_without_opting_in(monkeypatch: pytest.MonkeyPatch, app_context) -> None:
+    llm = _CountingModel(messages=iter([AIMessage(content="What happened?")]))
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    # No checkpointer, so no phase to keep: the model asks the questions from the first turn.
+    app = graph_module.builder.compile()
+    config = {"configurable": {"user_id": "user", "max_context_turns": 0, "fast_path": False}}
+
+    state = await app.ainvoke({"messages": [("user", "hi")]}, config)
+    assert state["messages"][-1].content == "What happened?" and llm.calls == 1
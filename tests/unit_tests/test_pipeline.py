@@ -0,0 +1,61 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from memory_agent.pipeline import ExtractionTracker
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+EXTRACTION_DELAY = 0.1
+
+
+@pytest.mark.asyncio
+async def test_tracker_runs_jobs_in_order_and_survives_failures() -> None:
+    tracker = ExtractionTracker()
+    order: list[int] = []
+
+    async def job(i: int, delay: float, fail: bool = False) -> None:
+        await asyncio.sleep(delay)
+        order.append(i)
+        if fail:
+            raise RuntimeError("boom")
+
+    tracker.schedule("user", lambda: job(1, 0.03, fail=True))
+    tracker.schedule("user", lambda: job(2, 0.0))
+    await tracker.wait("user")
+
+    assert order == [1, 2]
+    assert tracker.pending("user") is None
+
+
+@pytest.mark.asyncio
+async def test_pipeline_replies_before_extraction_finishes(monkeypatch: pytest.MonkeyPatch, app_context) -> None:
+    extracted: list[tuple[str, float]] = []
+
+    async def slow_extract(llm, namespace, schema, messages, sections=()) -> None:
+        await asyncio.sleep(EXTRACTION_DELAY)
+        extracted.append((namespace[0], time.perf_counter()))
+
+    replies = iter([AIMessage(content=f"question {i}") for i in range(2)])
+    fake = GenericFakeChatModel(messages=replies)
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: fake)
+    monkeypatch.setattr(graph_module, "_extract", slow_extract)
+    app = graph_module.builder.compile()
+    config = {"configurable": {"user_id": "user", "pipeline_mode": True, "max_context_turns": 0, "interview_phases": False}}
+
+    start = time.perf_counter()
+    await app.ainvoke({"messages": [("user", "I was rear-ended")]}, config)
+    first_turn = time.perf_counter() - start
+    assert first_turn < EXTRACTION_DELAY
+    assert extracted == []
+
+    # The next turn waits for the pending extraction before reading the case.
+    await app.ainvoke({"messages": [("user", "yesterday")]}, config)
+    assert {name for name, _ in extracted[:2]} == {"Case", "User"}
+    # Case and user extraction ran concurrently.
+    assert abs(extracted[0][1] - extracted[1][1]) < EXTRACTION_DELAY / 2
+    await graph_module.extractions.drain()
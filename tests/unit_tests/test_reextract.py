@@ -0,0 +1,215 @@
+import importlib
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.graph import StateGraph, add_messages
+from typing_extensions import TypedDict
+
+from memory_agent.checkpointer import FirestoreSaver
+from memory_agent.configuration import FireStore, Memory
+from memory_agent.reextract import TokenBucket, reextract, transcript_messages
+from memory_agent.state import CaseData
+from tests.unit_tests.fakes import FakeAsyncClient, FakeToolChatModel
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+pytestmark = pytest.mark.filterwarnings("ignore:Pydantic serializer warnings")
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+async def _ask(state: ChatState) -> dict:
+    return {"messages": [AIMessage("And then?")]}
+
+
+async def _seed(saver: FirestoreSaver, transcripts: dict[str, tuple[str | None, list[str]]]) -> None:
+    """Store one interview thread per entry: thread id -> (user id, client replies)."""
+    builder = StateGraph(ChatState)
+    builder.add_node("ask", _ask)
+    builder.add_edge("__start__", "ask")
+    graph = builder.compile(checkpointer=saver)
+    for thread_id, (user_id, replies) in transcripts.items():
+        configurable = {"thread_id": thread_id, **({"user_id": user_id} if user_id else {})}
+        for reply in replies:
+            await graph.ainvoke({"messages": [HumanMessage(reply)]}, {"configurable": configurable})
+
+
+class StatementExtractor:
+    """Appends the transcript's client replies to ``witness_info.statement`` of the existing case."""
+
+    def __init__(self, failures: dict[str, int]):
+        self.failures = failures
+        self.calls = 0
+        self.meanwhile: Callable[[], Awaitable[Any]] | None = None
+        """Run during the extraction, after the document was read."""
+
+    async def ainvoke(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        self.calls += 1
+        if self.meanwhile is not None:
+            await self.meanwhile()
+        replies = [str(m.content) for m in inputs["messages"] if isinstance(m, HumanMessage)]
+        key = replies[0]
+        if self.failures.get(key, 0):
+            self.failures[key] -= 1
+            raise ConnectionError("model unavailable")
+        existing = inputs["existing"][0][2] if inputs["existing"] else {}
+        known = [s for s in ((existing.get("witness_info") or {}).get("statement") or "").split(" | ") if s]
+        statement = " | ".join([*known, *(r for r in replies if r not in known)])
+        case = CaseData.model_construct(**{**existing, "witness_info": {"statement": statement}})
+        return {"responses": [case], "response_metadata": [{"json_doc_id": "Case"}]}
+
+
+@pytest.fixture
+def extractor(monkeypatch: pytest.MonkeyPatch) -> StatementExtractor:
+    fake = StatementExtractor({})
+    monkeypatch.setattr(graph_module, "get_extractor", lambda llm, tools, **kwargs: fake)
+    return fake
+
+
+def _statement(client: FakeAsyncClient, user_id: str) -> str:
+    return client.docs[("Case", user_id)]["witness_info"]["statement"]
+
+
+def test_transcript_keeps_only_what_was_said() -> None:
+    messages = [
+        HumanMessage("I fell"),
+        AIMessage("", additional_kwargs={"tool_calls": [{"id": "1", "type": "function", "function": {"name": "CaseData", "arguments": "{}"}}]}),
+        AIMessage("Where?"),
+        HumanMessage("At work"),
+    ]
+    prompt = transcript_messages(messages, "2024-06-01T10:00:00")
+    assert "2024-06-01T10:00:00" in prompt[0].content
+    assert [(m.type, m.content) for m in prompt[1:]] == [("human", "I fell"), ("ai", "Where?"), ("human", "At work")]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_the_call_rate() -> None:
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        assert await bucket.aacquire()
+    # Two calls from the full bucket, then one every 20 ms.
+    assert time.perf_counter() - start >= 0.075
+    assert not bucket.acquire(blocking=False)
+
+
+@pytest.mark.asyncio
+async def test_reextract_merges_every_transcript(extractor: StatementExtractor) -> None:
+    client = FakeAsyncClient()
+    await _seed(FirestoreSaver(client), {
+        "t1": ("ann", ["I fell at work"]),
+        "t2": ("bob", ["A car hit me", "On Main Street"]),
+        "t3": ("ann", ["My wrist is broken"]),
+        "t4": (None, ["no user"]),
+    })
+    store = FireStore(client)
+
+    report = await reextract(store, FirestoreSaver(client), FakeToolChatModel(messages=iter([])), concurrency=4)
+
+    assert (report.threads, report.extracted, report.skipped, report.failed) == (4, 3, 1, 0)
+    # Both of ann's interviews end up in one document, extracted one after the other.
+    assert _statement(client, "ann") == "I fell at work | My wrist is broken"
+    assert _statement(client, "bob") == "A car hit me | On Main Street"
+    assert report.written == 2 and report.batches == 1
+
+    # Nothing new to extract: the second run writes nothing.
+    writes = client.writes
+    again = await reextract(store, FirestoreSaver(client), FakeToolChatModel(messages=iter([])), concurrency=4)
+    assert again.written == 0 and client.writes == writes
+
+
+@pytest.mark.asyncio
+async def test_retries_then_records_failures(extractor: StatementExtractor, tmp_path) -> None:
+    extractor.failures.update({"flaky": 2, "broken": 10})
+    client = FakeAsyncClient()
+    await _seed(FirestoreSaver(client), {"t1": ("ann", ["flaky"]), "t2": ("bob", ["broken"])})
+    checkpoint = tmp_path / "progress.json"
+
+    report = await reextract(FireStore(client), FirestoreSaver(client), FakeToolChatModel(messages=iter([])),
+                             retries=2, backoff=0.001, checkpoint=checkpoint)
+
+    assert (report.written, report.failed, report.retries) == (1, 1, 4)
+    assert _statement(client, "ann") == "flaky"
+    assert ("Case", "bob") not in client.docs
+    assert json.loads(checkpoint.read_text()) == {"after": "t2", "done": [], "failed": ["t2"]}
+
+    # Later runs skip the failed thread unless asked to retry it.
+    assert (await reextract(FireStore(client), FirestoreSaver(client), FakeToolChatModel(messages=iter([])),
+                            checkpoint=checkpoint)).threads == 0
+    extractor.failures.clear()
+    report = await reextract(FireStore(client), FirestoreSaver(client), FakeToolChatModel(messages=iter([])),
+                             checkpoint=checkpoint, retry_failed=True)
+    assert (report.threads, report.written, report.failed) == (1, 1, 0)
+    assert _statement(client, "bob") == "broken"
+    assert json.loads(checkpoint.read_text())["failed"] == []
+
+
+@pytest.mark.asyncio
+async def test_updates_made_during_the_run_are_kept(extractor: StatementExtractor) -> None:
+    client = FakeAsyncClient()
+    await _seed(FirestoreSaver(client), {"t1": ("ann", ["I fell at work"])})
+    live = FireStore(client)
+    await live.set(("Case", "ann"), Memory(key="Case", value={"witness_info": {"statement": ""}}, tool_name="Case"))
+    # The live interview records a witness after the run read the case.
+    extractor.meanwhile = lambda: live.update(("Case", "ann"), {("witness_info", "name"): "Bob"})
+
+    report = await reextract(FireStore(client), FirestoreSaver(client), FakeToolChatModel(messages=iter([])))
+
+    assert report.written == 1
+    assert client.docs[("Case", "ann")]["witness_info"] == {"statement": "I fell at work", "name": "Bob"}
+
+
+class _CrashingStore(FireStore):
+    def __init__(self, db, writes: int):
+        super().__init__(db)
+        self.writes_left = writes
+
+    async def set(self, namespace, memory, **kwargs):
+        if self.writes_left == 0:
+            raise ConnectionError("lost connection")
+        self.writes_left -= 1
+        return await super().set(namespace, memory, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_resumes_after_the_last_committed_batch(extractor: StatementExtractor, tmp_path) -> None:
+    client = FakeAsyncClient()
+    users = {f"t{i}": (f"user-{i}", [f"reply {i}"]) for i in range(6)}
+    await _seed(FirestoreSaver(client), users)
+    checkpoint = tmp_path / "progress.json"
+
+    with pytest.raises(ConnectionError):
+        await reextract(_CrashingStore(client, writes=4), FirestoreSaver(client), FakeToolChatModel(messages=iter([])),
+                        concurrency=1, batch_size=2, checkpoint=checkpoint)
+    assert json.loads(checkpoint.read_text())["after"] == "t3"
+
+    calls = extractor.calls
+    report = await reextract(FireStore(client), FirestoreSaver(client), FakeToolChatModel(messages=iter([])),
+                             concurrency=1, batch_size=2, checkpoint=checkpoint)
+
+    assert report.threads == 2 and extractor.calls == calls + 2
+    assert all(_statement(client, f"user-{i}") == f"reply {i}" for i in range(6))
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_applies_to_every_model_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeAsyncClient()
+    await _seed(FirestoreSaver(client), {f"t{i}": (f"user-{i}", ["hi"]) for i in range(4)})
+    calls = []
+
+    async def extract_document(llm, schema, messages, data_list):
+        await llm.ainvoke(messages)
+        calls.append(time.perf_counter())
+
+    monkeypatch.setattr(graph_module, "extract_document", extract_document)
+    llm = FakeToolChatModel(messages=iter([AIMessage("ok")] * 4))
+    await reextract(FireStore(client), FirestoreSaver(client), llm, concurrency=4, rate=40, burst=1)
+
+    # Four concurrent calls, spaced 25 ms apart by the bucket.
+    assert len(calls) == 4 and calls[-1] - calls[0] >= 0.07
@@ -0,0 +1,77 @@
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from memory_agent.app import AppContext
+from memory_agent.configuration import Memory
+from memory_agent.sections import section_models, select_sections
+from memory_agent.state import CaseData, MedicalInfo
+from tests.unit_tests.fakes import FakeAsyncClient
+
+graph = importlib.import_module("memory_agent.graph")
+
+
+@pytest.mark.parametrize(
+    "question, answer, expected",
+    [
+        ("Are you taking any medications?", "Just ibuprofen twice a day", ("medical_info",)),
+        ("Where did the accident happen?", "At the corner of 5th and Main", ("incident_details",)),
+        ("How were you hurt?", "I sprained my wrist and went to the ER", ("injury_details", "medical_info")),
+        ("Have you spoken to a lawyer before?", "No", ("legal_info",)),
+    ],
+)
+def test_select_sections(question: str, answer: str, expected: tuple[str, ...]) -> None:
+    assert set(select_sections(answer, question)) == set(expected)
+    # The question's topic ranks first.
+    assert select_sections(answer, question)[0] == expected[0]
+
+
+def test_no_match_or_too_many_falls_back_to_whole_case() -> None:
+    assert select_sections("Sure", "Is there anything else?") == ()
+    answer = "The crash hurt my back, the hospital bill was $900 and my insurance adjuster called my boss"
+    assert len(select_sections(answer, "", max_sections=8)) > 3
+    assert select_sections(answer, "") == ()
+
+
+def test_section_models_cover_every_nested_section() -> None:
+    models = section_models()
+    assert models["medical_info"] is MedicalInfo
+    assert set(models) == set(CaseData.model_fields) - {"intake_date"}
+
+
+class _SectionExtractor:
+    def __init__(self, tools: list, calls: list):
+        self.tools = tools
+        calls.append([t.__name__ for t in tools])
+
+    async def ainvoke(self, inputs: dict) -> dict:
+        [(doc_id, tool_name, existing)] = inputs["existing"]
+        assert tool_name == "MedicalInfo" and doc_id == "medical_info"
+        updated = MedicalInfo.model_construct(**{**existing, "medications": ["Ibuprofen"]})
+        return {"responses": [updated], "response_metadata": [{"json_doc_id": doc_id}]}
+
+
+@pytest.mark.asyncio
+async def test_update_case_extracts_only_the_selected_section(
+    monkeypatch: pytest.MonkeyPatch, fake_client: FakeAsyncClient, app_context: AppContext
+) -> None:
+    stored = CaseData().model_dump(mode="json")
+    stored["incident_details"]["incident_location"] = "5th and Main"
+    await app_context.store.set(("Case", "user"), Memory(key="Case", value=stored, tool_name="Case"))
+    calls: list = []
+    monkeypatch.setattr(graph, "get_extractor", lambda llm, tools, **kwargs: _SectionExtractor(tools, calls))
+    monkeypatch.setattr(graph, "chat_model", lambda name: None)
+    state = graph.State(messages=[
+        AIMessage(content="Are you taking any medications?"),
+        HumanMessage(content="Just the ibuprofen they gave me"),
+        AIMessage(content="ok"),
+    ])
+
+    await graph.update_case(state, {"configurable": {"user_id": "user", "fast_path": False}})
+
+    assert calls == [["MedicalInfo"]]
+    case = fake_client.docs[("Case", "user")]
+    assert case["medical_info"]["medications"] == ["Ibuprofen"]
+    assert case["incident_details"]["incident_location"] == "5th and Main"
+    assert app_context.store.store.stats.fields_written == len(stored) + 1
@@ -0,0 +1,135 @@
+import asyncio
+import importlib
+import json
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from memory_agent.server import StreamingApp, stream_reply
+from tests.unit_tests.fakes import SlowStreamingChatModel
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+REPLY = "Could you tell me where the accident happened and who else was involved?"
+CONFIG = {"configurable": {"user_id": "user", "max_context_turns": 0, "interview_phases": False}}
+
+
+@pytest.fixture
+def streaming_graph(monkeypatch: pytest.MonkeyPatch, app_context):
+    llm = SlowStreamingChatModel(messages=iter([AIMessage(content=REPLY)]), token_delay=0.01)
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    return graph_module.builder.compile(), llm
+
+
+@pytest.mark.asyncio
+async def test_reply_tokens_stream_before_generation_finishes(streaming_graph) -> None:
+    app, _ = streaming_graph
+    start = time.perf_counter()
+    first_token_at = None
+    tokens = []
+    async for token in stream_reply(app, {"messages": [("user", "hello")]}, CONFIG):
+        first_token_at = first_token_at or time.perf_counter() - start
+        tokens.append(token)
+    total = time.perf_counter() - start
+
+    print(f"\ntime to first token {first_token_at * 1000:.1f}ms, full reply {total * 1000:.1f}ms")
+    assert "".join(tokens) == REPLY
+    assert first_token_at < total / 4
+
+
+def _app(graph, **kwargs) -> StreamingApp:
+    configurable = {k: v for k, v in CONFIG["configurable"].items() if k != "user_id"}
+    return StreamingApp(lambda: graph, configurable=configurable, **kwargs)
+
+
+async def _call(app: StreamingApp, body: dict, send_delay: float = 0.0, user: bytes = b"user") -> list[bytes]:
+    sent: list[bytes] = []
+    requests = [{"type": "http.request", "body": json.dumps(body).encode()}]
+
+    async def receive() -> dict:
+        if requests:
+            return requests.pop(0)
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            await asyncio.sleep(send_delay)
+            sent.append(message["body"])
+
+    headers = [(b"x-authenticated-user-id", user)] if user else []
+    await app({"type": "http", "path": "/stream", "method": "POST", "headers": headers}, receive, send)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_sse_endpoint_forwards_tokens(streaming_graph) -> None:
+    app, _ = streaming_graph
+    events = await _call(_app(app), {"message": "hello"})
+    tokens = [json.loads(e.split(b"data: ")[1])["content"] for e in events if e.startswith(b"event: token")]
+    assert "".join(tokens) == REPLY
+    assert events[-1].startswith(b"event: done")
+
+
+@pytest.mark.asyncio
+async def test_slow_client_applies_backpressure(streaming_graph) -> None:
+    app, llm = streaming_graph
+    llm.token_delay = 0.0
+    events = await _call(_app(app, max_buffered_tokens=1), {"message": "hello"}, send_delay=0.01)
+    assert len(events) > 10
+    # With a one-token buffer the model cannot run ahead of the client.
+    assert llm.emitted <= len(events) + 3
+
+
+@pytest.mark.asyncio
+async def test_clients_cannot_choose_user_or_settings(streaming_graph, app_context) -> None:
+    app, _ = streaming_graph
+    assert b"not authenticated" in (await _call(_app(app), {"message": "hello"}, user=b""))[0]
+    rejected = await _call(_app(app), {"message": "hello", "user_id": "someone-else", "model": "openai/o1"})
+    assert b"unexpected fields ['model', 'user_id']" in rejected[0]
+
+    events = await _call(_app(app), {"message": "hello", "thread_id": "t1"}, user=b"jane")
+    assert events[-1].startswith(b"event: done")
+    assert ("Case", "jane") in app_context.store.store.db.docs
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [["hello"], "hello", {"message": 42}, {"message": "hi", "thread_id": ""}])
+async def test_malformed_requests_are_rejected(streaming_graph, body) -> None:
+    app, _ = streaming_graph
+    sent: list[dict] = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": json.dumps(body).encode()}
+
+    headers = [(b"x-authenticated-user-id", b"user")]
+    await _app(app)({"type": "http", "path": "/stream", "method": "POST", "headers": headers}, receive, send)
+    assert sent[0]["status"] == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("streaming_graph")
+async def test_thread_id_is_required_with_a_checkpointer() -> None:
+    graph = graph_module.builder.compile(checkpointer=MemorySaver())
+    rejected = await _call(_app(graph), {"message": "hello"})
+    assert b"'thread_id' is required" in rejected[0]
+
+    events = await _call(_app(graph), {"message": "hello", "thread_id": "t1"})
+    assert events[-1].startswith(b"event: done")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(app_context) -> None:
+    sent: list[dict] = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await StreamingApp(lambda: None)({"type": "http", "path": "/metrics", "method": "GET"}, None, send)
+    assert sent[0]["status"] == 200
+    assert b"# TYPE memory_agent_node_seconds histogram" in sent[1]["body"]
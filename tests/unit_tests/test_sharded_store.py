@@ -0,0 +1,92 @@
+import pytest
+
+from memory_agent.configuration import FireStore, Memory, ShardedFireStore
+from memory_agent.diff import diff_documents
+from memory_agent.migrations import migrate_to_sections
+from memory_agent.state import CaseData
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+
+
+def _case() -> dict:
+    return CaseData().model_dump(mode="json")
+
+
+@pytest.mark.asyncio
+async def test_roundtrip_and_projection(fake_client: FakeAsyncClient) -> None:
+    store = ShardedFireStore(fake_client)
+    case = _case()
+    await store.set(NAMESPACE, Memory(key="Case", value=case, tool_name="Case"))
+
+    assert (await store.get(NAMESPACE))[0].value == case
+    projected = (await store.get(NAMESPACE, fields=["medical_info"]))[0].value
+    assert projected == {"medical_info": case["medical_info"]}
+    assert ("Case", "user", "sections", "medical_info") in fake_client.docs
+
+
+@pytest.mark.asyncio
+async def test_update_touches_only_changed_sections(fake_client: FakeAsyncClient) -> None:
+    store = ShardedFireStore(fake_client)
+    case = _case()
+    await store.set(NAMESPACE, Memory(key="Case", value=case, tool_name="Case"))
+    before = dict(fake_client.update_times)
+    new = _case()
+    new["medical_info"]["medications"] = ["Ibuprofen"]
+
+    await store.update(NAMESPACE, diff_documents(case, new))
+
+    changed = {path for path, t in fake_client.update_times.items() if before.get(path) != t}
+    assert changed == {("Case", "user"), ("Case", "user", "sections", "medical_info")}
+    assert (await store.get(NAMESPACE))[0].value == new
+
+
+@pytest.mark.asyncio
+async def test_update_of_unmigrated_document(fake_client: FakeAsyncClient) -> None:
+    case = _case()
+    written = await FireStore(fake_client).set(NAMESPACE, Memory(key="Case", value=case, tool_name="Case"))
+    store = ShardedFireStore(fake_client)
+    new = _case()
+    new["medical_info"]["medications"] = ["Ibuprofen"]
+
+    await store.update(NAMESPACE, diff_documents(case, new), last_update_time=written)
+
+    assert fake_client.docs[NAMESPACE] == new
+    assert ("Case", "user", "sections", "medical_info") not in fake_client.docs
+    assert (await store.get(NAMESPACE))[0].value == new
+
+
+@pytest.mark.asyncio
+async def test_batched_put_keeps_the_layout(fake_client: FakeAsyncClient) -> None:
+    store = ShardedFireStore(fake_client)
+    case = _case()
+    case["injury_details"]["injury_severity"] = "moderate"
+
+    await store.batch()
+    store.put(NAMESPACE, NAMESPACE[1], case)
+    store.put(("Case", "other"), "other", _case())
+    await store.commit()
+
+    assert (await store.get(NAMESPACE))[0].value == case
+    assert fake_client.docs[("Case", "user", "sections", "injury_details")]["injury_severity"] == "moderate"
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_sections(fake_client: FakeAsyncClient) -> None:
+    store = ShardedFireStore(fake_client)
+    await store.set(NAMESPACE, Memory(key="Case", value=_case(), tool_name="Case"))
+    await store.delete(NAMESPACE)
+    assert fake_client.docs == {}
+    assert await store.get(NAMESPACE) == []
+
+
+@pytest.mark.asyncio
+async def test_migration_is_idempotent(fake_client: FakeAsyncClient) -> None:
+    case = _case()
+    await FireStore(fake_client).set(NAMESPACE, Memory(key="Case", value=case, tool_name="Case"))
+
+    first = await migrate_to_sections(fake_client)
+    second = await migrate_to_sections(fake_client)
+
+    assert (first.migrated, second.migrated, second.skipped) == (1, 0, 1)
+    assert (await ShardedFireStore(fake_client).get(NAMESPACE))[0].value == case
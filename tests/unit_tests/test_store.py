@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from memory_agent.configuration import FireStore, Memory
+from tests.unit_tests.fakes import FakeAsyncClient
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_overlap() -> None:
+    latency = 0.05
+    n = 20
+    store = FireStore(FakeAsyncClient(latency=latency))
+    await store.set(("Case", "user"), Memory(key="user", value={"a": 1}, tool_name="Case"))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(store.get(("Case", "user")) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+
+    assert all(r[0].value == {"a": 1} for r in results)
+    # Serialized round-trips would take n * latency.
+    assert elapsed < latency * 4
+
+
+@pytest.mark.asyncio
+async def test_set_get_delete_roundtrip(fake_client: FakeAsyncClient) -> None:
+    store = FireStore(fake_client)
+    namespace = ("User", "user")
+    assert await store.get(namespace) == []
+    await store.set(namespace, Memory(key="user", value={"first_name": "Ann"}, tool_name="User"))
+    assert (await store.get(namespace))[0].value == {"first_name": "Ann"}
+    await store.delete(namespace)
+    assert await store.get(namespace) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_commit(fake_client: FakeAsyncClient) -> None:
+    store = FireStore(fake_client)
+    await store.batch()
+    store.put(("User", "a"), "a", {"x": 1})
+    store.put(("User", "b"), "b", {"x": 2})
+    await store.commit()
+    assert fake_client.round_trips == 1
+    assert (await store.get(("User", "b")))[0].value == {"x": 2}
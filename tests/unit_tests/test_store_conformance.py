@@ -0,0 +1,127 @@
+"""Behaviour every store backend must share, run against each of them."""
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import (
+    DocumentNotFound,
+    FireStore,
+    Memory,
+    ShardedFireStore,
+    WriteConflict,
+)
+from memory_agent.diff import DELETED, apply_diff, diff_documents
+from memory_agent.sqlite_store import SQLiteStore
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+DOC = {
+    "intake_date": "2024-01-01",
+    "medical_info": {"medications": None, "initial_treatment": "ER"},
+    "damages_info": {"other_expenses": {"Home care": 1.0}, "lost_wages": None},
+}
+
+
+@pytest.fixture(params=["firestore", "sharded", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path) -> Iterator:
+    if request.param == "firestore":
+        yield FireStore(FakeAsyncClient())
+    elif request.param == "sharded":
+        yield ShardedFireStore(FakeAsyncClient())
+    else:
+        backend = SQLiteStore(str(tmp_path / "store.sqlite3"))
+        yield backend
+        backend.close()
+
+
+def _memory(value: dict) -> Memory:
+    return Memory(key="Case", value=value, tool_name="Case")
+
+
+@pytest.mark.asyncio
+async def test_set_get_delete(store) -> None:
+    assert await store.get(NAMESPACE) == []
+    assert await store.get_update_time(NAMESPACE) is None
+
+    update_time = await store.set(NAMESPACE, _memory(DOC))
+    [memory] = await store.get(NAMESPACE)
+    assert memory.value == DOC
+    assert memory.update_time == update_time == await store.get_update_time(NAMESPACE)
+
+    await store.delete(NAMESPACE)
+    assert await store.get(NAMESPACE) == []
+
+
+@pytest.mark.asyncio
+async def test_projected_get(store) -> None:
+    await store.set(NAMESPACE, _memory(DOC))
+    [memory] = await store.get(NAMESPACE, fields=["medical_info"])
+    assert memory.value["medical_info"] == DOC["medical_info"]
+    assert "damages_info" not in memory.value
+
+
+@pytest.mark.asyncio
+async def test_update_writes_deltas(store) -> None:
+    first = await store.set(NAMESPACE, _memory(DOC))
+    new = apply_diff(DOC, {("medical_info", "medications"): ["Ibuprofen"], ("legal_info",): {"prior_attorneys": "None"}})
+    del new["damages_info"]["other_expenses"]
+    changes = diff_documents(DOC, new)
+    assert ("damages_info", "other_expenses") in changes and changes[("damages_info", "other_expenses")] is DELETED
+
+    second = await store.update(NAMESPACE, changes)
+    assert second != first
+    assert (await store.get(NAMESPACE))[0].value == new
+    assert await store.update(NAMESPACE, {}) is None
+    assert store.stats.skipped_writes == 1
+
+
+@pytest.mark.asyncio
+async def test_conditional_writes(store) -> None:
+    first = await store.set(NAMESPACE, _memory(DOC), create=True)
+    with pytest.raises(WriteConflict):
+        await store.set(NAMESPACE, _memory({}), create=True)
+
+    second = await store.update(NAMESPACE, {("intake_date",): "2024-02-01"}, last_update_time=first)
+    with pytest.raises(WriteConflict):
+        await store.update(NAMESPACE, {("intake_date",): "2024-03-01"}, last_update_time=first)
+    assert (await store.get(NAMESPACE))[0].value["intake_date"] == "2024-02-01"
+    assert await store.get_update_time(NAMESPACE) == second
+    assert store.stats.conflicts == 2
+
+
+@pytest.mark.asyncio
+async def test_update_of_missing_document(store) -> None:
+    with pytest.raises(DocumentNotFound):
+        await store.update(NAMESPACE, {("intake_date",): "2024-01-02"})
+
+
+@pytest.mark.asyncio
+async def test_batch_put_commit(store) -> None:
+    await store.batch()
+    store.put(("User", "a"), "a", {"x": 1})
+    store.put(("User", "b"), "b", {"x": 2})
+    await store.commit()
+    assert (await store.get(("User", "a")))[0].value == {"x": 1}
+    assert (await store.get(("User", "b")))[0].value == {"x": 2}
+    assert store.stats.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_put_requires_batch(store) -> None:
+    with pytest.raises(RuntimeError):
+        store.put(("User", "a"), "a", {"x": 1})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_and_cache_validation(store) -> None:
+    cached = CachedStore(store)
+    await cached.set(NAMESPACE, _memory(DOC))
+    await asyncio.gather(*(
+        store.update(NAMESPACE, {("damages_info", "lost_wages"): float(i)}) for i in range(10)
+    ))
+    # A write behind the cache's back is detected through the update time.
+    [memory] = await cached.get(NAMESPACE)
+    assert memory.value["damages_info"]["lost_wages"] in {float(i) for i in range(10)}
+    assert cached.stats.stale == 1
@@ -0,0 +1,100 @@
+import contextlib
+import importlib
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from memory_agent.app import AppContext
+from memory_agent.configuration import Memory
+from memory_agent.telemetry import Histogram, Telemetry, enabled
+
+graph_module = importlib.import_module("memory_agent.graph")
+
+CONFIG = {"configurable": {"user_id": "user", "max_context_turns": 0, "interview_phases": False, "telemetry": True}}
+
+
+class _Span:
+    def __init__(self, name: str, attributes: dict):
+        self.name, self.attributes = name, dict(attributes)
+
+    def set_attributes(self, attributes: dict) -> None:
+        self.attributes.update(attributes)
+
+
+class _Tracer:
+    """Records spans with their parent, like an OpenTelemetry SDK exporter would."""
+
+    def __init__(self):
+        self.spans: list[tuple[_Span, str]] = []
+        self._stack: list[str] = []
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name: str, attributes: dict):
+        span = _Span(name, attributes)
+        self.spans.append((span, self._stack[-1] if self._stack else ""))
+        self._stack.append(name)
+        try:
+            yield span
+        finally:
+            self._stack.pop()
+
+
+@pytest.fixture
+def traced(monkeypatch: pytest.MonkeyPatch, app_context: AppContext):
+    tracer = _Tracer()
+    app_context.telemetry = Telemetry(tracer=tracer)
+    reply = AIMessage(content="Where did it happen?", usage_metadata={"input_tokens": 120, "output_tokens": 6, "total_tokens": 126})
+    llm = GenericFakeChatModel(messages=iter([reply]))
+    monkeypatch.setattr(graph_module, "chat_model", lambda name: llm)
+    return graph_module.builder.compile(), app_context, tracer
+
+
+@pytest.mark.asyncio
+async def test_turn_records_node_metrics_and_spans(traced) -> None:
+    app, context, tracer = traced
+    await context.store.set(("Case", "user"), Memory(key="Case", value={"incident_details": {}}, tool_name="Case"))
+    context.store.clear()
+
+    await app.ainvoke({"messages": [("user", "I was rear-ended")]}, CONFIG)
+
+    telemetry = context.telemetry
+    case_manager = telemetry.nodes["case_manager"]
+    assert (case_manager.runs, case_manager.prompt_tokens, case_manager.completion_tokens) == (1, 120, 6)
+    assert (case_manager.store_reads, case_manager.cache_misses, case_manager.cache_hits) == (1, 1, 0)
+    assert case_manager.bytes_read == len('{"incident_details": {}}')
+    assert telemetry.node_latency["case_manager"].count == 1
+    assert telemetry.node_latency["router_node"].count == 1
+    assert telemetry.store_latency["get"].count == 1
+
+    spans = {span.name: (span, parent) for span, parent in tracer.spans}
+    assert spans["store.get"][1] == "node.case_manager"
+    assert spans["node.case_manager"][0].attributes["memory_agent.prompt_tokens"] == 120
+
+    text = telemetry.render_prometheus()
+    assert 'memory_agent_llm_tokens_total{node="case_manager",kind="prompt"} 120' in text
+    assert 'memory_agent_node_seconds_count{node="case_manager"} 1' in text
+    assert 'memory_agent_store_operation_seconds_bucket{operation="get",le="+Inf"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_disabled_records_nothing(traced) -> None:
+    app, context, tracer = traced
+    await app.ainvoke({"messages": [("user", "hi")]}, {"configurable": {**CONFIG["configurable"], "telemetry": False}})
+    assert context.telemetry.nodes == {} and tracer.spans == []
+
+
+def test_enabled_reads_the_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert enabled({"configurable": {"telemetry": True}})
+    assert not enabled({})
+    monkeypatch.setenv("TELEMETRY", "false")
+    assert not enabled({"configurable": {"telemetry": True}})
+
+
+def test_histogram_quantiles() -> None:
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5):
+        histogram.observe(value)
+    assert (histogram.quantile(0.25), histogram.quantile(0.5), histogram.quantile(0.99)) == (0.01, 0.1, 1.0)
+    histogram.observe(5.0)
+    assert histogram.quantile(1.0) == float("inf")
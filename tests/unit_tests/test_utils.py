@@ -0,0 +1,49 @@
+from memory_agent import prompts
+from memory_agent.completeness import CompletenessIndex
+from memory_agent.state import CaseData
+from memory_agent.utils import build_case_manager_prompt
+
+# A custom prompt written before the static instructions and the per-turn context were split.
+LEGACY_PROMPT = """You are an intake assistant.
+{disclaimer}
+Required case information:
+{schema}
+Stored case information:
+{case_memory}
+System Time: {time}
+"""
+
+
+def test_default_prompt_is_static_prefix_plus_context() -> None:
+    index = CompletenessIndex.from_document(CaseData().model_dump(mode="json"))
+    prompt = build_case_manager_prompt(
+        prompts.CASE_MANAGER_SYSTEM_PROMPT, prompts.CASE_MANAGER_CONTEXT_PROMPT, index, "2024-01-01T00:00:00"
+    )
+    assert prompt.startswith(prompts.CASE_MANAGER_SYSTEM_PROMPT)
+    assert prompt.endswith("System Time: 2024-01-01T00:00:00\n")
+
+
+def test_legacy_placeholders_are_still_filled() -> None:
+    case = CaseData().model_dump(mode="json")
+    case["damages_info"]["lost_wages"] = 3000.0
+    index = CompletenessIndex.from_document(case)
+
+    prompt = build_case_manager_prompt(
+        LEGACY_PROMPT, prompts.CASE_MANAGER_CONTEXT_PROMPT, index, "2024-01-01T00:00:00", "Read this first."
+    )
+
+    assert prompt.startswith("You are an intake assistant.\nRead this first.\n")
+    assert index.render_missing() in prompt and "lost_wages" not in index.render_missing()
+    assert index.render_collected() in prompt
+    assert "System Time: 2024-01-01T00:00:00" in prompt
+    # The case data is not appended a second time.
+    assert "The case file is" not in prompt
+
+
+def test_legacy_time_placeholder_keeps_the_context() -> None:
+    index = CompletenessIndex.from_document(CaseData().model_dump(mode="json"))
+    prompt = build_case_manager_prompt(
+        "You are an intake assistant. It is {time}.\n", prompts.CASE_MANAGER_CONTEXT_PROMPT, index, "noon"
+    )
+    assert prompt.startswith("You are an intake assistant. It is noon.\n")
+    assert index.render_missing() in prompt
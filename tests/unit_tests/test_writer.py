@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from memory_agent.cache import CachedStore
+from memory_agent.configuration import FireStore, Memory, WriteConflict
+from memory_agent.diff import diff_documents
+from memory_agent.writer import DocumentWriter
+from tests.unit_tests.fakes import FakeAsyncClient
+
+NAMESPACE = ("Case", "user")
+CASE = {"intake_date": None, "medical_info": {"medications": None, "doctor": None}, "legal_info": {"police_report": None}}
+
+
+async def _stored(store) -> Memory:
+    [memory] = await store.get(NAMESPACE)
+    return memory
+
+
+def _change(base: Memory, path: tuple[str, ...], value) -> dict:
+    new = dict(base.value)
+    new[path[0]] = {**base.value[path[0]], path[1]: value}
+    return diff_documents(base.value, new)
+
+
+@pytest.mark.asyncio
+async def test_updates_in_flight_are_coalesced() -> None:
+    store = FireStore(FakeAsyncClient(latency=0.01))
+    await store.set(NAMESPACE, Memory(key="Case", value=CASE, tool_name="Case"))
+    base = await _stored(store)
+    writer = DocumentWriter()
+
+    first = asyncio.create_task(writer.submit(store, NAMESPACE, _change(base, ("medical_info", "doctor"), "Lee"), base))
+    await asyncio.sleep(0.005)  # the first write is in flight
+    results = await asyncio.gather(
+        first,
+        writer.submit(store, NAMESPACE, _change(base, ("medical_info", "medications"), ["A"]), base),
+        writer.submit(store, NAMESPACE, _change(base, ("legal_info", "police_report"), True), base),
+    )
+    value = (await _stored(store)).value
+    assert value["medical_info"] == {"medications": ["A"], "doctor": "Lee"}
+    assert value["legal_info"]["police_report"] is True
+    # The first update is written alone, the two that queued up behind it together.
+    assert writer.stats.writes == 2 and writer.stats.coalesced == 2
+    assert results[1] is results[2] and results[2].value == value
+    assert not writer.pending(NAMESPACE)
+
+
+@pytest.mark.asyncio
+async def test_lost_race_is_rebased_and_retried(fake_client: FakeAsyncClient) -> None:
+    # Two processes, each with its own writer and cache, and the same stale base.
+    store_a, store_b = CachedStore(FireStore(fake_client)), CachedStore(FireStore(fake_client))
+    await store_a.set(NAMESPACE, Memory(key="Case", value=CASE, tool_name="Case"))
+    base = await _stored(store_a)
+
+    await DocumentWriter().submit(store_a, NAMESPACE, _change(base, ("medical_info", "doctor"), "Lee"), base)
+    writer = DocumentWriter()
+    result = await writer.submit(store_b, NAMESPACE, {("intake_date",): "2024-01-01"}, base)
+
+    assert writer.stats.conflicts == 1 and writer.stats.rebased == 1
+    value = (await _stored(store_b)).value
+    assert value["medical_info"]["doctor"] == "Lee" and value["intake_date"] == "2024-01-01"
+    assert result.value == value
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_merge(fake_client: FakeAsyncClient) -> None:
+    store = FireStore(fake_client)
+    template = diff_documents({}, CASE)
+    filled = diff_documents({}, {**CASE, "medical_info": {"medications": ["A"], "doctor": None}})
+    # Separate writers, as in two processes: both see no document and create it.
+    await asyncio.gather(
+        DocumentWriter().submit(store, NAMESPACE, filled, None),
+        DocumentWriter().submit(store, NAMESPACE, template, None),
+    )
+    assert (await _stored(store)).value["medical_info"]["medications"] == ["A"]
+    assert store.stats.conflicts == 1
+
+
+class _AlwaysConflicting(FireStore):
+    async def update(self, namespace, changes, *, last_update_time=None):
+        self.stats.conflicts += 1
+        raise WriteConflict("busy")
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(fake_client: FakeAsyncClient) -> None:
+    store = _AlwaysConflicting(fake_client)
+    await store.set(NAMESPACE, Memory(key="Case", value=CASE, tool_name="Case"))
+    base = await _stored(store)
+    writer = DocumentWriter(max_retries=2)
+
+    with pytest.raises(WriteConflict):
+        await writer.submit(store, NAMESPACE, _change(base, ("medical_info", "doctor"), "Lee"), base)
+    assert store.stats.conflicts == 3
+    assert not writer.pending(NAMESPACE)
+
+
+@pytest.mark.asyncio
+async def test_failure_after_the_caller_is_cancelled_is_logged(caplog: pytest.LogCaptureFixture) -> None:
+    store = _AlwaysConflicting(FakeAsyncClient(latency=0.01))
+    await store.set(NAMESPACE, Memory(key="Case", value=CASE, tool_name="Case"))
+    base = await _stored(store)
+    writer = DocumentWriter(max_retries=2)
+
+    caller = asyncio.create_task(writer.submit(store, NAMESPACE, _change(base, ("medical_info", "doctor"), "Lee"), base))
+    await asyncio.sleep(0.005)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    # The write carries on without its caller, held by the writer rather than only the loop.
+    assert writer.pending(NAMESPACE) and len(writer._drains) == 1
+    while writer.pending(NAMESPACE):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0)
+
+    assert not writer._drains
+    assert "Write to Case/user failed after its caller was cancelled: WriteConflict('busy')" in caplog.text
+
+
+class _Broken(FireStore):
+    async def update(self, namespace, changes, *, last_update_time=None):
+        raise TypeError("not a store failure")
+
+
+@pytest.mark.asyncio
+async def test_a_bug_fails_every_waiting_caller(fake_client: FakeAsyncClient) -> None:
+    store = _Broken(fake_client)
+    await store.set(NAMESPACE, Memory(key="Case", value=CASE, tool_name="Case"))
+    base = await _stored(store)
+    writer = DocumentWriter()
+
+    results = await asyncio.gather(
+        writer.submit(store, NAMESPACE, _change(base, ("medical_info", "doctor"), "Lee"), base),
+        writer.submit(store, NAMESPACE, _change(base, ("legal_info", "police_report"), "yes"), base),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, TypeError) for r in results)
+    assert not writer.pending(NAMESPACE)